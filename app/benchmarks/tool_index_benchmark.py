@@ -0,0 +1,83 @@
+"""
+Recall@k and latency of the ToolManager index backends.
+
+Compares ExactIndex (ground truth) with IVFIndex on synthetic clustered
+embeddings shaped like sentence-transformer output (384 dims).
+
+    cd app && python benchmarks/tool_index_benchmark.py
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.tool_manager import ExactIndex, IVFIndex  # noqa: E402
+
+
+def make_catalog(size: int, dim: int, topics: int, seed: int = 0):
+    """Tools drawn around topic centers, like tools of related MCP servers."""
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(topics, dim))
+    labels = rng.integers(0, topics, size=size)
+    vectors = centers[labels] + 0.6 * rng.normal(size=(size, dim))
+    queries = centers[rng.integers(0, topics, size=200)] + 0.8 * rng.normal(
+        size=(200, dim)
+    )
+    return vectors.astype(np.float32), queries.astype(np.float32)
+
+
+def benchmark(size: int, dim: int, top_k: int, precision: str) -> None:
+    vectors, queries = make_catalog(size, dim, topics=max(8, size // 200))
+    names = [f"tool_{i}" for i in range(size)]
+    categories = ["general"] * size
+
+    exact = ExactIndex(precision=precision)
+    exact.add_many(names, vectors, categories)
+    ivf = IVFIndex(precision=precision, min_train_size=0)
+    ivf.add_many(names, vectors, categories)
+
+    def run(index):
+        results = []
+        start = time.perf_counter()
+        for query in queries:
+            results.append(
+                [name for name, _ in index.search(query, None, top_k, -1.0)]
+            )
+        return results, (time.perf_counter() - start) / len(queries) * 1000
+
+    truth, exact_ms = run(exact)
+    approx, ivf_ms = run(ivf)
+    recall = np.mean(
+        [
+            len(set(t) & set(a)) / top_k
+            for t, a in zip(truth, approx, strict=True)
+        ]
+    )
+    print(
+        f"{size:>7} tools {precision:>7} | exact {exact_ms:7.3f} ms "
+        f"| ivf {ivf_ms:7.3f} ms | recall@{top_k} {recall:.3f} "
+        f"| index {ivf.memory_bytes() / 1e6:6.1f} MB"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--sizes", type=int, nargs="+", default=[1000, 10000, 50000]
+    )
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--precision", default="float32")
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        benchmark(size, args.dim, args.top_k, args.precision)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,11 @@ import streamlit as st
 import logging
 from src.ui import ChatInterface
 from src.config import get_default_mcp_servers
-from src.repositories import SessionStateUIRepository
+from src.repositories import create_repository
 from src.logging_config import setup_logging
 from src.app import StreamlitApp
-from src.agent import ChatAgent
+from src.agent import AsyncChatAgent, ChatAgent
+from src.context_window import ContextWindowManager
 from src.tools import greeting, greeting_tool
 
 setup_logging()
@@ -16,7 +17,11 @@ st.set_page_config(page_title="AI Agent", page_icon="🤖")
 
 def create_agent() -> ChatAgent:
     """Factory function to create the ChatAgent with default tools."""
-    agent = ChatAgent(use_tool_manager=False)
+    agent = AsyncChatAgent(
+        use_tool_manager=False,
+        parallel_tool_calls=True,
+        context_manager=ContextWindowManager(summarize=True),
+    )
     agent.add_tool_definition(
         greeting_tool,
         keywords=["hello", "hi", "greet", "greeting"],
@@ -30,18 +35,21 @@ def create_agent() -> ChatAgent:
 def main():
     logger.info("Starting main application")
 
-    # 1. Initialize Repository
-    repo = SessionStateUIRepository()
-
-    # 2. Initialize Chat Interface (injecting agent factory)
+    # 1. Initialize Chat Interface (injecting agent and repository
+    # factories; the repository is built once per session)
     chat_interface = ChatInterface(
-        mcp_configs=get_default_mcp_servers(), agent_factory=create_agent
+        mcp_configs=get_default_mcp_servers(),
+        agent_factory=create_agent,
+        repository_factory=create_repository,
     )
 
-    # 3. Initialize App (injecting dependencies)
-    app = StreamlitApp(repository=repo, chat_interface=chat_interface)
+    # 2. Initialize App (injecting dependencies)
+    app = StreamlitApp(
+        repository=chat_interface.ui_repository,
+        chat_interface=chat_interface,
+    )
 
-    # 4. Run App
+    # 3. Run App
     app.run()
 
 
@@ -1,10 +1,26 @@
+import asyncio
+import concurrent.futures
 import json
-from typing import Any, Callable, Dict, List, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from enum import Enum
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
 import logging
 
 import litellm  # type: ignore
-from pydantic import BaseModel  # type: ignore
 
+from src.context_window import ContextWindowManager
 from src.mcp_client import MCPServerClient
 from src.tool_models import Tool
 from src.tool_manager import ToolManager
@@ -12,9 +28,68 @@ from src.tool_manager import ToolManager
 logger = logging.getLogger("agent")
 
 
+class TurnDeadlineExceeded(TimeoutError):
+    """Raised when an agent turn runs past its turn_timeout."""
+
+
+class AgentEventType(str, Enum):
+    TEXT_DELTA = "text_delta"
+    TOOL_CALL = "tool_call"
+    TOOL_RESULT = "tool_result"
+    FINAL = "final"
+
+
+@dataclass
+class ToolCatalog:
+    """Tool schemas for one state of the agent's tools, with a name index."""
+
+    version: Tuple[Any, ...]
+    schemas: List[Dict[str, Any]]
+    # Schemas without the internal "origin" key, as sent to the LLM
+    payload: List[Dict[str, Any]]
+    # Tool name -> origins ("local" or MCP server name) providing it
+    origins: Dict[str, List[str]]
+
+
+@dataclass
+class AgentEvent:
+    """A single step of an agent turn, yielded by ChatAgent.stream_message."""
+
+    type: AgentEventType
+    content: Optional[str] = None
+    tool_call: Any = None
+
+
+@dataclass
+class _CallerCall:
+    """A call AsyncChatAgent hands back to the thread driving its turn."""
+
+    func: Callable[..., Any]
+    args: Tuple[Any, ...]
+    future: "concurrent.futures.Future[Any]"
+
+    def run(self) -> None:
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            self.future.set_result(self.func(*self.args))
+        except BaseException as error:
+            self.future.set_exception(error)
+            if not isinstance(error, Exception):
+                raise
+
+
 class ChatAgent:
     def __init__(
-        self, max_iterations: int = 10, use_tool_manager: bool = False
+        self,
+        max_iterations: int = 10,
+        use_tool_manager: bool = False,
+        parallel_tool_calls: bool = False,
+        max_tool_workers: int = 8,
+        model: str = "gemini/gemini-2.0-flash",
+        context_manager: Optional[ContextWindowManager] = None,
+        tool_timeout: Optional[float] = 60.0,
+        turn_timeout: Optional[float] = 300.0,
     ):
         system_message = {
             "role": "system",
@@ -29,12 +104,28 @@ class ChatAgent:
         }
 
         self.messages: List[Dict[str, Any]] = [system_message]
+        self.model = model
+        self.context_manager = context_manager
         self.tools: List[Tool] = []
         self.max_iterations: int = max_iterations
         self.current_iteration: int = 0
         self.tool_map: Dict[str, Callable[..., str]] = {}
         self.mcp_servers: Dict[str, MCPServerClient] = {}
         self.mcp_tools: Dict[str, List[Dict[str, Any]]] = {}
+        # Local tools that must run in call order on the calling thread
+        self.sequential_tools: Set[str] = set()
+        self.parallel_tool_calls = parallel_tool_calls
+        self._tools_version = 0
+        self._catalog: Optional[ToolCatalog] = None
+        # MCP server name -> tools_version last indexed in the ToolManager
+        self._indexed_mcp_versions: Dict[str, int] = {}
+        self.max_tool_workers = max_tool_workers
+        # Created on first use and reused by every turn of this agent
+        self._tool_pool: Optional[ThreadPoolExecutor] = None
+        # Bound a single MCP tool call and a whole process_message turn
+        self.tool_timeout = tool_timeout
+        self.turn_timeout = turn_timeout
+        self._turn_deadline: Optional[float] = None
 
         self.use_tool_manager = use_tool_manager
         self.tool_manager = ToolManager() if use_tool_manager else None
@@ -64,51 +155,175 @@ class ChatAgent:
             )
         else:
             self.tools.append(tool)
+            self._tools_version += 1
+
+    def add_tool_definitions(self, definitions: List[Dict[str, Any]]) -> None:
+        """
+        Add many tool definitions at once.
+        Each entry holds "tool" plus the optional add_tool_definition
+        arguments; with a ToolManager they are registered in one batch.
+        """
+        if not self.tool_manager:
+            for definition in definitions:
+                self.add_tool_definition(**definition)
+            return
 
-    def add_tool_function(self, name: str, func: Callable[..., str]) -> None:
+        self.tool_manager.register_tools(
+            [
+                {
+                    "name": definition["tool"].name,
+                    "tool": definition["tool"],
+                    "keywords": definition.get("keywords")
+                    or [definition["tool"].name.replace("_", " ")],
+                    "category": definition.get("category", "general"),
+                    "always_load": definition.get("always_load", False),
+                }
+                for definition in definitions
+            ]
+        )
+
+    def add_tool_function(
+        self, name: str, func: Callable[..., str], parallel_safe: bool = True
+    ) -> None:
+        """
+        Register the function backing a local tool.
+        Tools that are not parallel_safe (e.g. ones that mutate shared state
+        in order) are never moved off the calling thread.
+        """
         self.tool_map[name] = func
+        if parallel_safe:
+            self.sequential_tools.discard(name)
+        else:
+            self.sequential_tools.add(name)
 
     def add_mcp_server(self, server_name: str, mcp_client: MCPServerClient):
         self.mcp_servers[server_name] = mcp_client
+        self._tools_version += 1
+        self.index_mcp_tools()
 
-    def aggregate_tools(self):
-        """Get tools to send to LLM - uses ToolManager if enabled."""
-        if self.tool_manager:
-            active_tools = self.tool_manager.get_active_tools()
-            search_tool = self.tool_manager.get_search_tool()
+    def index_mcp_tools(self) -> None:
+        """
+        Register MCP server tools in the ToolManager so they are found via
+        search_tools and only sent to the LLM once loaded. Only servers
+        whose tool list changed since the last call are indexed again.
 
-            local_tool_schemas = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": tool.parameters,
-                    },
-                    "origin": "local",
-                }
-                for tool in [search_tool] + active_tools
+        Indexing encodes the tools, so this runs when a server is added
+        and on each script run (see SidebarManager), never during a turn.
+        """
+        if not self.tool_manager:
+            return
+
+        for server_name, mcp_client in self.mcp_servers.items():
+            if (
+                self._indexed_mcp_versions.get(server_name)
+                == mcp_client.tools_version
+            ):
+                continue
+
+            entries = []
+            for schema in mcp_client.tools:
+                function = schema["function"]
+                name = function["name"]
+                if self.tool_manager.has_tool(name) and (
+                    self.tool_manager.get_origin(name) != server_name
+                ):
+                    logger.warning(
+                        f"Skipping MCP tool '{name}' from {server_name}: name already registered"
+                    )
+                    continue
+                entries.append(
+                    {
+                        "name": name,
+                        "tool": Tool(
+                            name=name,
+                            description=function.get("description") or "",
+                            parameters=function.get("parameters") or {},
+                            strict=False,
+                        ),
+                        "keywords": [server_name] + name.split("_"),
+                        "category": "general",
+                        "origin": server_name,
+                    }
+                )
+
+            self.tool_manager.register_tools(entries)
+            self._indexed_mcp_versions[server_name] = mcp_client.tools_version
+            logger.info(
+                f"🔧 Indexed {len(entries)} tools from MCP server '{server_name}'"
+            )
+
+    def _catalog_key(self) -> Tuple[Any, ...]:
+        return (
+            self._tools_version,
+            self.tool_manager.version if self.tool_manager else None,
+            tuple(
+                (server_name, mcp_client.tools_version)
+                for server_name, mcp_client in self.mcp_servers.items()
+            ),
+        )
+
+    def get_tool_catalog(self) -> ToolCatalog:
+        """
+        Get the tool catalog sent to the LLM.
+        The catalog is rebuilt only when local tools, MCP servers/tools or
+        the ToolManager's active set change.
+        """
+        key = self._catalog_key()
+        if self._catalog is None or self._catalog.version != key:
+            self._catalog = self._build_catalog(key)
+            logger.debug(f"Rebuilt tool catalog (version {key})")
+        return self._catalog
+
+    def _build_catalog(self, version: Tuple[Any, ...]) -> ToolCatalog:
+        if self.tool_manager:
+            # MCP tools are indexed in the ToolManager and only sent once loaded
+            tools = [("local", self.tool_manager.get_search_tool())] + [
+                (self.tool_manager.get_origin(tool.name), tool)
+                for tool in self.tool_manager.get_active_tools()
             ]
         else:
-            local_tool_schemas = [
-                {
-                    "type": "function",
-                    "function": {
-                        "name": tool.name,
-                        "description": tool.description,
-                        "parameters": tool.parameters,
-                    },
-                    "origin": "local",
-                }
-                for tool in self.tools
-            ]
+            tools = [("local", tool) for tool in self.tools]
 
-        mcp_tool_schemas = []
-        for server_name, mcp_client in self.mcp_servers.items():
-            mcp_tool_schemas.extend(
-                [dict(tool, origin=server_name) for tool in mcp_client.tools]
+        schemas: List[Dict[str, Any]] = [
+            {
+                "type": "function",
+                "function": {
+                    "name": tool.name,
+                    "description": tool.description,
+                    "parameters": tool.parameters,
+                },
+                "origin": origin,
+            }
+            for origin, tool in tools
+        ]
+        if not self.tool_manager:
+            for server_name, mcp_client in self.mcp_servers.items():
+                schemas.extend(
+                    [
+                        dict(tool, origin=server_name)
+                        for tool in mcp_client.tools
+                    ]
+                )
+
+        origins: Dict[str, List[str]] = {}
+        for schema in schemas:
+            origins.setdefault(schema["function"]["name"], []).append(
+                schema["origin"]
             )
-        return local_tool_schemas + mcp_tool_schemas
+
+        return ToolCatalog(
+            version=version,
+            schemas=schemas,
+            payload=[
+                {k: v for k, v in schema.items() if k != "origin"}
+                for schema in schemas
+            ],
+            origins=origins,
+        )
+
+    def aggregate_tools(self):
+        """Get tools to send to LLM - uses ToolManager if enabled."""
+        return self.get_tool_catalog().schemas
 
     def process_message(
         self,
@@ -118,140 +333,449 @@ class ChatAgent:
         on_tool_result: Optional[Callable[[Dict[str, Any], str], None]] = None,
         tool_executor: Optional[Callable[[Any], Any]] = None,
     ):
+        final_content = "Maximum iterations reached without completion."
+        for event in self._run_turn(
+            user_input,
+            stream=False,
+            user_choice_callback=user_choice_callback,
+            tool_executor=tool_executor,
+        ):
+            if event.type == AgentEventType.TOOL_CALL and on_tool_call:
+                on_tool_call(event.tool_call)
+            elif event.type == AgentEventType.TOOL_RESULT and on_tool_result:
+                on_tool_result(event.tool_call, event.content or "")
+            elif event.type == AgentEventType.FINAL:
+                final_content = event.content or ""
+        return final_content
+
+    def stream_message(
+        self,
+        user_input: str,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]] = None,
+        tool_executor: Optional[Callable[[Any], Any]] = None,
+    ) -> Iterator[AgentEvent]:
+        """
+        Streaming variant of process_message.
+        Yields text deltas as the LLM produces them, a TOOL_CALL/TOOL_RESULT
+        pair around every tool execution and a FINAL event with the response.
+        """
+        return self._run_turn(
+            user_input,
+            stream=True,
+            user_choice_callback=user_choice_callback,
+            tool_executor=tool_executor,
+        )
+
+    def _run_turn(
+        self,
+        user_input: str,
+        stream: bool,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+        tool_executor: Optional[Callable[[Any], Any]],
+    ) -> Iterator[AgentEvent]:
         self.messages.append({"role": "user", "content": user_input})
-        tool_schemas = self.aggregate_tools()
+        self._start_turn_clock()
 
         self.current_iteration = 0
         while self.current_iteration < self.max_iterations:
             self.current_iteration += 1
 
             try:
-                logger.debug(f"📤 Sending prompt to LLM:")
-                # Log tools being sent
-                tool_names = [t["function"]["name"] for t in tool_schemas]
-                logger.debug(f"🛠️ Sending tools to LLM: {tool_names}")
-
-                completion = litellm.completion(
-                    model="gemini/gemini-2.0-flash",
-                    messages=self.messages,
-                    tools=(
-                        [
-                            {k: v for k, v in tool.items() if k != "origin"}
-                            for tool in tool_schemas
-                        ]
-                        if tool_schemas
-                        else None
-                    ),
-                )
+                self._check_turn_deadline()
+                # Picks up tools loaded by search_tools in the previous iteration
+                catalog = self.get_tool_catalog()
+                self._fit_context()
+                completion_kwargs = self._completion_kwargs(catalog)
 
-                if not completion.choices:
-                    raise Exception("Model returned an empty response.")
+                if stream:
+                    chunks = []
+                    for chunk in litellm.completion(
+                        **completion_kwargs,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    ):
+                        chunks.append(chunk)
+                        self._check_turn_deadline()
+                        delta = self._chunk_text(chunk)
+                        if delta:
+                            yield AgentEvent(
+                                AgentEventType.TEXT_DELTA, content=delta
+                            )
+                    completion = litellm.stream_chunk_builder(
+                        chunks, messages=self.messages
+                    )
+                else:
+                    completion = litellm.completion(**completion_kwargs)
+
+                choice, tool_calls = self._parse_completion(completion)
 
-                usage = getattr(completion, "usage", None)
-                if usage:
-                    logger.info(
-                        f"📊 Token Usage - "
-                        f"Prompt: {usage.prompt_tokens}, "
-                        f"Completion: {usage.completion_tokens}, "
-                        f"Total: {usage.total_tokens}"
+                if not tool_calls:
+                    yield AgentEvent(
+                        AgentEventType.FINAL,
+                        content=self._finish_turn(choice),
                     )
+                    return
 
-                choice = completion.choices[0].message
-                tool_calls = getattr(choice, "tool_calls", None)
+                self._record_tool_calls(choice, tool_calls)
 
-                logger.debug(f"📥 Received completion:")
-                logger.debug(f"Content: {choice.content}")
-                if tool_calls:
-                    logger.debug(
-                        f"Tool calls: {[tc.function.name for tc in tool_calls]}"
+                if self.parallel_tool_calls and len(tool_calls) > 1:
+                    for tool_call in tool_calls:
+                        yield AgentEvent(
+                            AgentEventType.TOOL_CALL, tool_call=tool_call
+                        )
+
+                    results = self._execute_tool_calls_concurrently(
+                        tool_calls,
+                        catalog,
+                        user_choice_callback,
+                        tool_executor,
                     )
 
-                if not tool_calls:
-                    final_content = choice.content
-                    if not final_content:
-                        raise Exception(
-                            "Agent did not return a response content."
+                    for tool_call, result_str in zip(
+                        tool_calls, results, strict=True
+                    ):
+                        yield AgentEvent(
+                            AgentEventType.TOOL_RESULT,
+                            content=result_str,
+                            tool_call=tool_call,
                         )
+                        self._append_tool_result(tool_call.id, result_str)
+                    continue
 
-                    logger.info("💬 Simple completion (no tool calls)")
-                    logger.info(
-                        f"Response: {final_content[:200]}{'...' if len(final_content) > 200 else ''}"
+                for tool_call in tool_calls:
+                    yield AgentEvent(
+                        AgentEventType.TOOL_CALL, tool_call=tool_call
                     )
-                    self.messages.append(
-                        {"role": "assistant", "content": final_content}
+
+                    name, kwargs, origin = self._plan_tool_call(
+                        tool_call, catalog, user_choice_callback
                     )
-                    return final_content
 
-                logger.info(
-                    f"🔧 Tool calls detected: {len(tool_calls)} tool(s)"
-                )
-                for tc in tool_calls:
-                    logger.info(
-                        f"  - {tc.function.name}({tc.function.arguments[:100]}{'...' if len(tc.function.arguments) > 100 else ''})"
+                    if not origin:
+                        result_str = self._tool_not_found(name)
+                    else:
+                        result_str = self._execute_tool(
+                            name, kwargs, origin, tool_executor
+                        )
+
+                    yield AgentEvent(
+                        AgentEventType.TOOL_RESULT,
+                        content=result_str,
+                        tool_call=tool_call,
                     )
-                self.messages.append(
+
+                    self._append_tool_result(tool_call.id, result_str)
+
+            except TurnDeadlineExceeded as error:
+                logger.warning(f"⏱️ {error}")
+                self._answer_pending_tool_calls(str(error))
+                yield AgentEvent(AgentEventType.FINAL, content=str(error))
+                return
+
+            except Exception as error:
+                logger.error(f"Error: {error}")
+                self._answer_pending_tool_calls(f"An error occurred: {error}")
+                yield AgentEvent(
+                    AgentEventType.FINAL, content=f"An error occurred: {error}"
+                )
+                return
+
+        yield AgentEvent(
+            AgentEventType.FINAL,
+            content="Maximum iterations reached without completion.",
+        )
+
+    def _start_turn_clock(self) -> None:
+        self._turn_deadline = (
+            time.monotonic() + self.turn_timeout
+            if self.turn_timeout is not None
+            else None
+        )
+
+    def _remaining_turn_time(self) -> Optional[float]:
+        if self._turn_deadline is None:
+            return None
+        return self._turn_deadline - time.monotonic()
+
+    def _check_turn_deadline(self) -> None:
+        remaining = self._remaining_turn_time()
+        if remaining is not None and remaining <= 0:
+            raise TurnDeadlineExceeded(
+                f"Turn deadline of {self.turn_timeout}s exceeded."
+            )
+
+    def _tool_call_timeout(self) -> Optional[float]:
+        """tool_timeout, capped by what is left of the turn."""
+        self._check_turn_deadline()
+        remaining = self._remaining_turn_time()
+        if remaining is None:
+            return self.tool_timeout
+        if self.tool_timeout is None:
+            return remaining
+        return min(self.tool_timeout, remaining)
+
+    def _tool_timed_out(self, name: str, timeout: Optional[float]) -> str:
+        # Out of turn time: end the turn instead of reporting to the LLM
+        self._check_turn_deadline()
+        after = f" after {timeout:.1f}s" if timeout is not None else ""
+        logger.warning(f"⏱️ Tool {name} timed out{after}")
+        return f"Error: Tool '{name}' timed out{after}."
+
+    def _answer_pending_tool_calls(self, reason: str) -> None:
+        """
+        Add an error result for every tool call of the current turn that
+        has none, so the history stays valid for the next completion.
+        """
+        answered = set()
+        for message in reversed(self.messages):
+            if message["role"] == "user":
+                return
+            if message["role"] == "tool":
+                answered.add(message["tool_call_id"])
+            elif message.get("tool_calls"):
+                for tool_call in message["tool_calls"]:
+                    if tool_call["id"] not in answered:
+                        self._append_tool_result(
+                            tool_call["id"], f"Error: {reason}"
+                        )
+                return
+
+    def _fit_context(self) -> None:
+        if self.context_manager:
+            self.context_manager.fit(self.messages)
+
+    def _completion_kwargs(self, catalog: ToolCatalog) -> Dict[str, Any]:
+        logger.debug("📤 Sending prompt to LLM:")
+        # Log tools being sent
+        logger.debug(f"🛠️ Sending tools to LLM: {list(catalog.origins)}")
+
+        return {
+            "model": self.model,
+            "messages": self.messages,
+            "tools": catalog.payload or None,
+            "timeout": self._remaining_turn_time(),
+        }
+
+    @staticmethod
+    def _chunk_text(chunk: Any) -> Optional[str]:
+        return chunk.choices[0].delta.content if chunk.choices else None
+
+    def _parse_completion(self, completion: Any):
+        if not completion or not completion.choices:
+            raise Exception("Model returned an empty response.")
+
+        usage = getattr(completion, "usage", None)
+        if usage:
+            logger.info(
+                f"📊 Token Usage - "
+                f"Prompt: {usage.prompt_tokens}, "
+                f"Completion: {usage.completion_tokens}, "
+                f"Total: {usage.total_tokens}"
+            )
+
+        choice = completion.choices[0].message
+        tool_calls = getattr(choice, "tool_calls", None)
+
+        logger.debug("📥 Received completion:")
+        logger.debug(f"Content: {choice.content}")
+        if tool_calls:
+            logger.debug(
+                f"Tool calls: {[tc.function.name for tc in tool_calls]}"
+            )
+        return choice, tool_calls
+
+    def _finish_turn(self, choice: Any) -> str:
+        final_content = choice.content
+        if not final_content:
+            raise Exception("Agent did not return a response content.")
+
+        logger.info("💬 Simple completion (no tool calls)")
+        logger.info(
+            f"Response: {final_content[:200]}{'...' if len(final_content) > 200 else ''}"
+        )
+        self.messages.append({"role": "assistant", "content": final_content})
+        return final_content
+
+    def _record_tool_calls(self, choice: Any, tool_calls: List[Any]) -> None:
+        logger.info(f"🔧 Tool calls detected: {len(tool_calls)} tool(s)")
+        for tc in tool_calls:
+            logger.info(
+                f"  - {tc.function.name}({tc.function.arguments[:100]}{'...' if len(tc.function.arguments) > 100 else ''})"
+            )
+        self.messages.append(
+            {
+                "role": "assistant",
+                "content": choice.content,
+                "tool_calls": [
                     {
-                        "role": "assistant",
-                        "content": choice.content,
-                        "tool_calls": [
-                            {
-                                "id": tool_call.id,
-                                "type": "function",
-                                "function": {
-                                    "name": tool_call.function.name,
-                                    "arguments": tool_call.function.arguments,
-                                },
-                            }
-                            for tool_call in tool_calls
-                        ],
+                        "id": tool_call.id,
+                        "type": "function",
+                        "function": {
+                            "name": tool_call.function.name,
+                            "arguments": tool_call.function.arguments,
+                        },
                     }
-                )
+                    for tool_call in tool_calls
+                ],
+            }
+        )
 
-                for tool_call in tool_calls:
-                    if on_tool_call:
-                        on_tool_call(tool_call)
+    def _plan_tool_call(
+        self,
+        tool_call: Any,
+        catalog: ToolCatalog,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+    ):
+        """Return (name, kwargs, origin) for a tool call; origin is None if unknown."""
+        name = tool_call.function.name
+        kwargs = json.loads(tool_call.function.arguments)
+        origin = self._resolve_origin(name, catalog, user_choice_callback)
+        return name, kwargs, origin
 
-                    name = tool_call.function.name
-                    kwargs = json.loads(tool_call.function.arguments)
+    @staticmethod
+    def _tool_not_found(name: str) -> str:
+        return f"Error: Tool '{name}' not found in available tools."
 
-                    origins = [
-                        tool["origin"]
-                        for tool in tool_schemas
-                        if tool["function"]["name"] == name
-                    ]
+    def _candidate_origins(self, name: str, catalog: ToolCatalog) -> List[str]:
+        origins = catalog.origins.get(name, [])
 
-                    if not origins and self.tool_manager:
-                        # The tool might have been loaded during this turn (e.g. by search_tools)
-                        # Refresh active tools to check
-                        active_tools = self.tool_manager.get_active_tools()
-                        if any(t.name == name for t in active_tools):
-                            origins = ["local"]
+        if not origins and self.tool_manager:
+            # The tool might have been loaded in this same batch of tool calls
+            # (e.g. by search_tools)
+            if self.tool_manager.is_loaded(name):
+                origins = [self.tool_manager.get_origin(name)]
+        return origins
 
-                    if not origins:
-                        result_str = f"Error: Tool '{name}' not found in available tools."
-                        self._append_tool_result(tool_call.id, result_str)
-                        if on_tool_result:
-                            on_tool_result(tool_call, result_str)
-                        continue
+    def _resolve_origin(
+        self,
+        name: str,
+        catalog: ToolCatalog,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+    ) -> Optional[str]:
+        origins = self._candidate_origins(name, catalog)
+        if not origins:
+            return None
+
+        chosen_origin = origins[0]
+        if len(origins) > 1 and user_choice_callback:
+            chosen_origin = user_choice_callback(name, origins)
+        return chosen_origin
 
-                    chosen_origin = origins[0]
-                    if len(origins) > 1 and user_choice_callback:
-                        chosen_origin = user_choice_callback(name, origins)
+    def _execute_tool_calls_concurrently(
+        self,
+        tool_calls: List[Any],
+        catalog: ToolCatalog,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+        tool_executor: Optional[Callable[[Any], Any]],
+    ) -> List[str]:
+        """
+        Execute all tool calls of one LLM turn together.
+        MCP calls are gathered as one coroutine on the background loop,
+        parallel-safe local tools run on a thread pool and the remaining
+        local tools run in call order on the calling thread. Results are
+        returned in the original call order.
+
+        Waiting stops at the turn deadline, or as soon as a call fails
+        (e.g. tool_executor raising because the caller cancelled). Calls
+        that have not started are then cancelled and the error ends the
+        turn, which answers every call of the batch with it.
+        """
+        results: List[Any] = [None] * len(tool_calls)
+        mcp_calls = []
+        threaded_calls = []
+        inline_calls = []
+
+        # Origins are resolved up front: user_choice_callback may render UI
+        for index, tool_call in enumerate(tool_calls):
+            name, kwargs, origin = self._plan_tool_call(
+                tool_call, catalog, user_choice_callback
+            )
+
+            if not origin:
+                results[index] = self._tool_not_found(name)
+            elif origin != "local":
+                mcp_calls.append((index, name, kwargs, origin))
+            elif name in self.sequential_tools:
+                inline_calls.append((index, name, kwargs))
+            else:
+                threaded_calls.append((index, name, kwargs))
+
+        if mcp_calls and not tool_executor:
+            raise ValueError("tool_executor is required for MCP tool calls")
 
-                    result_str = self._execute_tool(
-                        name, kwargs, chosen_origin, tool_executor
+        timeout = self._tool_call_timeout()
+
+        async def _gather_mcp_calls():
+            return await asyncio.gather(
+                *[
+                    asyncio.wait_for(
+                        self.mcp_servers[origin].call_tool(name, kwargs),
+                        timeout,
                     )
+                    for _, name, kwargs, origin in mcp_calls
+                ],
+                return_exceptions=True,
+            )
 
-                    if on_tool_result:
-                        on_tool_result(tool_call, result_str)
+        pool = self._get_tool_pool()
+        mcp_future = None
+        if mcp_calls:
+            assert tool_executor is not None
+            mcp_future = pool.submit(tool_executor, _gather_mcp_calls())
+        local_futures = [
+            (
+                index,
+                pool.submit(self._execute_tool, name, kwargs, "local", None),
+            )
+            for index, name, kwargs in threaded_calls
+        ]
 
-                    self._append_tool_result(tool_call.id, result_str)
+        for index, name, kwargs in inline_calls:
+            results[index] = self._execute_tool(name, kwargs, "local", None)
 
-            except Exception as error:
-                print(f"Error: {error}")
-                return f"An error occurred: {error}"
+        futures = [future for _, future in local_futures]
+        if mcp_future:
+            futures.append(mcp_future)
+        remaining = self._remaining_turn_time()
+        done, not_done = concurrent.futures.wait(
+            futures,
+            timeout=None if remaining is None else max(0.0, remaining),
+            return_when=concurrent.futures.FIRST_EXCEPTION,
+        )
+        errors = [future.exception() for future in done]
+        error = next((e for e in errors if e is not None), None)
+        if error is not None or not_done:
+            # Running tools can't be stopped; only queued ones are dropped
+            for future in not_done:
+                future.cancel()
+            if error is not None:
+                raise error
+            raise TurnDeadlineExceeded(
+                f"Turn deadline of {self.turn_timeout}s exceeded."
+            )
+
+        for index, future in local_futures:
+            results[index] = future.result()
 
-        return "Maximum iterations reached without completion."
+        if mcp_future:
+            for (index, name, *_), result in zip(
+                mcp_calls, mcp_future.result(), strict=True
+            ):
+                if isinstance(result, TimeoutError):
+                    result = self._tool_timed_out(name, timeout)
+                elif isinstance(result, BaseException):
+                    raise result
+                results[index] = result
+
+        return results
+
+    def _get_tool_pool(self) -> ThreadPoolExecutor:
+        if self._tool_pool is None:
+            self._tool_pool = ThreadPoolExecutor(
+                max_workers=self.max_tool_workers,
+                thread_name_prefix="agent-tool",
+            )
+        return self._tool_pool
 
     def _execute_tool(
         self,
@@ -261,15 +785,24 @@ class ChatAgent:
         tool_executor: Optional[Callable[[Any], Any]],
     ) -> str:
         if origin == "local":
-            result = self.tool_map[name](**kwargs)
-            return result if isinstance(result, str) else str(result)
+            return self._execute_local_tool(name, kwargs)
 
         mcp_client = self.mcp_servers[origin]
 
         if not tool_executor:
             raise ValueError("tool_executor is required for MCP tool calls")
 
-        return tool_executor(mcp_client.call_tool(name, kwargs))
+        timeout = self._tool_call_timeout()
+        try:
+            return tool_executor(
+                asyncio.wait_for(mcp_client.call_tool(name, kwargs), timeout)
+            )
+        except TimeoutError:
+            return self._tool_timed_out(name, timeout)
+
+    def _execute_local_tool(self, name: str, kwargs: Dict[str, Any]) -> str:
+        result = self.tool_map[name](**kwargs)
+        return result if isinstance(result, str) else str(result)
 
     def _append_tool_result(self, tool_call_id: str, result: str) -> None:
         self.messages.append(
@@ -279,3 +812,323 @@ class ChatAgent:
                 "content": result,
             }
         )
+
+
+class AsyncChatAgent(ChatAgent):
+    """
+    ChatAgent whose completion/tool loop runs natively on an asyncio loop.
+    Completions go through litellm.acompletion and MCP tools are awaited
+    directly. Local tools run in a worker thread so they never block the
+    loop; tools registered with parallel_safe=False run one at a time, in
+    call order.
+
+    The sync process_message/stream_message facade drives the async loop
+    through tool_executor (GlobalLoopContext.run_coroutine), so the turn
+    lives on the background loop and only events cross threads. Calls that
+    must stay on the calling thread - parallel_safe=False tools and
+    user_choice_callback - are handed back to the facade and run there;
+    when the turn is awaited directly they run on the loop thread.
+    """
+
+    # Set while the sync facade drives a turn; see _run_on_caller
+    _caller_calls: Optional["asyncio.Queue[_CallerCall]"] = None
+
+    async def aprocess_message(
+        self,
+        user_input: str,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]] = None,
+    ) -> str:
+        final_content = "Maximum iterations reached without completion."
+        async for event in self._arun_turn(
+            user_input, stream=False, user_choice_callback=user_choice_callback
+        ):
+            if event.type == AgentEventType.FINAL:
+                final_content = event.content or ""
+        return final_content
+
+    def astream_message(
+        self,
+        user_input: str,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]] = None,
+    ) -> AsyncIterator[AgentEvent]:
+        """Async iterator variant of stream_message."""
+        return self._arun_turn(
+            user_input, stream=True, user_choice_callback=user_choice_callback
+        )
+
+    def _run_turn(
+        self,
+        user_input: str,
+        stream: bool,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+        tool_executor: Optional[Callable[[Any], Any]],
+    ) -> Iterator[AgentEvent]:
+        if not tool_executor:
+            raise ValueError(
+                "tool_executor is required to drive AsyncChatAgent from sync code"
+            )
+
+        events = self._arun_turn(user_input, stream, user_choice_callback)
+        next_event: Optional[asyncio.Future] = None
+
+        async def _anext():
+            try:
+                return await events.__anext__()
+            except StopAsyncIteration:
+                return None
+
+        async def _open():
+            self._caller_calls = asyncio.Queue()
+
+        async def _next_step():
+            """The next event, or a _CallerCall to run on this thread."""
+            nonlocal next_event
+            assert self._caller_calls is not None
+            if next_event is None:
+                next_event = asyncio.ensure_future(_anext())
+            caller_call = asyncio.ensure_future(self._caller_calls.get())
+            await asyncio.wait(
+                {next_event, caller_call},
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if caller_call.done():
+                return caller_call.result()
+            caller_call.cancel()
+            event, next_event = next_event.result(), None
+            return event
+
+        async def _close():
+            if next_event is not None and not next_event.done():
+                next_event.cancel()
+                await asyncio.gather(next_event, return_exceptions=True)
+            await events.aclose()
+            self._caller_calls = None
+
+        try:
+            tool_executor(_open())
+            while True:
+                step = tool_executor(_next_step())
+                if step is None:
+                    return
+                if isinstance(step, _CallerCall):
+                    step.run()
+                    continue
+                yield step
+        finally:
+            tool_executor(_close())
+            # No-op unless the turn was interrupted mid tool calls
+            self._answer_pending_tool_calls("Turn was interrupted.")
+
+    async def _run_on_caller(
+        self, func: Callable[..., Any], *args: Any
+    ) -> Any:
+        """
+        Run func on the thread driving the turn through the sync facade
+        (e.g. the Streamlit script thread), or inline on the loop when the
+        turn is awaited directly.
+        """
+        if self._caller_calls is None:
+            return func(*args)
+        call = _CallerCall(func, args, concurrent.futures.Future())
+        self._caller_calls.put_nowait(call)
+        return await asyncio.wrap_future(call.future)
+
+    async def _aplan_tool_call(
+        self,
+        tool_call: Any,
+        catalog: ToolCatalog,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+    ):
+        """_plan_tool_call, asking user_choice_callback on the caller."""
+        name = tool_call.function.name
+        kwargs = json.loads(tool_call.function.arguments)
+        origins = self._candidate_origins(name, catalog)
+        origin = origins[0] if origins else None
+        if len(origins) > 1 and user_choice_callback:
+            origin = await self._run_on_caller(
+                user_choice_callback, name, origins
+            )
+        return name, kwargs, origin
+
+    async def _arun_turn(
+        self,
+        user_input: str,
+        stream: bool,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+    ) -> AsyncIterator[AgentEvent]:
+        self.messages.append({"role": "user", "content": user_input})
+        self._start_turn_clock()
+
+        self.current_iteration = 0
+        while self.current_iteration < self.max_iterations:
+            self.current_iteration += 1
+
+            try:
+                self._check_turn_deadline()
+                # Picks up tools loaded by search_tools in the previous
+                # iteration. Rebuilding may index MCP tools with the
+                # embedding model, so keep it off the shared loop.
+                catalog = await asyncio.to_thread(self.get_tool_catalog)
+                if self.context_manager:
+                    # Summarization may call the LLM synchronously
+                    await asyncio.to_thread(self._fit_context)
+                completion_kwargs = self._completion_kwargs(catalog)
+
+                if stream:
+                    chunks = []
+                    response = await litellm.acompletion(
+                        **completion_kwargs,
+                        stream=True,
+                        stream_options={"include_usage": True},
+                    )
+                    async for chunk in response:
+                        chunks.append(chunk)
+                        self._check_turn_deadline()
+                        delta = self._chunk_text(chunk)
+                        if delta:
+                            yield AgentEvent(
+                                AgentEventType.TEXT_DELTA, content=delta
+                            )
+                    completion = litellm.stream_chunk_builder(
+                        chunks, messages=self.messages
+                    )
+                else:
+                    completion = await litellm.acompletion(**completion_kwargs)
+
+                choice, tool_calls = self._parse_completion(completion)
+
+                if not tool_calls:
+                    yield AgentEvent(
+                        AgentEventType.FINAL,
+                        content=self._finish_turn(choice),
+                    )
+                    return
+
+                self._record_tool_calls(choice, tool_calls)
+
+                if self.parallel_tool_calls and len(tool_calls) > 1:
+                    for tool_call in tool_calls:
+                        yield AgentEvent(
+                            AgentEventType.TOOL_CALL, tool_call=tool_call
+                        )
+
+                    results = await self._aexecute_tool_calls_concurrently(
+                        tool_calls, catalog, user_choice_callback
+                    )
+
+                    for tool_call, result_str in zip(
+                        tool_calls, results, strict=True
+                    ):
+                        yield AgentEvent(
+                            AgentEventType.TOOL_RESULT,
+                            content=result_str,
+                            tool_call=tool_call,
+                        )
+                        self._append_tool_result(tool_call.id, result_str)
+                    continue
+
+                for tool_call in tool_calls:
+                    yield AgentEvent(
+                        AgentEventType.TOOL_CALL, tool_call=tool_call
+                    )
+
+                    name, kwargs, origin = await self._aplan_tool_call(
+                        tool_call, catalog, user_choice_callback
+                    )
+
+                    if not origin:
+                        result_str = self._tool_not_found(name)
+                    else:
+                        result_str = await self._aexecute_tool(
+                            name, kwargs, origin
+                        )
+
+                    yield AgentEvent(
+                        AgentEventType.TOOL_RESULT,
+                        content=result_str,
+                        tool_call=tool_call,
+                    )
+
+                    self._append_tool_result(tool_call.id, result_str)
+
+            except TurnDeadlineExceeded as error:
+                logger.warning(f"⏱️ {error}")
+                self._answer_pending_tool_calls(str(error))
+                yield AgentEvent(AgentEventType.FINAL, content=str(error))
+                return
+
+            except Exception as error:
+                logger.error(f"Error: {error}")
+                self._answer_pending_tool_calls(f"An error occurred: {error}")
+                yield AgentEvent(
+                    AgentEventType.FINAL, content=f"An error occurred: {error}"
+                )
+                return
+
+        yield AgentEvent(
+            AgentEventType.FINAL,
+            content="Maximum iterations reached without completion.",
+        )
+
+    async def _aexecute_tool_calls_concurrently(
+        self,
+        tool_calls: List[Any],
+        catalog: ToolCatalog,
+        user_choice_callback: Optional[Callable[[str, List[str]], str]],
+    ) -> List[str]:
+        """Async counterpart of _execute_tool_calls_concurrently."""
+        results: List[Any] = [None] * len(tool_calls)
+        concurrent_calls = []
+        sequential_calls = []
+
+        for index, tool_call in enumerate(tool_calls):
+            name, kwargs, origin = await self._aplan_tool_call(
+                tool_call, catalog, user_choice_callback
+            )
+
+            if not origin:
+                results[index] = self._tool_not_found(name)
+            elif origin == "local" and name in self.sequential_tools:
+                sequential_calls.append((index, name, kwargs, origin))
+            else:
+                concurrent_calls.append((index, name, kwargs, origin))
+
+        async def _run_sequential_calls():
+            for index, name, kwargs, origin in sequential_calls:
+                results[index] = await self._aexecute_tool(
+                    name, kwargs, origin
+                )
+
+        concurrent_results = await asyncio.gather(
+            _run_sequential_calls(),
+            *[
+                self._aexecute_tool(name, kwargs, origin)
+                for _, name, kwargs, origin in concurrent_calls
+            ],
+        )
+        for (index, *_), result in zip(
+            concurrent_calls, concurrent_results[1:], strict=True
+        ):
+            results[index] = result
+
+        return results
+
+    async def _aexecute_tool(
+        self, name: str, kwargs: Dict[str, Any], origin: str
+    ) -> str:
+        if origin == "local":
+            if name in self.sequential_tools:
+                return await self._run_on_caller(
+                    self._execute_local_tool, name, kwargs
+                )
+            return await asyncio.to_thread(
+                self._execute_local_tool, name, kwargs
+            )
+
+        timeout = self._tool_call_timeout()
+        try:
+            return await asyncio.wait_for(
+                self.mcp_servers[origin].call_tool(name, kwargs), timeout
+            )
+        except TimeoutError:
+            return self._tool_timed_out(name, timeout)
@@ -1,23 +1,69 @@
 import asyncio
+import concurrent.futures
+import logging
 import threading
-from typing import Any, Coroutine, TypeVar
+import time
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Set,
+    TypeVar,
+)
 
 T = TypeVar("T")
 
+logger = logging.getLogger("async_utils")
+
 
 class GlobalLoopContext:
     """
     Manages a global asyncio loop running in a background thread.
     This allows async resources (like MCP clients) to persist across Streamlit reruns.
+
+    All sessions share one loop (see shared()). Work submitted with a
+    session_id is tracked per session; end_session cancels it and runs the
+    session's cleanup callbacks, and the session reaper does so for
+    sessions that are no longer alive.
     """
 
     _loop: asyncio.AbstractEventLoop
     _thread: threading.Thread
     _started: bool = False
 
-    def __init__(self):
+    _shared: Optional["GlobalLoopContext"] = None
+    _shared_lock = threading.Lock()
+
+    def __init__(self, poll_interval: float = 0.2):
+        # How often a waiting caller checks its timeout and is_cancelled
+        self.poll_interval = poll_interval
         self._loop = asyncio.new_event_loop()
-        self._thread = threading.Thread(target=self._run_loop, daemon=True)
+        self._thread = threading.Thread(
+            target=self._run_loop, name="global-loop", daemon=True
+        )
+        self._sessions_lock = threading.Lock()
+        self._session_futures: Dict[str, Set[concurrent.futures.Future]] = {}
+        self._session_cleanups: Dict[
+            str, List[Callable[[], Awaitable[Any]]]
+        ] = {}
+        self._reaper: Optional[concurrent.futures.Future] = None
+
+    @classmethod
+    def shared(cls) -> "GlobalLoopContext":
+        """The process-wide loop, started on first use."""
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls()
+                cls._shared.start()
+            return cls._shared
+
+    @property
+    def loop(self) -> asyncio.AbstractEventLoop:
+        return self._loop
 
     def _run_loop(self):
         asyncio.set_event_loop(self._loop)
@@ -28,16 +74,134 @@ class GlobalLoopContext:
             self._thread.start()
             self._started = True
 
-    def run_coroutine(self, coro: Coroutine[Any, Any, T]) -> T:
+    def submit(
+        self, coro: Coroutine[Any, Any, T], session_id: Optional[str] = None
+    ) -> "concurrent.futures.Future[T]":
+        """Schedule a coroutine on the loop without waiting for it."""
+        if not self._started:
+            self.start()
+
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        if session_id is not None:
+            with self._sessions_lock:
+                self._session_futures.setdefault(session_id, set()).add(
+                    future
+                )
+            future.add_done_callback(
+                lambda f: self._forget_future(session_id, f)
+            )
+        return future
+
+    def _forget_future(
+        self, session_id: str, future: concurrent.futures.Future
+    ) -> None:
+        with self._sessions_lock:
+            futures = self._session_futures.get(session_id)
+            if futures is not None:
+                futures.discard(future)
+
+    def run_coroutine(
+        self,
+        coro: Coroutine[Any, Any, T],
+        timeout: Optional[float] = None,
+        is_cancelled: Optional[Callable[[], bool]] = None,
+        session_id: Optional[str] = None,
+    ) -> T:
         """
         Submits a coroutine to the background loop and waits for the result (thread-safe).
         This bridges the synchronous Streamlit script with the async background loop.
+
+        Raises TimeoutError after timeout seconds and CancelledError once
+        is_cancelled() returns True. In both cases, and when the waiting
+        thread itself is interrupted, the coroutine is cancelled on the loop.
         """
-        if not self._started:
-            self.start()
+        future = self.submit(coro, session_id)
+        deadline = time.monotonic() + timeout if timeout is not None else None
+        try:
+            while True:
+                wait = self.poll_interval
+                if deadline is not None:
+                    wait = min(wait, max(0.0, deadline - time.monotonic()))
+                try:
+                    return future.result(timeout=wait)
+                except concurrent.futures.TimeoutError:
+                    if future.done():
+                        # The coroutine itself raised TimeoutError
+                        raise
+                    if deadline is not None and time.monotonic() >= deadline:
+                        raise TimeoutError(
+                            f"Coroutine did not finish within {timeout}s"
+                        ) from None
+                    if is_cancelled is not None and is_cancelled():
+                        raise concurrent.futures.CancelledError(
+                            "Coroutine cancelled by the caller"
+                        ) from None
+        except BaseException:
+            future.cancel()
+            raise
 
-        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
-        return future.result()
+    def add_session_cleanup(
+        self, session_id: str, cleanup: Callable[[], Awaitable[Any]]
+    ) -> None:
+        """Register a coroutine function to await when the session ends."""
+        with self._sessions_lock:
+            self._session_cleanups.setdefault(session_id, []).append(cleanup)
+            self._session_futures.setdefault(session_id, set())
+
+    def end_session(self, session_id: str) -> None:
+        """Cancel the session's pending work and run its cleanups."""
+        with self._sessions_lock:
+            futures = self._session_futures.pop(session_id, set())
+            cleanups = self._session_cleanups.pop(session_id, [])
+
+        for future in futures:
+            future.cancel()
+
+        async def _cleanup():
+            for cleanup in cleanups:
+                try:
+                    await cleanup()
+                except Exception as e:
+                    logger.error(
+                        f"❌ Cleanup of session {session_id} failed: {e}"
+                    )
+
+        if cleanups:
+            self.submit(_cleanup())
+        logger.info(
+            f"🧹 Ended session {session_id}: cancelled {len(futures)} tasks"
+        )
+
+    def start_session_reaper(
+        self, is_session_alive: Callable[[str], bool], interval: float = 60.0
+    ) -> None:
+        """Periodically end tracked sessions that are no longer alive."""
+        self.start()
+        with self._sessions_lock:
+            if self._reaper is not None:
+                return
+
+            async def _reap():
+                while True:
+                    await asyncio.sleep(interval)
+                    with self._sessions_lock:
+                        session_ids = list(self._session_futures)
+                    for session_id in session_ids:
+                        if not is_session_alive(session_id):
+                            self.end_session(session_id)
+
+            self._reaper = asyncio.run_coroutine_threadsafe(
+                _reap(), self._loop
+            )
+
+    def get_stats(self) -> Dict[str, int]:
+        with self._sessions_lock:
+            return {
+                "sessions": len(self._session_futures),
+                "pending_tasks": sum(
+                    len(f) for f in self._session_futures.values()
+                ),
+            }
 
     def stop(self):
         if self._started:
@@ -1,11 +1,11 @@
 from abc import ABC, abstractmethod
-from typing import Union
+from typing import Any, Callable
 import streamlit as st
 import json
 import pandas as pd
 import logging
 
-from src.models import UIComponent, LayoutComponent, ComponentType, LayoutType
+from src.models import UIComponent, ComponentType
 
 logger = logging.getLogger("component_strategies")
 
@@ -15,6 +15,15 @@ class ComponentRenderStrategy(ABC):
     def render(self, component: UIComponent) -> None:
         pass
 
+    def prepare(self, component: UIComponent) -> Callable[[], Any]:
+        """
+        Do the per-component work that doesn't touch Streamlit (parsing,
+        building DataFrames) once, and return a callable that renders the
+        result. The renderer caches it for as long as the page version
+        doesn't change.
+        """
+        return lambda: self.render(component)
+
 
 class TextStrategy(ComponentRenderStrategy):
     def render(self, component: UIComponent) -> None:
@@ -45,22 +54,26 @@ class CodeStrategy(ComponentRenderStrategy):
 
 class DataFrameStrategy(ComponentRenderStrategy):
     def render(self, component: UIComponent) -> None:
+        self.prepare(component)()
+
+    def prepare(self, component: UIComponent) -> Callable[[], Any]:
         data = component.data
 
-        # Guard: If data is not a string, render directly
         if not isinstance(data, str):
-            st.dataframe(data)
-            return
+            return lambda: st.dataframe(data)
 
-        # Try to parse JSON string
         try:
             parsed = json.loads(data)
             df = self._create_dataframe(parsed)
-            st.dataframe(df)
         except Exception as e:
             logger.error(f"Failed to parse dataframe data: {e}")
-            st.error(f"Invalid dataframe data: {e}")
-            st.code(data)
+
+            def render_error(e=e):
+                st.error(f"Invalid dataframe data: {e}")
+                st.code(data)
+
+            return render_error
+        return lambda: st.dataframe(df)
 
     @staticmethod
     def _create_dataframe(parsed: dict) -> pd.DataFrame:
@@ -73,19 +86,25 @@ class DataFrameStrategy(ComponentRenderStrategy):
 
 class BarChartStrategy(ComponentRenderStrategy):
     def render(self, component: UIComponent) -> None:
+        self.prepare(component)()
+
+    def prepare(self, component: UIComponent) -> Callable[[], Any]:
         data = component.data
 
         if not isinstance(data, str):
-            st.bar_chart(data)
-            return
+            return lambda: st.bar_chart(data)
 
         try:
             parsed = json.loads(data)
             df = self._create_dataframe(parsed)
-            st.bar_chart(df)
         except Exception as e:
             logger.error(f"Failed to parse bar chart data: {e}")
-            st.error(f"Invalid bar chart data: {e}")
+
+            def render_error(e=e):
+                st.error(f"Invalid bar chart data: {e}")
+
+            return render_error
+        return lambda: st.bar_chart(df)
 
     @staticmethod
     def _create_dataframe(parsed: dict) -> pd.DataFrame:
@@ -98,19 +117,25 @@ class BarChartStrategy(ComponentRenderStrategy):
 
 class LineChartStrategy(ComponentRenderStrategy):
     def render(self, component: UIComponent) -> None:
+        self.prepare(component)()
+
+    def prepare(self, component: UIComponent) -> Callable[[], Any]:
         data = component.data
 
         if not isinstance(data, str):
-            st.line_chart(data)
-            return
+            return lambda: st.line_chart(data)
 
         try:
             parsed = json.loads(data)
             df = self._create_dataframe(parsed)
-            st.line_chart(df)
         except Exception as e:
             logger.error(f"Failed to parse line chart data: {e}")
-            st.error(f"Invalid line chart data: {e}")
+
+            def render_error(e=e):
+                st.error(f"Invalid line chart data: {e}")
+
+            return render_error
+        return lambda: st.line_chart(df)
 
     @staticmethod
     def _create_dataframe(parsed: dict) -> pd.DataFrame:
@@ -1,5 +1,5 @@
 from dataclasses import dataclass, field
-from typing import List, Optional
+from typing import List
 
 
 @dataclass
@@ -8,6 +8,13 @@ class MCPServerConfig:
     command: str
     args: List[str] = field(default_factory=list)
     enabled: bool = True
+    # "shared": sessions multiplex the same connections; "session": each
+    # session leases a connection of its own (e.g. for browser state)
+    isolation: str = "shared"
+    min_connections: int = 0
+    max_connections: int = 1
+    connect_timeout: float = 60.0
+    max_concurrent_calls: int = 8
 
 
 def get_default_mcp_servers() -> List[MCPServerConfig]:
@@ -17,6 +24,9 @@ def get_default_mcp_servers() -> List[MCPServerConfig]:
             command="pnpx",
             args=["@playwright/mcp@latest"],
             enabled=True,
+            isolation="session",
+            min_connections=1,
+            max_connections=4,
         ),
         # Example of how to add another server
         # MCPServerConfig(
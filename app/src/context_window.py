@@ -0,0 +1,185 @@
+import json
+import logging
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import litellm  # type: ignore
+
+logger = logging.getLogger("context_window")
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+class ContextWindowManager:
+    """
+    Keeps the agent's message history within a prompt token budget.
+
+    Token counts are tracked per message and only computed once. Before
+    every completion, ``fit`` compacts the history in place:
+
+    1. Tool results from previous turns longer than ``max_tool_result_tokens``
+       are truncated (their full content was already seen by the model).
+    2. While the history is over ``max_prompt_tokens``, the oldest whole
+       turns (a user message up to the next one) are dropped, never the
+       system prompt or the last ``keep_recent_turns`` turns. With
+       ``summarize=True`` the dropped turns are folded into a compact
+       system note instead of being discarded.
+    """
+
+    def __init__(
+        self,
+        model: str = "gemini/gemini-2.0-flash",
+        max_prompt_tokens: int = 30000,
+        max_tool_result_tokens: int = 2000,
+        keep_recent_turns: int = 2,
+        summarize: bool = False,
+        summarizer: Optional[Callable[[List[Dict[str, Any]]], str]] = None,
+    ):
+        self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_tool_result_tokens = max_tool_result_tokens
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.summarize = summarize
+        self.summarizer = summarizer or self._summarize_with_llm
+
+        # (id(message), tokens) aligned with the managed message list
+        self._counts: List[Tuple[int, int]] = []
+
+    def count_tokens(self, message: Dict[str, Any]) -> int:
+        try:
+            return litellm.token_counter(model=self.model, messages=[message])
+        except Exception:
+            # Rough estimate when the tokenizer is unavailable
+            return len(json.dumps(message, default=str)) // 4 + 1
+
+    def message_tokens(self, messages: List[Dict[str, Any]]) -> List[int]:
+        """Per-message token counts, reusing counts of unchanged messages."""
+        counts: List[Tuple[int, int]] = []
+        for index, message in enumerate(messages):
+            if (
+                index < len(self._counts)
+                and self._counts[index][0] == id(message)
+            ):
+                counts.append(self._counts[index])
+            else:
+                counts.append((id(message), self.count_tokens(message)))
+        self._counts = counts
+        return [tokens for _, tokens in counts]
+
+    def total_tokens(self, messages: List[Dict[str, Any]]) -> int:
+        return sum(self.message_tokens(messages))
+
+    def fit(self, messages: List[Dict[str, Any]]) -> None:
+        """Compact ``messages`` in place so they fit the prompt budget."""
+        self._elide_old_tool_results(messages)
+
+        total = self.total_tokens(messages)
+        if total <= self.max_prompt_tokens:
+            return
+
+        turn_starts = [
+            index
+            for index, message in enumerate(messages)
+            if message["role"] == "user"
+        ]
+        droppable_turns = turn_starts[: -self.keep_recent_turns]
+        if not droppable_turns:
+            logger.warning(
+                f"Prompt uses {total} tokens (budget {self.max_prompt_tokens}) "
+                "but only recent turns remain"
+            )
+            return
+
+        tokens = self.message_tokens(messages)
+        cut = droppable_turns[0]
+        end = cut
+        for next_start in droppable_turns[1:] + [
+            turn_starts[-self.keep_recent_turns]
+        ]:
+            if total <= self.max_prompt_tokens:
+                break
+            total -= sum(tokens[end:next_start])
+            end = next_start
+
+        dropped = messages[cut:end]
+        prefix = messages[:cut]
+        summary_index = self._find_summary(prefix)
+
+        if self.summarize:
+            to_summarize = dropped
+            if summary_index is not None:
+                to_summarize = [prefix.pop(summary_index)] + dropped
+            try:
+                summary = self.summarizer(to_summarize)
+                prefix.append(
+                    {"role": "system", "content": SUMMARY_PREFIX + summary}
+                )
+            except Exception as e:
+                logger.error(f"Failed to summarize conversation: {e}")
+
+        messages[:] = prefix + messages[end:]
+        logger.info(
+            f"✂️ Compacted context: dropped {len(dropped)} messages, "
+            f"{self.total_tokens(messages)} tokens remaining"
+        )
+
+    def _elide_old_tool_results(self, messages: List[Dict[str, Any]]) -> None:
+        last_user = max(
+            (i for i, m in enumerate(messages) if m["role"] == "user"),
+            default=len(messages),
+        )
+        max_chars = self.max_tool_result_tokens * 4
+
+        for index in range(last_user):
+            message = messages[index]
+            content = message.get("content")
+            if (
+                message["role"] != "tool"
+                or not isinstance(content, str)
+                or len(content) <= max_chars
+            ):
+                continue
+
+            elided = len(content) - max_chars
+            # Replace the dict so its cached token count is recomputed
+            messages[index] = dict(
+                message,
+                content=content[:max_chars]
+                + f"\n[... {elided} characters elided ...]",
+            )
+
+    @staticmethod
+    def _find_summary(messages: List[Dict[str, Any]]) -> Optional[int]:
+        for index, message in enumerate(messages):
+            if message["role"] == "system" and str(
+                message.get("content", "")
+            ).startswith(SUMMARY_PREFIX):
+                return index
+        return None
+
+    def _summarize_with_llm(self, messages: List[Dict[str, Any]]) -> str:
+        transcript = "\n".join(
+            f"{m['role']}: {m.get('content') or json.dumps(m.get('tool_calls', []))}"
+            for m in messages
+        )
+        completion = litellm.completion(
+            model=self.model,
+            messages=[
+                {
+                    "role": "system",
+                    "content": (
+                        "Summarize this conversation between a user and an AI "
+                        "assistant in a few sentences. Keep IDs (pages, "
+                        "components, layouts), decisions and open tasks."
+                    ),
+                },
+                {"role": "user", "content": transcript},
+            ],
+        )
+        return completion.choices[0].message.content or ""
+
+    def get_stats(self, messages: List[Dict[str, Any]]) -> Dict[str, int]:
+        return {
+            "messages": len(messages),
+            "prompt_tokens": self.total_tokens(messages),
+            "max_prompt_tokens": self.max_prompt_tokens,
+        }
@@ -0,0 +1,211 @@
+import hashlib
+import json
+import logging
+import os
+import re
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows: appends are only serialized in-process
+    fcntl = None  # type: ignore[assignment]
+
+logger = logging.getLogger("embedding_cache")
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "streamlit-ui" / "embeddings"
+
+
+class _ModelStore:
+    """
+    Embeddings of one model: raw float32 rows plus a key -> row index.
+
+    Writers in any process append under an exclusive lock on a sidecar
+    lock file: the row offset is taken from the data file size and the
+    on-disk index is merged (not overwritten) while the lock is held.
+    Readers pick up other writers' rows when the index file changes.
+    """
+
+    def __init__(self, directory: Path, model_name: str):
+        slug = re.sub(r"[^A-Za-z0-9_.-]", "_", model_name)
+        self.data_path = directory / f"{slug}.f32"
+        self.index_path = directory / f"{slug}.json"
+        self.lock_path = directory / f"{slug}.lock"
+        self.dim: Optional[int] = None
+        self.rows: Dict[str, int] = {}
+        self._matrix: Optional[np.ndarray] = None
+        self._index_mtime: Optional[int] = None
+        self.refresh()
+
+    def _read_index(self) -> Optional[Tuple[int, Dict[str, int]]]:
+        if not (self.index_path.exists() and self.data_path.exists()):
+            return None
+        try:
+            meta = json.loads(self.index_path.read_text())
+            return meta["dim"], meta["rows"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(
+                f"Ignoring unreadable embedding cache {self.index_path}: {e}"
+            )
+            return None
+
+    def refresh(self) -> None:
+        """Reload the index if another writer changed it."""
+        try:
+            mtime: Optional[int] = self.index_path.stat().st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._index_mtime:
+            return
+
+        index = self._read_index()
+        if index is not None:
+            self.dim, self.rows = index
+            self._matrix = None
+        self._index_mtime = mtime
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, "a") as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def matrix(self) -> Optional[np.ndarray]:
+        if self._matrix is None and self.rows and self.dim:
+            row_count = os.path.getsize(self.data_path) // (4 * self.dim)
+            self._matrix = np.memmap(
+                self.data_path,
+                dtype=np.float32,
+                mode="r",
+                shape=(row_count, self.dim),
+            )
+        return self._matrix
+
+    def append(self, keys: List[str], embeddings: np.ndarray) -> None:
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+
+        with self._file_lock():
+            index = self._read_index()
+            dim, rows = index if index is not None else (None, {})
+            dim = dim or embeddings.shape[1]
+            if embeddings.shape[1] != dim:
+                raise ValueError(
+                    f"Embedding dimension {embeddings.shape[1]} does not match cache dimension {dim}"
+                )
+
+            fd = os.open(self.data_path, os.O_RDWR | os.O_CREAT, 0o644)
+            with os.fdopen(fd, "r+b") as f:
+                # Whole rows only: a torn write from a crashed writer is
+                # overwritten
+                start = os.fstat(fd).st_size // (4 * dim)
+                f.seek(start * 4 * dim)
+                f.write(embeddings.tobytes())
+                f.truncate()
+
+            for offset, key in enumerate(keys):
+                rows[key] = start + offset
+
+            tmp_path = self.index_path.with_suffix(".json.tmp")
+            tmp_path.write_text(json.dumps({"dim": dim, "rows": rows}))
+            os.replace(tmp_path, self.index_path)
+
+            self.dim, self.rows = dim, rows
+            self._matrix = None
+            self._index_mtime = self.index_path.stat().st_mtime_ns
+
+
+class EmbeddingCache:
+    """
+    Content-addressed on-disk cache of text embeddings.
+
+    Entries are keyed by a hash of the model name and the exact embedded
+    text, so any change to a tool's name, description or keywords is a
+    cache miss. Each model gets a raw float32 file that is memory-mapped
+    for reads and an index mapping keys to rows.
+
+    Sessions should share one instance (see get_default_embedding_cache);
+    instances and processes using the same directory stay consistent
+    through the file lock in _ModelStore.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None):
+        self.cache_dir = Path(
+            cache_dir
+            or os.environ.get("TOOL_EMBEDDING_CACHE_DIR")
+            or DEFAULT_CACHE_DIR
+        )
+        self._lock = threading.Lock()
+        self._stores: Dict[str, _ModelStore] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(model_name: str, text: str) -> str:
+        return hashlib.sha256(f"{model_name}\0{text}".encode()).hexdigest()
+
+    def _store(self, model_name: str) -> _ModelStore:
+        if model_name not in self._stores:
+            self._stores[model_name] = _ModelStore(self.cache_dir, model_name)
+        return self._stores[model_name]
+
+    def get_many(
+        self, model_name: str, texts: Sequence[str]
+    ) -> List[Optional[np.ndarray]]:
+        """Look up embeddings; missing entries are None."""
+        with self._lock:
+            store = self._store(model_name)
+            store.refresh()
+            matrix = store.matrix()
+            results: List[Optional[np.ndarray]] = []
+            for text in texts:
+                row = store.rows.get(self.key(model_name, text))
+                if matrix is None or row is None or row >= len(matrix):
+                    results.append(None)
+                    self.misses += 1
+                else:
+                    results.append(np.array(matrix[row]))
+                    self.hits += 1
+            return results
+
+    def put_many(
+        self, model_name: str, texts: Sequence[str], embeddings: np.ndarray
+    ) -> None:
+        if not len(texts):
+            return
+        with self._lock:
+            store = self._store(model_name)
+            keys = [self.key(model_name, text) for text in texts]
+            try:
+                store.append(keys, np.atleast_2d(embeddings))
+            except Exception as e:
+                logger.warning(f"Failed to write embedding cache: {e}")
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": sum(len(s.rows) for s in self._stores.values()),
+        }
+
+
+_default_cache: Optional[EmbeddingCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_embedding_cache() -> EmbeddingCache:
+    """Process-wide cache shared by every ToolManager."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+        return _default_cache
@@ -0,0 +1,125 @@
+import importlib.util
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Any, Dict, Optional
+
+# Importing sentence_transformers pulls in torch, which takes seconds, so
+# it is only looked up here and imported when a model is actually loaded
+SENTENCE_TRANSFORMERS_AVAILABLE = (
+    importlib.util.find_spec("sentence_transformers") is not None
+)
+
+logger = logging.getLogger("embedding_model")
+
+
+class SharedEmbeddingModel:
+    """
+    A SentenceTransformer loaded lazily once per process and shared by all
+    sessions. encode() is serialized so concurrent sessions can use it
+    safely.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model: Optional[Any] = None
+        self._error: Optional[Exception] = None
+        self._load_lock = threading.Lock()
+        self._encode_lock = threading.Lock()
+        self._load_future: Optional["Future[SharedEmbeddingModel]"] = None
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._model is not None
+
+    def load(self) -> Any:
+        """Load the model on first use; later calls return the same instance."""
+        if self._model is not None:
+            return self._model
+
+        with self._load_lock:
+            if self._model is None:
+                if self._error is not None:
+                    raise self._error
+                if not SENTENCE_TRANSFORMERS_AVAILABLE:
+                    self._error = ImportError(
+                        "sentence-transformers is not installed"
+                    )
+                    raise self._error
+                try:
+                    from sentence_transformers import SentenceTransformer
+
+                    self._model = SentenceTransformer(self.model_name)
+                except Exception as e:
+                    self._error = e
+                    raise
+                logger.info(
+                    f"🧠 Loaded shared embedding model {self.model_name} "
+                    f"({self.memory_footprint() / 1e6:.1f} MB)"
+                )
+        return self._model
+
+    def load_in_background(self) -> "Future[SharedEmbeddingModel]":
+        """
+        Start loading the model in a daemon thread (once per process) and
+        return a future that resolves to this model when it is ready.
+        """
+        with self._load_lock:
+            if self._load_future is None:
+                self._load_future = Future()
+                threading.Thread(
+                    target=self._load_into_future,
+                    args=(self._load_future,),
+                    name=f"load-{self.model_name}",
+                    daemon=True,
+                ).start()
+            return self._load_future
+
+    def _load_into_future(
+        self, future: "Future[SharedEmbeddingModel]"
+    ) -> None:
+        try:
+            self.load()
+            future.set_result(self)
+        except Exception as e:
+            future.set_exception(e)
+
+    def encode(self, sentences: Any, **kwargs: Any) -> Any:
+        model = self.load()
+        with self._encode_lock:
+            return model.encode(sentences, **kwargs)
+
+    def memory_footprint(self) -> int:
+        """Approximate size of the model weights and buffers in bytes."""
+        if self._model is None:
+            return 0
+        tensors = list(self._model.parameters())
+        if hasattr(self._model, "buffers"):
+            tensors += list(self._model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+
+
+class EmbeddingModelRegistry:
+    """Process-level registry of shared embedding models, keyed by name."""
+
+    _models: Dict[str, SharedEmbeddingModel] = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def get(cls, model_name: str) -> SharedEmbeddingModel:
+        with cls._lock:
+            if model_name not in cls._models:
+                cls._models[model_name] = SharedEmbeddingModel(model_name)
+            return cls._models[model_name]
+
+    @classmethod
+    def get_stats(cls) -> Dict[str, Dict[str, Any]]:
+        with cls._lock:
+            models = dict(cls._models)
+        return {
+            name: {
+                "loaded": model.is_loaded,
+                "memory_bytes": model.memory_footprint(),
+            }
+            for name, model in models.items()
+        }
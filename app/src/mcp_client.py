@@ -1,10 +1,17 @@
+import asyncio
 import json
+import logging
 from contextlib import AsyncExitStack
 from typing import Any, Dict, List, Optional
 
+import mcp.types as mcp_types  # type: ignore
 from mcp import ClientSession, StdioServerParameters  # type: ignore
 from mcp.client.stdio import stdio_client  # type: ignore
 
+from src.mcp_tool_cache import MCPToolListCache, get_default_tool_cache
+
+logger = logging.getLogger("mcp_client")
+
 
 class MCPServerClient:
     def __init__(
@@ -13,6 +20,7 @@ class MCPServerClient:
         server_script_path: Optional[str] = None,
         command: Optional[str] = None,
         args: Optional[List[str]] = None,
+        tool_cache: Optional[MCPToolListCache] = None,
     ):
         self.server_script_path = server_script_path
         self.command = command
@@ -23,6 +31,10 @@ class MCPServerClient:
         self.stdio = None
         self.write = None
         self.tools: List[Dict[str, Any]] = []
+        # Bumped whenever self.tools is replaced
+        self.tools_version = 0
+        self.tool_cache = tool_cache or get_default_tool_cache()
+        self._refresh_task: Optional[asyncio.Task] = None
 
     async def connect(self):
         if not self.command:
@@ -38,30 +50,66 @@ class MCPServerClient:
         )
         self.stdio, self.write = stdio_transport
         self.session = await self.exit_stack.enter_async_context(
-            ClientSession(self.stdio, self.write)
+            ClientSession(
+                self.stdio, self.write, message_handler=self._handle_message
+            )
         )
         await self.session.initialize()
-        await self.fetch_tools()
+
+        cached_tools = self.tool_cache.get(self.command, self.args)
+        if cached_tools is not None:
+            self._set_tools(cached_tools)
+            logger.info(
+                f"📦 Using cached tool list for {self.name} "
+                f"({len(self.tools)} tools)"
+            )
+        else:
+            await self.fetch_tools()
 
     async def disconnect(self):
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
         await self.exit_stack.aclose()
 
     async def fetch_tools(self):
         if self.session is None:
             raise Exception("No session")
         tools_result = await self.session.list_tools()
-        self.tools = [
+        functions = [
             {
-                "type": "function",
-                "function": {
-                    "name": tool.name,
-                    "description": tool.description,
-                    "parameters": tool.inputSchema,
-                },
-                "origin": self.name,
+                "name": tool.name,
+                "description": tool.description,
+                "parameters": tool.inputSchema,
             }
             for tool in tools_result.tools
         ]
+        self.tool_cache.put(self.command, self.args, functions)
+        self._set_tools(functions)
+
+    def _set_tools(self, functions: List[Dict[str, Any]]):
+        self.tools = [
+            {"type": "function", "function": function, "origin": self.name}
+            for function in functions
+        ]
+        self.tools_version += 1
+
+    async def _handle_message(self, message: Any):
+        # Older SDKs wrap notifications in a ServerNotification root model
+        notification = getattr(message, "root", message)
+        if isinstance(notification, mcp_types.ToolListChangedNotification):
+            logger.info(f"🔄 Tool list of {self.name} changed, refreshing")
+            # Only reachable once connect() has checked the command
+            assert self.command is not None
+            self.tool_cache.invalidate(self.command, self.args)
+            # The handler runs on the session's receive loop, which must stay
+            # free to deliver the list_tools response
+            self._refresh_task = asyncio.create_task(self._refresh_tools())
+
+    async def _refresh_tools(self):
+        try:
+            await self.fetch_tools()
+        except Exception as e:
+            logger.error(f"❌ Failed to refresh tools of {self.name}: {e}")
 
     async def call_tool(self, name: str, arguments: dict):
         if self.session is None:
@@ -0,0 +1,400 @@
+import asyncio
+import logging
+import time
+from typing import (
+    Any,
+    Coroutine,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+)
+
+from src.async_utils import GlobalLoopContext
+from src.config import MCPServerConfig
+from src.mcp_client import MCPServerClient
+
+logger = logging.getLogger("mcp_pool")
+
+T = TypeVar("T")
+
+ISOLATION_MODES = ("shared", "session")
+
+
+def _pool_key(config: MCPServerConfig) -> Tuple[str, str, Tuple[str, ...]]:
+    return (config.name, config.command, tuple(config.args))
+
+
+class PooledConnection:
+    """
+    One MCP server process. The client is connected and disconnected by a
+    single task on the pool loop, since the stdio transport must be closed
+    by the task that opened it.
+    """
+
+    def __init__(self, config: MCPServerConfig):
+        self.config = config
+        self.client = MCPServerClient(
+            name=config.name, command=config.command, args=config.args
+        )
+        # Session ids currently holding a lease
+        self.leases: Set[str] = set()
+        # Set on the first lease; session-isolated connections are only
+        # handed out while still fresh
+        self.was_leased = False
+        self.last_used = time.monotonic()
+        self.closed = False
+        self.ready: "asyncio.Future[None]" = (
+            asyncio.get_running_loop().create_future()
+        )
+        # Startup errors are raised to lessees; prewarmed connections may
+        # have none, so mark the exception as retrieved
+        self.ready.add_done_callback(
+            lambda f: f.cancelled() or f.exception()
+        )
+        self._close_event = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        try:
+            await self.client.connect()
+        except Exception as e:
+            logger.error(f"❌ Failed to start {self.config.name}: {e}")
+            self.closed = True
+            self.ready.set_exception(e)
+            return
+
+        self.ready.set_result(None)
+        try:
+            await self._close_event.wait()
+        finally:
+            self.closed = True
+            try:
+                await self.client.disconnect()
+            except Exception as e:
+                logger.warning(
+                    f"Error while closing {self.config.name} connection: {e}"
+                )
+
+    @property
+    def is_idle(self) -> bool:
+        return not self.leases
+
+    async def ping(self, timeout: float) -> bool:
+        if self.client.session is None:
+            return False
+        try:
+            await asyncio.wait_for(self.client.session.send_ping(), timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self):
+        self.closed = True
+        self._close_event.set()
+        await asyncio.gather(self._task, return_exceptions=True)
+
+
+class _ServerPool:
+    """Connections of one server configuration."""
+
+    def __init__(self, config: MCPServerConfig):
+        self.config = config
+        self.connections: List[PooledConnection] = []
+        self.changed = asyncio.Condition()
+        # Bounds in-flight tool calls across all sessions
+        self.calls = asyncio.Semaphore(config.max_concurrent_calls)
+
+    def pick(self) -> Optional[PooledConnection]:
+        """
+        Connection for a new lease, or None if one should be opened (or,
+        for session isolation at max_connections, waited for).
+
+        Session-isolated servers only get warm spares that were never
+        leased; a connection another session used is closed, not reused,
+        since it still holds that session's server state.
+        """
+        usable = [c for c in self.connections if not c.closed]
+        if self.config.isolation == "session":
+            fresh = [c for c in usable if not c.was_leased]
+            return fresh[0] if fresh else None
+
+        idle = [c for c in usable if c.is_idle]
+        if idle:
+            return idle[0]
+        if usable and len(usable) >= self.config.max_connections:
+            return min(usable, key=lambda c: len(c.leases))
+        return None
+
+
+class PooledMCPClient:
+    """
+    A session's lease on a pooled connection. It exposes the
+    MCPServerClient attributes ChatAgent uses and can be awaited from any
+    event loop; calls are forwarded to the pool loop.
+    """
+
+    def __init__(
+        self,
+        pool: "MCPConnectionPool",
+        config: MCPServerConfig,
+        connection: PooledConnection,
+        session_id: str,
+    ):
+        self.pool = pool
+        self.config = config
+        self.session_id = session_id
+        self._connection = connection
+
+    @property
+    def name(self) -> str:
+        return self.config.name
+
+    @property
+    def tools(self) -> List[Dict[str, Any]]:
+        return self._connection.client.tools
+
+    @property
+    def tools_version(self) -> int:
+        return self._connection.client.tools_version
+
+    async def call_tool(self, name: str, arguments: dict) -> str:
+        if self._connection.closed:
+            # Failed a health check since it was leased
+            await self.pool.run(self.pool._renew(self))
+        return await self.pool.run(
+            self.pool._call(self._connection, name, arguments)
+        )
+
+    async def release(self):
+        await self.pool.run(
+            self.pool._release(self._connection, self.session_id)
+        )
+
+
+class MCPConnectionPool:
+    """
+    Process-wide pool of MCP server connections shared by all sessions.
+
+    Connections live on the shared background loop and are keyed by the
+    server configuration. A "shared" server multiplexes every session
+    over at most max_connections connections (least leased first); a
+    "session" server hands each session an exclusive, never used
+    connection (a warm spare or a new one), waiting up to acquire_timeout
+    when all max_connections are leased; it is closed once released. At
+    most max_concurrent_calls tool calls run against a server at once.
+
+    A maintenance task pings connections, drops dead ones, closes
+    connections idle for idle_timeout and keeps min_connections open.
+    """
+
+    def __init__(
+        self,
+        loop_context: Optional[GlobalLoopContext] = None,
+        acquire_timeout: float = 60.0,
+        health_check_interval: float = 30.0,
+        ping_timeout: float = 5.0,
+        idle_timeout: float = 300.0,
+    ):
+        self.loop_context = loop_context or GlobalLoopContext.shared()
+        self.loop_context.start()
+        self.acquire_timeout = acquire_timeout
+        self.health_check_interval = health_check_interval
+        self.ping_timeout = ping_timeout
+        self.idle_timeout = idle_timeout
+        self._servers: Dict[Tuple[str, str, Tuple[str, ...]], _ServerPool] = {}
+        self._maintenance_task: Optional[asyncio.Task] = None
+        # Retired connections still shutting down
+        self._closing: Set[asyncio.Task] = set()
+
+    async def run(self, coro: Coroutine[Any, Any, T]) -> T:
+        """Await a coroutine on the pool loop from any event loop."""
+        if asyncio.get_running_loop() is self.loop_context.loop:
+            return await coro
+        return await asyncio.wrap_future(
+            asyncio.run_coroutine_threadsafe(coro, self.loop_context.loop)
+        )
+
+    async def lease(
+        self, config: MCPServerConfig, session_id: str
+    ) -> PooledMCPClient:
+        if config.isolation not in ISOLATION_MODES:
+            raise ValueError(
+                f"Unknown isolation '{config.isolation}' for {config.name}. Expected one of {ISOLATION_MODES}"
+            )
+        connection = await self.run(
+            asyncio.wait_for(
+                self._acquire(config, session_id), self.acquire_timeout
+            )
+        )
+        return PooledMCPClient(self, config, connection, session_id)
+
+    async def release_session(self, session_id: str):
+        """Return every lease held by a session."""
+
+        async def _release_all():
+            for server in list(self._servers.values()):
+                for connection in list(server.connections):
+                    if session_id in connection.leases:
+                        await self._release(connection, session_id)
+
+        await self.run(_release_all())
+
+    def _server(self, config: MCPServerConfig) -> _ServerPool:
+        key = _pool_key(config)
+        if key not in self._servers:
+            self._servers[key] = _ServerPool(config)
+        if self._maintenance_task is None:
+            self._maintenance_task = asyncio.create_task(self._maintain())
+        return self._servers[key]
+
+    async def _acquire(
+        self, config: MCPServerConfig, session_id: str
+    ) -> PooledConnection:
+        server = self._server(config)
+        async with server.changed:
+            while True:
+                connection = server.pick()
+                if connection is None and (
+                    len(server.connections) < config.max_connections
+                ):
+                    logger.info(f"🚀 Opening pooled {config.name} connection")
+                    connection = PooledConnection(config)
+                    server.connections.append(connection)
+                if connection is not None:
+                    connection.leases.add(session_id)
+                    connection.was_leased = True
+                    break
+                await server.changed.wait()
+
+        try:
+            # Shielded so a timed out lease doesn't abort a shared startup
+            await asyncio.shield(connection.ready)
+        except BaseException:
+            async with server.changed:
+                connection.leases.discard(session_id)
+                if connection.closed:
+                    self._remove(server, connection)
+                else:
+                    self._retire_if_used(server, connection)
+                server.changed.notify_all()
+            raise
+        connection.last_used = time.monotonic()
+        return connection
+
+    async def _renew(self, lease: PooledMCPClient) -> None:
+        """
+        Replace the closed connection of a lease. The stale lease is
+        released first, so it neither counts against max_connections nor
+        keeps the old connection from being retired.
+        """
+        stale = lease._connection
+        if not stale.closed:
+            return
+        logger.info(f"🔁 Re-leasing closed {lease.name} connection")
+        await self._release(stale, lease.session_id)
+        connection = await asyncio.wait_for(
+            self._acquire(lease.config, lease.session_id),
+            self.acquire_timeout,
+        )
+        if lease._connection is stale:
+            lease._connection = connection
+        elif connection is not lease._connection:
+            # Another call renewed the lease in the meantime
+            await self._release(connection, lease.session_id)
+
+    async def _call(
+        self, connection: PooledConnection, name: str, arguments: dict
+    ) -> str:
+        server = self._server(connection.config)
+        async with server.calls:
+            connection.last_used = time.monotonic()
+            return await connection.client.call_tool(name, arguments)
+
+    async def _release(self, connection: PooledConnection, session_id: str):
+        server = self._server(connection.config)
+        async with server.changed:
+            connection.leases.discard(session_id)
+            connection.last_used = time.monotonic()
+            self._retire_if_used(server, connection)
+            server.changed.notify_all()
+
+    @staticmethod
+    def _remove(server: _ServerPool, connection: PooledConnection):
+        if connection in server.connections:
+            server.connections.remove(connection)
+
+    def _retire_if_used(
+        self, server: _ServerPool, connection: PooledConnection
+    ) -> None:
+        """
+        Close a session-isolated connection once no session holds it, so
+        one session's server state never reaches another (under
+        server.changed).
+        """
+        if server.config.isolation != "session" or not connection.is_idle:
+            return
+        logger.info(f"♻️ Closing released {server.config.name} connection")
+        self._remove(server, connection)
+        self._add_spares(server)
+        task = asyncio.create_task(connection.close())
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    @staticmethod
+    def _add_spares(server: _ServerPool):
+        """Open connections up to min_connections (under server.changed)."""
+        while len(server.connections) < server.config.min_connections:
+            server.connections.append(PooledConnection(server.config))
+
+    async def _maintain(self):
+        while True:
+            await asyncio.sleep(self.health_check_interval)
+            for server in list(self._servers.values()):
+                try:
+                    await self._maintain_server(server)
+                except Exception as e:
+                    logger.error(
+                        f"❌ Pool maintenance failed for {server.config.name}: {e}"
+                    )
+
+    async def _maintain_server(self, server: _ServerPool):
+        config = server.config
+
+        now = time.monotonic()
+        for connection in list(server.connections):
+            if not connection.ready.done():
+                continue
+            expired = (
+                connection.is_idle
+                and now - connection.last_used > self.idle_timeout
+                and len(server.connections) > config.min_connections
+            )
+            healthy = not connection.closed and (
+                expired or await connection.ping(self.ping_timeout)
+            )
+            if healthy and not expired:
+                continue
+
+            if not healthy:
+                logger.warning(f"💔 Dropping unhealthy {config.name} connection")
+            async with server.changed:
+                self._remove(server, connection)
+                server.changed.notify_all()
+            await connection.close()
+
+        async with server.changed:
+            self._add_spares(server)
+            server.changed.notify_all()
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            server.config.name: {
+                "connections": len(server.connections),
+                "leases": sum(len(c.leases) for c in server.connections),
+                "idle": sum(c.is_idle for c in server.connections),
+            }
+            for server in self._servers.values()
+        }
@@ -0,0 +1,131 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("mcp_tool_cache")
+
+DEFAULT_CACHE_DIR = Path.home() / ".cache" / "streamlit-ui" / "mcp_tools"
+DEFAULT_TTL_SECONDS = 3600.0
+
+
+class MCPToolListCache:
+    """
+    Cache of MCP tool lists keyed by the server launch command and args.
+
+    Entries live in process memory and in one JSON file per server on disk,
+    so new sessions and restarted processes can skip the list_tools round
+    trip. An entry is stale after ttl_seconds or once invalidated, which
+    MCPServerClient does when the server sends tools/list_changed.
+    """
+
+    def __init__(
+        self,
+        cache_dir: Optional[str] = None,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+    ):
+        self.cache_dir = Path(
+            cache_dir
+            or os.environ.get("MCP_TOOL_CACHE_DIR")
+            or DEFAULT_CACHE_DIR
+        )
+        self.ttl_seconds = ttl_seconds
+        self._lock = threading.Lock()
+        # key -> (fetched_at, tools)
+        self._entries: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(command: str, args: Sequence[str]) -> str:
+        return hashlib.sha256(
+            json.dumps([command, list(args)]).encode()
+        ).hexdigest()
+
+    def _path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def _is_fresh(self, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttl_seconds
+
+    def get(
+        self, command: str, args: Sequence[str]
+    ) -> Optional[List[Dict[str, Any]]]:
+        """Return the cached tool schemas, or None if missing or stale."""
+        key = self.key(command, args)
+        with self._lock:
+            entry = self._entries.get(key) or self._read(key)
+            if entry is None or not self._is_fresh(entry[0]):
+                self.misses += 1
+                return None
+            self._entries[key] = entry
+            self.hits += 1
+            return entry[1]
+
+    def put(
+        self, command: str, args: Sequence[str], tools: List[Dict[str, Any]]
+    ) -> None:
+        key = self.key(command, args)
+        entry = (time.time(), tools)
+        with self._lock:
+            self._entries[key] = entry
+            try:
+                self.cache_dir.mkdir(parents=True, exist_ok=True)
+                tmp_path = self._path(key).with_suffix(".json.tmp")
+                tmp_path.write_text(
+                    json.dumps(
+                        {
+                            "command": command,
+                            "args": list(args),
+                            "fetched_at": entry[0],
+                            "tools": tools,
+                        }
+                    )
+                )
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                logger.warning(f"Failed to write MCP tool cache: {e}")
+
+    def invalidate(self, command: str, args: Sequence[str]) -> None:
+        key = self.key(command, args)
+        with self._lock:
+            self._entries.pop(key, None)
+            try:
+                self._path(key).unlink(missing_ok=True)
+            except OSError as e:
+                logger.warning(f"Failed to remove MCP tool cache entry: {e}")
+
+    def _read(self, key: str) -> Optional[Tuple[float, List[Dict[str, Any]]]]:
+        path = self._path(key)
+        if not path.exists():
+            return None
+        try:
+            data = json.loads(path.read_text())
+            return data["fetched_at"], data["tools"]
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable MCP tool cache {path}: {e}")
+            return None
+
+    def get_stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+        }
+
+
+_default_cache: Optional[MCPToolListCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def get_default_tool_cache() -> MCPToolListCache:
+    """Process-wide cache shared by every MCPServerClient."""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = MCPToolListCache()
+        return _default_cache
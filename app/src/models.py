@@ -47,6 +47,42 @@ class UIPage(BaseModel):
     title: str
     icon: Optional[str] = None
     components: List[AnyComponent] = Field(default_factory=list)
+    # Bumped by the repository on every change
+    version: int = 0
+
+
+class PageOperation(BaseModel):
+    """
+    One mutation applied by StreamlitUIRepository.apply_operations.
+    add_component uses component; the other ops address component_id
+    (the layout id for update_layout).
+    """
+
+    op: Literal[
+        "add_component",
+        "update_component",
+        "update_layout",
+        "move_component",
+        "delete_component",
+    ]
+    component: Optional[AnyComponent] = None
+    component_id: Optional[str] = None
+    data: Any = None
+    props: Optional[Dict[str, Any]] = None
+    parent_id: Optional[str] = None
+    position: Optional[int] = None
+
+
+class PageDiff(BaseModel):
+    """Component ids that changed between two versions of a page."""
+
+    from_version: int
+    to_version: int
+    page_changed: bool = False  # title or icon
+    added: List[str] = Field(default_factory=list)
+    removed: List[str] = Field(default_factory=list)
+    updated: List[str] = Field(default_factory=list)
+    moved: List[str] = Field(default_factory=list)
 
 
 # Enable forward references for recursive types
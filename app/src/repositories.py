@@ -1,6 +1,18 @@
-from typing import List, Optional, Protocol, Union
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Protocol, Union
 import streamlit as st
-from src.models import UIPage, UIComponent, LayoutComponent, AnyComponent
+from src.models import (
+    UIPage,
+    UIComponent,
+    LayoutComponent,
+    AnyComponent,
+    PageDiff,
+    PageOperation,
+)
 
 
 class StreamlitUIRepository(Protocol):
@@ -19,6 +31,8 @@ class StreamlitUIRepository(Protocol):
         icon: Optional[str] = None,
     ) -> UIPage: ...
 
+    def delete_page(self, page_id: str) -> None: ...
+
     def add_component(
         self, page_id: str, component: Union[UIComponent, LayoutComponent]
     ) -> None: ...
@@ -35,72 +49,479 @@ class StreamlitUIRepository(Protocol):
         self, page_id: str, layout_id: str, props: Optional[dict] = None
     ) -> None: ...
 
+    def move_component(
+        self,
+        page_id: str,
+        component_id: str,
+        parent_id: Optional[str] = None,
+        position: Optional[int] = None,
+    ) -> None: ...
+
+    def delete_component(self, page_id: str, component_id: str) -> None: ...
+
+    def apply_operations(
+        self, page_id: str, operations: List[PageOperation]
+    ) -> None: ...
+
+
+def _apply_operation(
+    repository: StreamlitUIRepository, page_id: str, operation: PageOperation
+) -> None:
+    """Dispatch one PageOperation to the matching repository method."""
+    if operation.op == "add_component":
+        if operation.component is None:
+            raise ValueError("add_component operation requires a component.")
+        repository.add_component(page_id, operation.component)
+        return
+
+    if not operation.component_id:
+        raise ValueError(f"{operation.op} operation requires a component_id.")
+    if operation.op == "update_component":
+        repository.update_component(
+            page_id, operation.component_id, operation.data, operation.props
+        )
+    elif operation.op == "update_layout":
+        repository.update_layout(
+            page_id, operation.component_id, operation.props
+        )
+    elif operation.op == "move_component":
+        repository.move_component(
+            page_id,
+            operation.component_id,
+            operation.parent_id,
+            operation.position,
+        )
+    elif operation.op == "delete_component":
+        repository.delete_component(page_id, operation.component_id)
+
+
+class ComponentIndex:
+    """
+    Lookup tables for the current version of one page's component tree:
+    component id -> node and component id -> parent layout id (None at the
+    top level). The repository updates it on every mutation instead of
+    walking the tree.
+    """
+
+    def __init__(self, page: Optional[UIPage] = None):
+        self.nodes: Dict[str, AnyComponent] = {}
+        self.parents: Dict[str, Optional[str]] = {}
+        if page is not None:
+            for component in page.components:
+                self.add(component, None)
+
+    def copy(self) -> "ComponentIndex":
+        index = ComponentIndex()
+        index.nodes = dict(self.nodes)
+        index.parents = dict(self.parents)
+        return index
+
+    def add(self, component: AnyComponent, parent_id: Optional[str]) -> None:
+        """Index a component and any children it already has."""
+        self.nodes[component.id] = component
+        self.parents[component.id] = parent_id
+        if isinstance(component, LayoutComponent):
+            for child in component.children:
+                self.add(child, component.id)
+
+    def remove(self, component_id: str) -> None:
+        """Drop a component and its whole subtree from the index."""
+        component = self.nodes.pop(component_id)
+        del self.parents[component_id]
+        if isinstance(component, LayoutComponent):
+            for child in component.children:
+                self.remove(child.id)
+
+    def subtree_ids(self, component: AnyComponent) -> List[str]:
+        ids = [component.id]
+        if isinstance(component, LayoutComponent):
+            for child in component.children:
+                ids.extend(self.subtree_ids(child))
+        return ids
+
+    def is_within(self, component_id: str, ancestor_id: str) -> bool:
+        """True if component_id is ancestor_id or nested inside it."""
+        current: Optional[str] = component_id
+        while current is not None:
+            if current == ancestor_id:
+                return True
+            current = self.parents.get(current)
+        return False
+
+
+class PageHistory:
+    """
+    Snapshots of one page, oldest first, with a cursor for undo/redo.
+
+    Snapshots are never modified. Each one shares every subtree that did
+    not change since the previous one, so a snapshot costs only the nodes
+    on the changed paths. Versions increase with every commit and are
+    never reused, even for redo states discarded by a new commit.
+    """
+
+    def __init__(self, page: UIPage, max_versions: int = 100):
+        self.max_versions = max_versions
+        self.snapshots: List[UIPage] = [page]
+        self.cursor = 0
+        self.last_version = page.version
+
+    @property
+    def page(self) -> UIPage:
+        return self.snapshots[self.cursor]
+
+    def commit(self, page: UIPage) -> UIPage:
+        """Record a new snapshot (a fresh copy, stamped with its version)."""
+        self.last_version += 1
+        page.version = self.last_version
+        del self.snapshots[self.cursor + 1 :]
+        self.snapshots.append(page)
+        if len(self.snapshots) > self.max_versions:
+            del self.snapshots[0]
+        self.cursor = len(self.snapshots) - 1
+        return page
+
+    def undo(self) -> Optional[UIPage]:
+        if self.cursor == 0:
+            return None
+        self.cursor -= 1
+        return self.page
+
+    def redo(self) -> Optional[UIPage]:
+        if self.cursor == len(self.snapshots) - 1:
+            return None
+        self.cursor += 1
+        return self.page
+
+    def get(self, version: int) -> Optional[UIPage]:
+        for snapshot in self.snapshots:
+            if snapshot.version == version:
+                return snapshot
+        return None
+
+
+def _flatten(
+    components: List[AnyComponent],
+    parent_id: Optional[str],
+    out: Dict[str, tuple],
+) -> Dict[str, tuple]:
+    """component id -> (node, parent id, position among siblings)"""
+    for position, component in enumerate(components):
+        out[component.id] = (component, parent_id, position)
+        if isinstance(component, LayoutComponent):
+            _flatten(component.children, component.id, out)
+    return out
+
+
+def diff_pages(old: UIPage, new: UIPage) -> PageDiff:
+    """
+    Component-level changes from old to new. Nodes shared between the two
+    snapshots are only checked for a change of place; moved means a new
+    parent or a new order relative to the siblings both versions have.
+    """
+    result = PageDiff(
+        from_version=old.version,
+        to_version=new.version,
+        page_changed=(old.title, old.icon) != (new.title, new.icon),
+    )
+    if old is new:
+        return result
+
+    old_nodes = _flatten(old.components, None, {})
+    new_nodes = _flatten(new.components, None, {})
+
+    def common_order(nodes: Dict[str, tuple], other: Dict[str, tuple]):
+        # parent id -> ids of children present in both versions, in order
+        order: Dict[Optional[str], List[str]] = {}
+        for component_id, (_, parent_id, _) in sorted(
+            nodes.items(), key=lambda item: item[1][2]
+        ):
+            if component_id in other and other[component_id][1] == parent_id:
+                order.setdefault(parent_id, []).append(component_id)
+        return order
+
+    old_order = common_order(old_nodes, new_nodes)
+    new_order = common_order(new_nodes, old_nodes)
+
+    for component_id, (node, parent_id, _) in new_nodes.items():
+        if component_id not in old_nodes:
+            result.added.append(component_id)
+            continue
+
+        old_node, old_parent_id, _ = old_nodes[component_id]
+        if old_parent_id != parent_id or old_order[parent_id].index(
+            component_id
+        ) != new_order[parent_id].index(component_id):
+            result.moved.append(component_id)
+        if old_node is not node and (
+            old_node.type != node.type
+            or old_node.props != node.props
+            or getattr(old_node, "data", None) != getattr(node, "data", None)
+        ):
+            result.updated.append(component_id)
+
+    result.removed = [
+        component_id
+        for component_id in old_nodes
+        if component_id not in new_nodes
+    ]
+    return result
+
 
 class SessionStateUIRepository:
-    def __init__(self):
+    """
+    Keeps pages in the session state as immutable, versioned snapshots.
+
+    Mutations never modify a stored page: they copy the changed component
+    and its ancestors and share everything else with the previous
+    version, then commit the new page to its PageHistory. This makes
+    undo/redo and diffs cheap, and lets renderers key caches on
+    (page id, version).
+    """
+
+    def __init__(self, max_versions: int = 100):
         if "ui_pages" not in st.session_state:
             st.session_state.ui_pages = {}  # Dict[str, UIPage]
+        if "ui_component_index" not in st.session_state:
+            st.session_state.ui_component_index = {}
+        if "ui_page_history" not in st.session_state:
+            st.session_state.ui_page_history = {}
+
+        self.max_versions = max_versions
+        # Bind to the session's page dict so the repository also works from
+        # threads without a ScriptRunContext (e.g. the agent's event loop).
+        self._pages: Dict[str, UIPage] = st.session_state.ui_pages
+        self._indexes: Dict[str, ComponentIndex] = (
+            st.session_state.ui_component_index
+        )
+        self._histories: Dict[str, PageHistory] = (
+            st.session_state.ui_page_history
+        )
 
     def get_all_pages(self) -> List[UIPage]:
-        return list(st.session_state.ui_pages.values())
+        return list(self._pages.values())
 
     def get_page(self, page_id: str) -> Optional[UIPage]:
-        return st.session_state.ui_pages.get(page_id)
+        return self._pages.get(page_id)
 
     def create_page(
         self, page_id: str, title: str, icon: Optional[str] = None
     ) -> UIPage:
-        if page_id in st.session_state.ui_pages:
+        if page_id in self._pages:
             raise ValueError(f"Page with ID '{page_id}' already exists.")
 
         page = UIPage(id=page_id, title=title, icon=icon)
-        st.session_state.ui_pages[page_id] = page
+        self._pages[page_id] = page
+        self._indexes[page_id] = ComponentIndex(page)
+        self._histories[page_id] = PageHistory(page, self.max_versions)
+        return page
+
+    def _require_page(self, page_id: str) -> UIPage:
+        page = self.get_page(page_id)
+
+        if not page:
+            raise ValueError(f"Page with ID '{page_id}' not found.")
+        return page
+
+    def _index(self, page: UIPage) -> ComponentIndex:
+        # Built on first use for pages created before the index existed
+        if page.id not in self._indexes:
+            self._indexes[page.id] = ComponentIndex(page)
+        return self._indexes[page.id]
+
+    def _history(self, page: UIPage) -> PageHistory:
+        if page.id not in self._histories:
+            self._histories[page.id] = PageHistory(page, self.max_versions)
+        return self._histories[page.id]
+
+    def _commit(self, page: UIPage) -> UIPage:
+        """Store a new version of a page."""
+        page = self._history(self._pages[page.id]).commit(page)
+        self._pages[page.id] = page
         return page
 
     def _find_component_by_id(
-        self, components: List[AnyComponent], component_id: str
+        self, page: UIPage, component_id: str
     ) -> Optional[Union[UIComponent, LayoutComponent]]:
-        """Recursively find a component by ID in the component tree."""
-        for comp in components:
-            if comp.id == component_id:
-                return comp
+        return self._index(page).nodes.get(component_id)
 
-            if not isinstance(comp, LayoutComponent):
-                continue
+    def _get_layout(self, page: UIPage, layout_id: str) -> LayoutComponent:
+        parent = self._find_component_by_id(page, layout_id)
+        if not parent:
+            raise ValueError(
+                f"Parent component with ID '{layout_id}' not found."
+            )
 
-            found = self._find_component_by_id(comp.children, component_id)
-            if found:
-                return found
+        if not isinstance(parent, LayoutComponent):
+            raise ValueError(
+                f"Parent component '{layout_id}' is not a layout component."
+            )
+        return parent
 
-        return None
+    def _children(
+        self, page: UIPage, parent_id: Optional[str]
+    ) -> List[AnyComponent]:
+        """The children of parent_id (page level if None)."""
+        if parent_id is None:
+            return page.components
+        return self._get_layout(page, parent_id).children
+
+    def _with_children(
+        self,
+        page: UIPage,
+        parent_id: Optional[str],
+        children: List[AnyComponent],
+    ) -> UIPage:
+        """
+        A new page in which parent_id (the page itself if None) has the
+        given children. The parent and its ancestors are copied and
+        re-indexed; all other nodes are shared with page.
+        """
+        index = self._index(page)
+        while parent_id is not None:
+            parent = index.nodes[parent_id].model_copy(
+                update={"children": children}
+            )
+            index.nodes[parent_id] = parent
+            grandparent_id = index.parents[parent_id]
+            children = [
+                parent if c.id == parent_id else c
+                for c in self._children(page, grandparent_id)
+            ]
+            parent_id = grandparent_id
+        return page.model_copy(update={"components": children})
+
+    def _with_component(self, page: UIPage, component: AnyComponent) -> UIPage:
+        """A new page with component replacing the node with its id."""
+        index = self._index(page)
+        parent_id = index.parents[component.id]
+        children = [
+            component if c.id == component.id else c
+            for c in self._children(page, parent_id)
+        ]
+        index.nodes[component.id] = component
+        return self._with_children(page, parent_id, children)
 
     def add_component(
         self, page_id: str, component: Union[UIComponent, LayoutComponent]
     ) -> None:
-        page = self.get_page(page_id)
+        page = self._require_page(page_id)
 
-        if not page:
-            raise ValueError(f"Page with ID '{page_id}' not found.")
+        index = self._index(page)
+        duplicates = [
+            component_id
+            for component_id in index.subtree_ids(component)
+            if component_id in index.nodes
+        ]
+        if duplicates:
+            raise ValueError(
+                f"Component with ID '{duplicates[0]}' already exists."
+            )
+
+        parent_id = getattr(component, "parent_id", None) or None
+        if parent_id:
+            self._get_layout(page, parent_id)
+
+        children = self._children(page, parent_id) + [component]
+        new_page = self._with_children(page, parent_id, children)
+        index.add(component, parent_id)
+        self._commit(new_page)
+
+    def move_component(
+        self,
+        page_id: str,
+        component_id: str,
+        parent_id: Optional[str] = None,
+        position: Optional[int] = None,
+    ) -> None:
+        """
+        Move a component (with its children) under another layout, or to
+        the top level of the page if parent_id is None, at position
+        (appended if None).
+        """
+        page = self._require_page(page_id)
+
+        index = self._index(page)
+        component = index.nodes.get(component_id)
+        if not component:
+            raise ValueError(f"Component with ID '{component_id}' not found.")
 
-        if not hasattr(component, "parent_id") or not component.parent_id:
-            page.components.append(component)
-            st.session_state.ui_pages[page_id] = page
-            return
+        if parent_id is not None:
+            self._get_layout(page, parent_id)
+            if index.is_within(parent_id, component_id):
+                raise ValueError(
+                    f"Cannot move component '{component_id}' into itself or one of its children."
+                )
 
-        parent = self._find_component_by_id(
-            page.components, component.parent_id
+        old_parent_id = index.parents[component_id]
+        page = self._with_children(
+            page,
+            old_parent_id,
+            [
+                c
+                for c in self._children(page, old_parent_id)
+                if c.id != component_id
+            ],
         )
-        if not parent:
-            raise ValueError(
-                f"Parent component with ID '{component.parent_id}' not found."
-            )
 
-        if not isinstance(parent, LayoutComponent):
-            raise ValueError(
-                f"Parent component '{component.parent_id}' is not a layout component."
-            )
-        parent.children.append(component)
-        st.session_state.ui_pages[page_id] = page
+        component = component.model_copy(update={"parent_id": parent_id})
+        index.nodes[component_id] = component
+        index.parents[component_id] = parent_id
+
+        children = list(self._children(page, parent_id))
+        if position is None:
+            children.append(component)
+        else:
+            children.insert(position, component)
+        self._commit(self._with_children(page, parent_id, children))
+
+    def delete_component(self, page_id: str, component_id: str) -> None:
+        """Delete a component and, for layouts, everything nested in it."""
+        page = self._require_page(page_id)
+
+        index = self._index(page)
+        if component_id not in index.nodes:
+            raise ValueError(f"Component with ID '{component_id}' not found.")
+
+        parent_id = index.parents[component_id]
+        new_page = self._with_children(
+            page,
+            parent_id,
+            [
+                c
+                for c in self._children(page, parent_id)
+                if c.id != component_id
+            ],
+        )
+        index.remove(component_id)
+        self._commit(new_page)
+
+    @classmethod
+    def _draft(cls, page: UIPage, index: ComponentIndex):
+        """A detached repository holding one page, for staging changes."""
+        draft = cls.__new__(cls)
+        draft.max_versions = 1
+        draft._pages = {page.id: page}
+        draft._indexes = {page.id: index}
+        draft._histories = {page.id: PageHistory(page, 1)}
+        return draft
+
+    def apply_operations(
+        self, page_id: str, operations: List[PageOperation]
+    ) -> None:
+        """
+        Apply operations in order, all or nothing, as a single new version
+        of the page. They are staged on a detached copy of the page index;
+        the stored page is untouched until every one has succeeded.
+        """
+        page = self._require_page(page_id)
+
+        draft = self._draft(page, self._index(page).copy())
+        for operation in operations:
+            _apply_operation(draft, page_id, operation)
+
+        if draft._pages[page_id] is not page:
+            self._indexes[page_id] = draft._indexes[page_id]
+            self._commit(draft._pages[page_id])
 
     def update_page(
         self,
@@ -109,18 +530,22 @@ class SessionStateUIRepository:
         icon: Optional[str] = None,
     ) -> UIPage:
         """Update a page's attributes."""
-        page = self.get_page(page_id)
-
-        if not page:
-            raise ValueError(f"Page with ID '{page_id}' not found.")
+        page = self._require_page(page_id)
 
+        update = {}
         if title is not None:
-            page.title = title
+            update["title"] = title
         if icon is not None:
-            page.icon = icon
+            update["icon"] = icon
 
-        st.session_state.ui_pages[page_id] = page
-        return page
+        return self._commit(page.model_copy(update=update))
+
+    def delete_page(self, page_id: str) -> None:
+        """Delete a page together with its index and history."""
+        self._require_page(page_id)
+        del self._pages[page_id]
+        self._indexes.pop(page_id, None)
+        self._histories.pop(page_id, None)
 
     def update_component(
         self,
@@ -130,36 +555,33 @@ class SessionStateUIRepository:
         props: Optional[dict] = None,
     ) -> None:
         """Update a component's data or props."""
-        page = self.get_page(page_id)
+        page = self._require_page(page_id)
 
-        if not page:
-            raise ValueError(f"Page with ID '{page_id}' not found.")
-
-        component = self._find_component_by_id(page.components, component_id)
+        component = self._find_component_by_id(page, component_id)
 
         if not component:
             raise ValueError(f"Component with ID '{component_id}' not found.")
 
         if isinstance(component, LayoutComponent):
-            raise ValueError(f"Use update_layout to update layout components.")
+            raise ValueError("Use update_layout to update layout components.")
 
+        update: Dict[str, Any] = {}
         if data is not None:
-            component.data = data
+            update["data"] = data
         if props is not None:
-            component.props.update(props)
+            update["props"] = {**component.props, **props}
 
-        st.session_state.ui_pages[page_id] = page
+        self._commit(
+            self._with_component(page, component.model_copy(update=update))
+        )
 
     def update_layout(
         self, page_id: str, layout_id: str, props: Optional[dict] = None
     ) -> None:
         """Update a layout component's props."""
-        page = self.get_page(page_id)
+        page = self._require_page(page_id)
 
-        if not page:
-            raise ValueError(f"Page with ID '{page_id}' not found.")
-
-        layout = self._find_component_by_id(page.components, layout_id)
+        layout = self._find_component_by_id(page, layout_id)
 
         if not layout:
             raise ValueError(f"Layout with ID '{layout_id}' not found.")
@@ -169,7 +591,576 @@ class SessionStateUIRepository:
                 f"Component '{layout_id}' is not a layout component."
             )
 
+        update: Dict[str, Any] = {}
         if props is not None:
-            layout.props.update(props)
+            update["props"] = {**layout.props, **props}
+
+        self._commit(
+            self._with_component(page, layout.model_copy(update=update))
+        )
+
+    # History
+
+    def _restore(self, page: Optional[UIPage]) -> Optional[UIPage]:
+        if page is not None:
+            self._pages[page.id] = page
+            self._indexes[page.id] = ComponentIndex(page)
+        return page
+
+    def undo(self, page_id: str) -> Optional[UIPage]:
+        """Step back one version. Returns None if there is nothing to undo."""
+        page = self._require_page(page_id)
+        return self._restore(self._history(page).undo())
+
+    def redo(self, page_id: str) -> Optional[UIPage]:
+        """Step forward one undone version, or return None."""
+        page = self._require_page(page_id)
+        return self._restore(self._history(page).redo())
+
+    def get_page_version(self, page_id: str, version: int) -> Optional[UIPage]:
+        """A retained snapshot of the page, or None if it was dropped."""
+        page = self._require_page(page_id)
+        return self._history(page).get(version)
+
+    def diff(
+        self,
+        page_id: str,
+        from_version: int,
+        to_version: Optional[int] = None,
+    ) -> PageDiff:
+        """Changes between two retained versions (to_version: current)."""
+        page = self._require_page(page_id)
+        history = self._history(page)
+        old = history.get(from_version)
+        new = page if to_version is None else history.get(to_version)
+        if old is None or new is None:
+            missing = from_version if old is None else to_version
+            raise ValueError(
+                f"Version {missing} of page '{page_id}' is not available."
+            )
+        return diff_pages(old, new)
+
+
+class SQLiteUIRepository:
+    """
+    Persistent repository storing pages and components in SQLite.
+
+    Components are stored as rows (one per component, with parent id and
+    position) rather than as serialized trees, so lookups by page and
+    component id use the primary key and the (page, parent_id, position)
+    index. Pages are scoped by namespace: every key includes it, so the
+    same page id can exist in several namespaces. Every write bumps the
+    page version; unlike SessionStateUIRepository no history is kept.
+
+    Positions order siblings but may have gaps; the position arguments of
+    the repository API are list indexes, as in SessionStateUIRepository.
+
+    One connection per database file is shared by every instance in the
+    process (and so across reruns and sessions); sqlite3 caches the
+    prepared statements on it. Writes are serialized with a lock and run
+    in a transaction; the database uses WAL so readers in other processes
+    are not blocked.
+    """
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS pages (
+            namespace TEXT NOT NULL,
+            id TEXT NOT NULL,
+            title TEXT NOT NULL,
+            icon TEXT,
+            version INTEGER NOT NULL DEFAULT 0,
+            created_at REAL NOT NULL DEFAULT (julianday('now')),
+            PRIMARY KEY (namespace, id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_pages_created
+            ON pages (namespace, created_at);
+
+        CREATE TABLE IF NOT EXISTS components (
+            namespace TEXT NOT NULL,
+            page_id TEXT NOT NULL,
+            id TEXT NOT NULL,
+            parent_id TEXT,
+            position INTEGER NOT NULL,
+            is_layout INTEGER NOT NULL,
+            type TEXT NOT NULL,
+            data TEXT,
+            props TEXT NOT NULL,
+            PRIMARY KEY (namespace, page_id, id),
+            FOREIGN KEY (namespace, page_id)
+                REFERENCES pages (namespace, id) ON DELETE CASCADE
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_components_parent
+            ON components (namespace, page_id, parent_id, position);
+    """
+
+    _connections: Dict[str, "_SharedConnection"] = {}
+    _connections_lock = threading.Lock()
+
+    def __init__(self, db_path: str, namespace: str = "default"):
+        self.db_path = db_path
+        self.namespace = namespace
+        shared = self._connect(db_path)
+        self._conn = shared.conn
+        self._lock = shared.lock
+        self._transaction = shared.transaction
+
+    @classmethod
+    def _connect(cls, db_path: str) -> "_SharedConnection":
+        with cls._connections_lock:
+            if db_path not in cls._connections:
+                conn = sqlite3.connect(
+                    db_path,
+                    check_same_thread=False,
+                    isolation_level=None,  # transactions are explicit
+                    cached_statements=256,
+                )
+                conn.row_factory = sqlite3.Row
+                conn.execute("PRAGMA journal_mode=WAL")
+                conn.execute("PRAGMA synchronous=NORMAL")
+                conn.execute("PRAGMA foreign_keys=ON")
+                conn.executescript(cls.SCHEMA)
+                cls._connections[db_path] = _SharedConnection(conn)
+            return cls._connections[db_path]
+
+    # Reads
+
+    def get_all_pages(self) -> List[UIPage]:
+        with self._lock:
+            page_rows = self._conn.execute(
+                "SELECT id, title, icon, version FROM pages "
+                "WHERE namespace = ? ORDER BY created_at, rowid",
+                (self.namespace,),
+            ).fetchall()
+            component_rows = self._conn.execute(
+                "SELECT * FROM components WHERE namespace = ? "
+                "ORDER BY page_id, position",
+                (self.namespace,),
+            ).fetchall()
+
+        rows_by_page: Dict[str, List[sqlite3.Row]] = {}
+        for row in component_rows:
+            rows_by_page.setdefault(row["page_id"], []).append(row)
+        return [
+            self._build_page(row, rows_by_page.get(row["id"], []))
+            for row in page_rows
+        ]
 
-        st.session_state.ui_pages[page_id] = page
+    def get_page(self, page_id: str) -> Optional[UIPage]:
+        with self._lock:
+            page_row = self._conn.execute(
+                "SELECT id, title, icon, version FROM pages "
+                "WHERE namespace = ? AND id = ?",
+                (self.namespace, page_id),
+            ).fetchone()
+            if page_row is None:
+                return None
+            component_rows = self._conn.execute(
+                "SELECT * FROM components WHERE namespace = ? AND page_id = ? "
+                "ORDER BY position",
+                (self.namespace, page_id),
+            ).fetchall()
+        return self._build_page(page_row, component_rows)
+
+    def _build_page(
+        self, page_row: sqlite3.Row, component_rows: List[sqlite3.Row]
+    ) -> UIPage:
+        """Assemble the component tree from rows sorted by position."""
+        children: Dict[Optional[str], List[AnyComponent]] = {}
+        for row in component_rows:
+            props = json.loads(row["props"])
+            component: AnyComponent
+            if row["is_layout"]:
+                component = LayoutComponent(
+                    id=row["id"],
+                    type=row["type"],
+                    props=props,
+                    parent_id=row["parent_id"],
+                )
+            else:
+                component = UIComponent(
+                    id=row["id"],
+                    type=row["type"],
+                    data=json.loads(row["data"]),
+                    props=props,
+                    parent_id=row["parent_id"],
+                )
+            children.setdefault(row["parent_id"], []).append(component)
+
+        for siblings in children.values():
+            for component in siblings:
+                if isinstance(component, LayoutComponent):
+                    component.children = children.get(component.id, [])
+
+        return UIPage(
+            id=page_row["id"],
+            title=page_row["title"],
+            icon=page_row["icon"],
+            components=children.get(None, []),
+            version=page_row["version"],
+        )
+
+    def _get_row(self, page_id: str, component_id: str) -> sqlite3.Row:
+        row = self._conn.execute(
+            "SELECT * FROM components "
+            "WHERE namespace = ? AND page_id = ? AND id = ?",
+            (self.namespace, page_id, component_id),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Component with ID '{component_id}' not found.")
+        return row
+
+    def _require_page(self, page_id: str) -> None:
+        row = self._conn.execute(
+            "SELECT 1 FROM pages WHERE namespace = ? AND id = ?",
+            (self.namespace, page_id),
+        ).fetchone()
+        if row is None:
+            raise ValueError(f"Page with ID '{page_id}' not found.")
+
+    def _require_layout(self, page_id: str, layout_id: str) -> None:
+        row = self._conn.execute(
+            "SELECT is_layout FROM components "
+            "WHERE namespace = ? AND page_id = ? AND id = ?",
+            (self.namespace, page_id, layout_id),
+        ).fetchone()
+        if row is None:
+            raise ValueError(
+                f"Parent component with ID '{layout_id}' not found."
+            )
+        if not row["is_layout"]:
+            raise ValueError(
+                f"Parent component '{layout_id}' is not a layout component."
+            )
+
+    def _touch(self, page_id: str) -> None:
+        """Bump the page version after a change."""
+        self._conn.execute(
+            "UPDATE pages SET version = version + 1 "
+            "WHERE namespace = ? AND id = ?",
+            (self.namespace, page_id),
+        )
+
+    def _next_position(self, page_id: str, parent_id: Optional[str]) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(position) + 1, 0) FROM components "
+            "WHERE namespace = ? AND page_id = ? AND parent_id IS ?",
+            (self.namespace, page_id, parent_id),
+        ).fetchone()[0]
+
+    def _sibling_ids(
+        self, page_id: str, parent_id: Optional[str]
+    ) -> List[str]:
+        return [
+            row["id"]
+            for row in self._conn.execute(
+                "SELECT id FROM components "
+                "WHERE namespace = ? AND page_id = ? AND parent_id IS ? "
+                "ORDER BY position",
+                (self.namespace, page_id, parent_id),
+            )
+        ]
+
+    # Writes
+
+    def create_page(
+        self, page_id: str, title: str, icon: Optional[str] = None
+    ) -> UIPage:
+        with self._transaction():
+            try:
+                self._conn.execute(
+                    "INSERT INTO pages (namespace, id, title, icon) "
+                    "VALUES (?, ?, ?, ?)",
+                    (self.namespace, page_id, title, icon),
+                )
+            except sqlite3.IntegrityError:
+                raise ValueError(
+                    f"Page with ID '{page_id}' already exists."
+                ) from None
+        return UIPage(id=page_id, title=title, icon=icon)
+
+    def update_page(
+        self,
+        page_id: str,
+        title: Optional[str] = None,
+        icon: Optional[str] = None,
+    ) -> UIPage:
+        """Update a page's attributes."""
+        with self._transaction():
+            self._require_page(page_id)
+            self._conn.execute(
+                "UPDATE pages SET title = COALESCE(?, title), "
+                "icon = COALESCE(?, icon), version = version + 1 "
+                "WHERE namespace = ? AND id = ?",
+                (title, icon, self.namespace, page_id),
+            )
+            page = self.get_page(page_id)
+        assert page is not None
+        return page
+
+    def delete_page(self, page_id: str) -> None:
+        """Delete a page; its components go with it (ON DELETE CASCADE)."""
+        with self._transaction():
+            self._require_page(page_id)
+            self._conn.execute(
+                "DELETE FROM pages WHERE namespace = ? AND id = ?",
+                (self.namespace, page_id),
+            )
+
+    def add_component(
+        self, page_id: str, component: Union[UIComponent, LayoutComponent]
+    ) -> None:
+        with self._transaction():
+            self._require_page(page_id)
+            parent_id = getattr(component, "parent_id", None) or None
+            if parent_id:
+                self._require_layout(page_id, parent_id)
+            self._insert_subtree(
+                page_id,
+                component,
+                parent_id,
+                self._next_position(page_id, parent_id),
+            )
+            self._touch(page_id)
+
+    def _insert_subtree(
+        self,
+        page_id: str,
+        component: AnyComponent,
+        parent_id: Optional[str],
+        position: int,
+    ) -> None:
+        is_layout = isinstance(component, LayoutComponent)
+        data = (
+            json.dumps(component.data)
+            if isinstance(component, UIComponent)
+            else None
+        )
+        try:
+            self._conn.execute(
+                "INSERT INTO components (namespace, page_id, id, parent_id, "
+                "position, is_layout, type, data, props) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    self.namespace,
+                    page_id,
+                    component.id,
+                    parent_id,
+                    position,
+                    int(is_layout),
+                    component.type.value,
+                    data,
+                    json.dumps(component.props),
+                ),
+            )
+        except sqlite3.IntegrityError:
+            raise ValueError(
+                f"Component with ID '{component.id}' already exists."
+            ) from None
+        if isinstance(component, LayoutComponent):
+            for child_position, child in enumerate(component.children):
+                self._insert_subtree(
+                    page_id, child, component.id, child_position
+                )
+
+    def update_component(
+        self,
+        page_id: str,
+        component_id: str,
+        data: Optional[str] = None,
+        props: Optional[dict] = None,
+    ) -> None:
+        """Update a component's data or props."""
+        with self._transaction():
+            self._require_page(page_id)
+            row = self._get_row(page_id, component_id)
+            if row["is_layout"]:
+                raise ValueError(
+                    "Use update_layout to update layout components."
+                )
+            self._conn.execute(
+                "UPDATE components SET data = ?, props = ? "
+                "WHERE namespace = ? AND page_id = ? AND id = ?",
+                (
+                    json.dumps(data) if data is not None else row["data"],
+                    self._merged_props(row, props),
+                    self.namespace,
+                    page_id,
+                    component_id,
+                ),
+            )
+            self._touch(page_id)
+
+    def update_layout(
+        self, page_id: str, layout_id: str, props: Optional[dict] = None
+    ) -> None:
+        """Update a layout component's props."""
+        with self._transaction():
+            self._require_page(page_id)
+            try:
+                row = self._get_row(page_id, layout_id)
+            except ValueError:
+                raise ValueError(
+                    f"Layout with ID '{layout_id}' not found."
+                ) from None
+            if not row["is_layout"]:
+                raise ValueError(
+                    f"Component '{layout_id}' is not a layout component."
+                )
+            self._conn.execute(
+                "UPDATE components SET props = ? "
+                "WHERE namespace = ? AND page_id = ? AND id = ?",
+                (
+                    self._merged_props(row, props),
+                    self.namespace,
+                    page_id,
+                    layout_id,
+                ),
+            )
+            self._touch(page_id)
+
+    @staticmethod
+    def _merged_props(row: sqlite3.Row, props: Optional[dict]) -> str:
+        if props is None:
+            return row["props"]
+        merged: Dict[str, Any] = json.loads(row["props"])
+        merged.update(props)
+        return json.dumps(merged)
+
+    def move_component(
+        self,
+        page_id: str,
+        component_id: str,
+        parent_id: Optional[str] = None,
+        position: Optional[int] = None,
+    ) -> None:
+        """
+        Move a component (with its children) under another layout, or to
+        the top level of the page if parent_id is None, at position
+        (appended if None).
+        """
+        with self._transaction():
+            self._require_page(page_id)
+            self._get_row(page_id, component_id)
+
+            if parent_id is not None:
+                self._require_layout(page_id, parent_id)
+                ancestor: Optional[str] = parent_id
+                while ancestor is not None:
+                    if ancestor == component_id:
+                        raise ValueError(
+                            f"Cannot move component '{component_id}' into itself or one of its children."
+                        )
+                    ancestor = self._get_row(page_id, ancestor)["parent_id"]
+
+            # position indexes the new siblings (list.insert semantics);
+            # they are renumbered densely around the moved component
+            siblings = [
+                sibling_id
+                for sibling_id in self._sibling_ids(page_id, parent_id)
+                if sibling_id != component_id
+            ]
+            if position is None:
+                siblings.append(component_id)
+            else:
+                siblings.insert(position, component_id)
+
+            self._conn.execute(
+                "UPDATE components SET parent_id = ? "
+                "WHERE namespace = ? AND page_id = ? AND id = ?",
+                (parent_id, self.namespace, page_id, component_id),
+            )
+            self._conn.executemany(
+                "UPDATE components SET position = ? "
+                "WHERE namespace = ? AND page_id = ? AND id = ?",
+                [
+                    (new_position, self.namespace, page_id, sibling_id)
+                    for new_position, sibling_id in enumerate(siblings)
+                ],
+            )
+            self._touch(page_id)
+
+    def delete_component(self, page_id: str, component_id: str) -> None:
+        """Delete a component and, for layouts, everything nested in it."""
+        with self._transaction():
+            self._require_page(page_id)
+            self._get_row(page_id, component_id)
+            self._conn.execute(
+                """
+                WITH RECURSIVE subtree (id) AS (
+                    SELECT ?
+                    UNION ALL
+                    SELECT c.id FROM components c
+                    JOIN subtree s ON c.parent_id = s.id
+                    WHERE c.namespace = ? AND c.page_id = ?
+                )
+                DELETE FROM components
+                WHERE namespace = ? AND page_id = ?
+                    AND id IN (SELECT id FROM subtree)
+                """,
+                (
+                    component_id,
+                    self.namespace,
+                    page_id,
+                    self.namespace,
+                    page_id,
+                ),
+            )
+            self._touch(page_id)
+
+    def apply_operations(
+        self, page_id: str, operations: List[PageOperation]
+    ) -> None:
+        """Apply operations in order in a single transaction."""
+        with self._transaction():
+            self._require_page(page_id)
+            for operation in operations:
+                _apply_operation(self, page_id, operation)
+
+
+class _SharedConnection:
+    """
+    A connection shared across threads. transaction() is reentrant, so
+    methods that open one can be composed inside a larger transaction.
+    """
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+        self.lock = threading.RLock()
+        self._depth = 0
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        with self.lock:
+            if self._depth:
+                # Nested: the outermost transaction commits or rolls back
+                self._depth += 1
+                try:
+                    yield self.conn
+                finally:
+                    self._depth -= 1
+                return
+
+            self.conn.execute("BEGIN IMMEDIATE")
+            self._depth = 1
+            try:
+                yield self.conn
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+            else:
+                self.conn.execute("COMMIT")
+            finally:
+                self._depth = 0
+
+
+def create_repository() -> StreamlitUIRepository:
+    """
+    Pages persist in SQLite when UI_DB_PATH is set, otherwise they live in
+    the session and are lost when it ends.
+    """
+    db_path = os.environ.get("UI_DB_PATH")
+    if db_path:
+        return SQLiteUIRepository(
+            db_path, namespace=os.environ.get("UI_DB_NAMESPACE", "default")
+        )
+    return SessionStateUIRepository()
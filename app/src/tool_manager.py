@@ -1,39 +1,603 @@
+from abc import ABC, abstractmethod
+import heapq
 import json
 import logging
-from typing import Dict, List, Optional, Set, Any
+import math
+import re
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple, cast
 import numpy as np
+from src.cache_utils import LRUCache
+from src.embedding_cache import EmbeddingCache, get_default_embedding_cache
+from src.embedding_model import (
+    SENTENCE_TRANSFORMERS_AVAILABLE,
+    EmbeddingModelRegistry,
+    SharedEmbeddingModel,
+)
 from src.tool_models import Tool
-from sentence_transformers import SentenceTransformer
 
 logger = logging.getLogger("tool_manager")
 
+EMBEDDING_MODEL_NAME = "all-MiniLM-L6-v2"
+
+# Threshold for semantic match (0.3 is usually a good baseline for MiniLM)
+SEMANTIC_MATCH_THRESHOLD = 0.3
+
+SEARCH_MODES = ("semantic", "keyword", "hybrid")
+
+# Rank offset for reciprocal rank fusion in hybrid search
+RRF_K = 60
+
+
+class VectorIndex(ABC):
+    """Interface for tool embedding indexes used by ToolManager."""
+
+    precision: str = "float32"
+
+    @abstractmethod
+    def __len__(self) -> int:
+        pass
+
+    @abstractmethod
+    def add_many(
+        self, names: List[str], embeddings: np.ndarray, categories: List[str]
+    ) -> None:
+        pass
+
+    @abstractmethod
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        category: Optional[str] = None,
+        top_k: int = 3,
+        threshold: float = SEMANTIC_MATCH_THRESHOLD,
+    ) -> List[Tuple[str, float]]:
+        """Return up to top_k (name, cosine similarity) above threshold."""
+
+    @abstractmethod
+    def memory_bytes(self) -> int:
+        pass
+
+    def add(self, name: str, embedding: np.ndarray, category: str) -> None:
+        self.add_many([name], np.atleast_2d(embedding), [category])
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        return vectors / np.maximum(norms, 1e-12)
+
+
+class ExactIndex(VectorIndex):
+    """
+    Brute-force index: tool embeddings as one pre-normalized, contiguous
+    matrix with parallel name and category arrays, so cosine similarity
+    against every tool is a single matrix-vector product.
+
+    precision selects the storage type: "float32" (exact), "float16" or
+    "int8" (one float32 scale per vector). Quantized indexes scan in
+    blocks, over-fetch candidates and rescore them with full-precision
+    vectors from full_precision_lookup when it is given.
+    """
+
+    PRECISIONS = ("float32", "float16", "int8")
+    # Rows dequantized at a time, bounding scan scratch memory
+    SCAN_BLOCK_ROWS = 4096
+    RESCORE_MULTIPLIER = 4
+
+    def __init__(
+        self,
+        precision: str = "float32",
+        full_precision_lookup: Optional[
+            Callable[[List[str]], List[Optional[np.ndarray]]]
+        ] = None,
+    ):
+        if precision not in self.PRECISIONS:
+            raise ValueError(
+                f"Invalid index precision: {precision}. Valid values are: {self.PRECISIONS}"
+            )
+        self.precision = precision
+        self.full_precision_lookup = full_precision_lookup
+        self._rows: Dict[str, int] = {}
+        self._vectors: List[np.ndarray] = []
+        self._scales: List[float] = []
+        self._names: List[str] = []
+        self._categories: List[str] = []
+        self._matrix: Optional[np.ndarray] = None
+        self._scale_array = np.empty(0, dtype=np.float32)
+        self._name_array = np.empty(0, dtype=object)
+        self._category_array = np.empty(0, dtype=object)
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._rows
+
+    def _quantize(self, vector: np.ndarray) -> Tuple[np.ndarray, float]:
+        if self.precision == "int8":
+            scale = float(np.abs(vector).max()) / 127 or 1.0
+            return np.round(vector / scale).astype(np.int8), scale
+        return vector.astype(self.precision), 1.0
+
+    def add_many(
+        self, names: List[str], embeddings: np.ndarray, categories: List[str]
+    ) -> None:
+        self.add_rows(names, embeddings, categories)
+
+    def add_rows(
+        self, names: List[str], embeddings: np.ndarray, categories: List[str]
+    ) -> List[int]:
+        """Add or replace vectors; returns the row of each name."""
+        vectors = self._normalize(embeddings)
+        rows = []
+        for name, vector, category in zip(
+            names, vectors, categories, strict=True
+        ):
+            stored, scale = self._quantize(vector)
+            if name in self._rows:
+                row = self._rows[name]
+                self._vectors[row] = stored
+                self._scales[row] = scale
+                self._categories[row] = category
+            else:
+                row = len(self._names)
+                self._rows[name] = row
+                self._vectors.append(stored)
+                self._scales.append(scale)
+                self._names.append(name)
+                self._categories.append(category)
+            rows.append(row)
+        # Rebuilt lazily on the next search
+        self._matrix = None
+        return rows
+
+    def _build(self) -> np.ndarray:
+        matrix = np.ascontiguousarray(np.vstack(self._vectors))
+        # Keep rows as views so only one copy of the vectors stays alive
+        self._vectors = list(matrix)
+        self._scale_array = np.array(self._scales, dtype=np.float32)
+        self._name_array = np.array(self._names, dtype=object)
+        self._category_array = np.array(self._categories, dtype=object)
+        self._matrix = matrix
+        return matrix
+
+    def _ensure_built(self) -> np.ndarray:
+        if self._matrix is None:
+            return self._build()
+        return self._matrix
+
+    def dequantized(self) -> np.ndarray:
+        """All vectors as a float32 matrix (used to train other indexes)."""
+        matrix = self._ensure_built().astype(np.float32)
+        if self.precision == "int8":
+            matrix *= self._scale_array[:, None]
+        return matrix
+
+    def _scan(
+        self, query: np.ndarray, rows: Optional[np.ndarray] = None
+    ) -> np.ndarray:
+        matrix = self._ensure_built()
+        if rows is not None:
+            matrix = matrix[rows]
+        if self.precision == "float32":
+            return matrix @ query
+
+        scores = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), self.SCAN_BLOCK_ROWS):
+            block = matrix[start : start + self.SCAN_BLOCK_ROWS]
+            scores[start : start + len(block)] = (
+                block.astype(np.float32) @ query
+            )
+        if self.precision == "int8":
+            scale = (
+                self._scale_array if rows is None else self._scale_array[rows]
+            )
+            scores *= scale
+        return scores
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        category: Optional[str] = None,
+        top_k: int = 3,
+        threshold: float = SEMANTIC_MATCH_THRESHOLD,
+        rows: Optional[np.ndarray] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Return up to top_k (name, cosine similarity) above threshold.
+        rows restricts the scan to a subset of rows.
+        """
+        if not self._names or top_k <= 0:
+            return []
+        query = self._normalize(query_embedding)
+        if rows is None:
+            rows = np.arange(len(self._names))
+            scores = self._scan(query)
+        elif not len(rows):
+            return []
+        else:
+            scores = self._scan(query, rows)
+
+        if category:
+            scores = np.where(
+                self._category_array[rows] == category, scores, -np.inf
+            )
+
+        fetch = top_k
+        if self.precision != "float32":
+            fetch = top_k * self.RESCORE_MULTIPLIER
+        k = min(fetch, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        candidates = candidates[np.isfinite(scores[candidates])]
+
+        if self.precision != "float32" and self.full_precision_lookup:
+            scores = scores.copy()
+            exact = self.full_precision_lookup(
+                list(self._name_array[rows[candidates]])
+            )
+            for i, vector in zip(candidates, exact, strict=True):
+                if vector is not None:
+                    scores[i] = float(self._normalize(vector) @ query)
+
+        candidates = candidates[np.argsort(-scores[candidates])][:top_k]
+        return [
+            (self._name_array[rows[i]], float(scores[i]))
+            for i in candidates
+            if scores[i] > threshold
+        ]
+
+    def memory_bytes(self) -> int:
+        """Bytes held by the stored vectors and their scales."""
+        if not self._vectors:
+            return 0
+        matrix = self._ensure_built()
+        scales = self._scale_array.nbytes if self.precision == "int8" else 0
+        return matrix.nbytes + scales
+
+
+class IVFIndex(VectorIndex):
+    """
+    Approximate inverted-file index in pure NumPy.
+
+    Vectors are clustered with spherical k-means into ~sqrt(n) lists, and a
+    query only scans the n_probe lists whose centroids are closest. Below
+    min_train_size tools (or before training) it answers exactly through
+    the ExactIndex that stores the vectors. Clusters are retrained when
+    the catalog has doubled since the last training; vectors added in
+    between are assigned to their nearest centroid.
+    """
+
+    def __init__(
+        self,
+        precision: str = "float32",
+        full_precision_lookup: Optional[
+            Callable[[List[str]], List[Optional[np.ndarray]]]
+        ] = None,
+        min_train_size: int = 5000,
+        probe_fraction: float = 0.1,
+        kmeans_iterations: int = 10,
+    ):
+        self._exact = ExactIndex(precision, full_precision_lookup)
+        self.precision = precision
+        self.min_train_size = min_train_size
+        self.probe_fraction = probe_fraction
+        self.kmeans_iterations = kmeans_iterations
+        # One row per inverted list; empty until trained
+        self._centroids = np.empty((0, 0), dtype=np.float32)
+        self._assignments = np.empty(0, dtype=np.int32)
+        self._lists: Optional[List[np.ndarray]] = None
+        self._trained_size = 0
+
+    def __len__(self) -> int:
+        return len(self._exact)
+
+    @property
+    def is_trained(self) -> bool:
+        return len(self._centroids) > 0
+
+    def add_many(
+        self, names: List[str], embeddings: np.ndarray, categories: List[str]
+    ) -> None:
+        rows = self._exact.add_rows(names, embeddings, categories)
+
+        if len(self) >= self.min_train_size and (
+            len(self) >= 2 * self._trained_size
+        ):
+            self.train()
+        elif self.is_trained:
+            self._assign(np.array(rows), self._normalize(embeddings))
+
+    def train(self) -> None:
+        vectors = self._exact.dequantized()
+        n_lists = max(1, int(np.sqrt(len(vectors))))
+        rng = np.random.default_rng(0)
+
+        sample = vectors[
+            rng.choice(
+                len(vectors), min(len(vectors), 64 * n_lists), replace=False
+            )
+        ]
+        centroids = sample[rng.choice(len(sample), n_lists, replace=False)]
+        for _ in range(self.kmeans_iterations):
+            labels = np.argmax(sample @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, labels, sample)
+            counts = np.bincount(labels, minlength=n_lists)
+            # Empty clusters keep their previous centroid
+            sums[counts == 0] = centroids[counts == 0]
+            centroids = self._normalize(sums)
+
+        self._centroids = centroids
+        self._assignments = np.empty(len(vectors), dtype=np.int32)
+        self._assign(np.arange(len(vectors)), vectors)
+        self._trained_size = len(vectors)
+        logger.info(
+            f"🗂️ Trained IVF tool index: {len(vectors)} vectors in {n_lists} lists"
+        )
+
+    def _assign(self, rows: np.ndarray, vectors: np.ndarray) -> None:
+        if len(self._assignments) < len(self):
+            grown = np.empty(len(self), dtype=np.int32)
+            grown[: len(self._assignments)] = self._assignments
+            self._assignments = grown
+        for start in range(0, len(rows), ExactIndex.SCAN_BLOCK_ROWS):
+            block = slice(start, start + ExactIndex.SCAN_BLOCK_ROWS)
+            self._assignments[rows[block]] = np.argmax(
+                vectors[block] @ self._centroids.T, axis=1
+            )
+        self._lists = None
+
+    def _inverted_lists(self) -> List[np.ndarray]:
+        if self._lists is None:
+            order = np.argsort(self._assignments, kind="stable")
+            bounds = np.searchsorted(
+                self._assignments[order], np.arange(len(self._centroids) + 1)
+            )
+            self._lists = [
+                order[bounds[i] : bounds[i + 1]]
+                for i in range(len(self._centroids))
+            ]
+        return self._lists
+
+    def search(
+        self,
+        query_embedding: np.ndarray,
+        category: Optional[str] = None,
+        top_k: int = 3,
+        threshold: float = SEMANTIC_MATCH_THRESHOLD,
+    ) -> List[Tuple[str, float]]:
+        if not self.is_trained:
+            return self._exact.search(
+                query_embedding, category, top_k, threshold
+            )
+
+        query = self._normalize(query_embedding)
+        n_probe = max(
+            1, int(round(len(self._centroids) * self.probe_fraction))
+        )
+        closest = np.argpartition(-(self._centroids @ query), n_probe - 1)[
+            :n_probe
+        ]
+        lists = self._inverted_lists()
+        rows = np.concatenate([lists[i] for i in closest])
+        return self._exact.search(
+            query_embedding, category, top_k, threshold, rows=rows
+        )
+
+    def memory_bytes(self) -> int:
+        return (
+            self._exact.memory_bytes()
+            + self._centroids.nbytes
+            + self._assignments.nbytes
+        )
+
+
+INDEX_BACKENDS: Dict[str, Callable[..., VectorIndex]] = {
+    "exact": ExactIndex,
+    # IVF answers exactly until the catalog reaches its min_train_size
+    "auto": IVFIndex,
+    "ivf": lambda **kwargs: IVFIndex(min_train_size=0, **kwargs),
+}
+
+
+class KeywordIndex:
+    """
+    Inverted index over tool names, keywords and descriptions with BM25
+    scoring. Only postings of the query terms are visited per search.
+    """
+
+    K1 = 1.5
+    B = 0.75
+    STOPWORDS = set(
+        "a an and as at be by for from i in is it me my of on or the to "
+        "want with".split()
+    )
+
+    def __init__(self):
+        self._postings: Dict[str, Dict[str, int]] = {}
+        self._doc_terms: Dict[str, Dict[str, int]] = {}
+        self._doc_lengths: Dict[str, int] = {}
+        self._categories: Dict[str, str] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._doc_lengths)
+
+    @classmethod
+    def tokenize(cls, text: str) -> List[str]:
+        return [
+            token
+            for token in re.findall(r"[a-z0-9]+", text.lower())
+            if token not in cls.STOPWORDS
+        ]
+
+    def add(
+        self,
+        name: str,
+        description: str,
+        keywords: List[str],
+        category: str,
+    ) -> None:
+        if name in self._doc_terms:
+            self._remove(name)
+
+        # Names and keywords are the strongest signals, count them twice
+        tokens = (
+            self.tokenize(name.replace("_", " ")) * 2
+            + self.tokenize(" ".join(keywords)) * 2
+            + self.tokenize(description)
+        )
+        terms: Dict[str, int] = {}
+        for token in tokens:
+            terms[token] = terms.get(token, 0) + 1
+
+        for term, frequency in terms.items():
+            self._postings.setdefault(term, {})[name] = frequency
+        self._doc_terms[name] = terms
+        self._doc_lengths[name] = len(tokens)
+        self._categories[name] = category
+        self._total_length += len(tokens)
+
+    def _remove(self, name: str) -> None:
+        for term in self._doc_terms.pop(name):
+            postings = self._postings[term]
+            postings.pop(name, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._doc_lengths.pop(name)
+        self._categories.pop(name, None)
+
+    def search(
+        self, query: str, category: Optional[str] = None, top_k: int = 3
+    ) -> List[Tuple[str, float]]:
+        """Return up to top_k (name, BM25 score) with a positive score."""
+        doc_count = len(self._doc_lengths)
+        if not doc_count or top_k <= 0:
+            return []
+
+        avg_length = self._total_length / doc_count
+        scores: Dict[str, float] = {}
+        for term in set(self.tokenize(query)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(
+                1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5)
+            )
+            for name, frequency in postings.items():
+                if category and self._categories[name] != category:
+                    continue
+                norm = self.K1 * (
+                    1 - self.B + self.B * self._doc_lengths[name] / avg_length
+                )
+                scores[name] = scores.get(name, 0.0) + idf * (
+                    frequency * (self.K1 + 1) / (frequency + norm)
+                )
+
+        return heapq.nlargest(top_k, scores.items(), key=lambda item: item[1])
+
 
 class ToolManager:
     """Manages tool registration and lazy-loading discovery."""
 
-    def __init__(self):
+    def __init__(
+        self,
+        embedding_cache: Optional[EmbeddingCache] = None,
+        query_cache_size: int = 512,
+        query_cache_max_bytes: int = 8 * 1024 * 1024,
+        search_mode: str = "semantic",
+        index_precision: str = "float32",
+        index_backend: str = "auto",
+    ):
+        """
+        search_mode is "semantic" (embeddings, BM25 when nothing matches),
+        "keyword" (BM25 only) or "hybrid" (both rankings fused).
+        index_precision is the embedding storage type; quantized indexes
+        rescore candidates from the on-disk embedding cache.
+        index_backend is "exact", "ivf" or "auto" (exact for small
+        catalogs, IVF once it is large enough to benefit).
+        """
+        if index_backend not in INDEX_BACKENDS:
+            raise ValueError(
+                f"Invalid index backend: {index_backend}. Valid backends are: {list(INDEX_BACKENDS)}"
+            )
+        if search_mode not in SEARCH_MODES:
+            raise ValueError(
+                f"Invalid search mode: {search_mode}. Valid modes are: {SEARCH_MODES}"
+            )
+        self.search_mode = search_mode
         self.registry: Dict[str, Dict[str, Any]] = {}
         self.loaded_tools: Set[str] = set()
         self.always_loaded: Set[str] = {
             "search_tools"
         }  # Meta-tool always available
+        # Bumped whenever the registry or the active tool set changes
+        self.version = 0
+        # Bumped only when the registry changes; keys cached search results
+        self.registry_version = 0
 
-        self.model = None
-        self.tool_embeddings = {}
+        self.query_embedding_cache: LRUCache[np.ndarray] = LRUCache(
+            max_entries=query_cache_size, max_bytes=query_cache_max_bytes
+        )
+        self.search_results_cache: LRUCache[List[Dict[str, Any]]] = LRUCache(
+            max_entries=query_cache_size
+        )
 
-        if SentenceTransformer:
-            try:
-                self.model = SentenceTransformer("all-MiniLM-L6-v2")
-                logger.info(
-                    "🧠 Semantic search model loaded: all-MiniLM-L6-v2"
-                )
-            except Exception as e:
-                logger.error(f"❌ Failed to load semantic search model: {e}")
+        self.model: Optional[SharedEmbeddingModel] = None
+        self.embedding_index: VectorIndex = INDEX_BACKENDS[index_backend](
+            precision=index_precision,
+            full_precision_lookup=self._cached_embeddings,
+        )
+        # Embedded text per tool, to find its full-precision cache entry
+        self._embedding_texts: Dict[str, str] = {}
+        self.keyword_index = KeywordIndex()
+        self.embedding_cache = embedding_cache or get_default_embedding_cache()
+
+        # Tools registered before the model is ready; embedded once it loads
+        self._pending_embeddings: List[Tuple[str, str, str]] = []
+        self._semantic_ready = False
+        self._index_lock = threading.RLock()
+
+        if SENTENCE_TRANSFORMERS_AVAILABLE:
+            # Shared by every session in this process and loaded in the
+            # background: keyword search serves requests until it is ready
+            self.model = EmbeddingModelRegistry.get(EMBEDDING_MODEL_NAME)
+            self.model.load_in_background().add_done_callback(
+                self._on_model_loaded
+            )
         else:
             logger.warning(
                 "⚠️ sentence-transformers not found. Falling back to keyword search."
             )
 
+    @property
+    def semantic_ready(self) -> bool:
+        """Whether the model is loaded and all registered tools are embedded."""
+        return self._semantic_ready
+
+    def _on_model_loaded(self, future: "Future[SharedEmbeddingModel]") -> None:
+        error = future.exception()
+        if error:
+            logger.error(f"❌ Failed to load semantic search model: {error}")
+            self.model = None
+            return
+
+        with self._index_lock:
+            pending, self._pending_embeddings = self._pending_embeddings, []
+            if pending:
+                try:
+                    self._index_embeddings(
+                        *map(list, zip(*pending, strict=True))
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Failed to compute embeddings for {len(pending)} tool(s): {e}"
+                    )
+            self._semantic_ready = True
+        logger.info(f"🧠 Semantic search model ready: {EMBEDDING_MODEL_NAME}")
+
     def register_tool(
         self,
         name: str,
@@ -42,103 +606,195 @@ class ToolManager:
         category: str = "general",
         always_load: bool = False,
     ) -> None:
-        self.registry[name] = {
-            "definition": tool,
-            "keywords": keywords,
-            "category": category,
-            "description": tool.description,
-        }
+        self.register_tools(
+            [
+                {
+                    "name": name,
+                    "tool": tool,
+                    "keywords": keywords,
+                    "category": category,
+                    "always_load": always_load,
+                }
+            ]
+        )
 
-        if always_load:
-            self.always_loaded.add(name)
-            self.loaded_tools.add(name)
+    def register_tools(self, tools: List[Dict[str, Any]]) -> None:
+        """
+        Register many tools at once.
+        Each entry takes the register_tool arguments (name, tool, keywords,
+        category, always_load) and an optional origin ("local" or the MCP
+        server providing the tool). Embeddings missing from the cache are
+        computed in one batched encode call.
+        """
+        for entry in tools:
+            name = entry["name"]
+            tool = entry["tool"]
+            category = entry.get("category", "general")
+            self.registry[name] = {
+                "definition": tool,
+                "keywords": entry["keywords"],
+                "category": category,
+                "description": tool.description,
+                "origin": entry.get("origin", "local"),
+            }
+            self.keyword_index.add(
+                name, tool.description, entry["keywords"], category
+            )
 
-        if self.model:
+            if entry.get("always_load", False):
+                self.always_loaded.add(name)
+                self.loaded_tools.add(name)
+            logger.debug(f"Registered tool: {name} (category: {category})")
+        self.version += 1
+        self.registry_version += 1
+
+        if not self.model or not tools:
+            return
+
+        pending = [
+            (
+                entry["name"],
+                self._embedding_text(
+                    entry["name"], entry["tool"].description, entry["keywords"]
+                ),
+                entry.get("category", "general"),
+            )
+            for entry in tools
+        ]
+        with self._index_lock:
+            if not self._semantic_ready:
+                self._pending_embeddings.extend(pending)
+                return
             try:
-                # Combine name, description, and keywords for rich context
-                text = f"{name}: {tool.description}. Keywords: {', '.join(keywords)}"
-                embedding = self.model.encode(text)
-                self.tool_embeddings[name] = embedding
+                self._index_embeddings(*map(list, zip(*pending, strict=True)))
             except Exception as e:
-                logger.error(f"Failed to compute embedding for {name}: {e}")
+                logger.error(
+                    f"Failed to compute embeddings for {len(tools)} tool(s): {e}"
+                )
+
+    def _cached_embeddings(
+        self, names: List[str]
+    ) -> List[Optional[np.ndarray]]:
+        return self.embedding_cache.get_many(
+            EMBEDDING_MODEL_NAME,
+            [self._embedding_texts.get(name, "") for name in names],
+        )
+
+    def _index_embeddings(
+        self, names: List[str], texts: List[str], categories: List[str]
+    ) -> None:
+        self._embedding_texts.update(zip(names, texts, strict=True))
+        embeddings = self.embedding_cache.get_many(EMBEDDING_MODEL_NAME, texts)
+        missing = [i for i, e in enumerate(embeddings) if e is None]
+
+        if missing:
+            assert self.model is not None
+            missing_texts = [texts[i] for i in missing]
+            encoded = np.atleast_2d(self.model.encode(missing_texts))
+            self.embedding_cache.put_many(
+                EMBEDDING_MODEL_NAME, missing_texts, encoded
+            )
+            for i, embedding in zip(missing, encoded, strict=True):
+                embeddings[i] = embedding
+            logger.info(f"🧠 Encoded {len(missing)} tool embedding(s)")
+
+        self.embedding_index.add_many(
+            names, np.vstack(cast(List[np.ndarray], embeddings)), categories
+        )
+
+    @staticmethod
+    def _embedding_text(
+        name: str, description: str, keywords: List[str]
+    ) -> str:
+        # Combine name, description, and keywords for rich context
+        return f"{name}: {description}. Keywords: {', '.join(keywords)}"
 
-        logger.debug(f"Registered tool: {name} (category: {category})")
+    @staticmethod
+    def _normalize_query(query: str) -> str:
+        return " ".join(query.lower().split())
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """Encode a normalized query, memoizing the embedding."""
+        embedding = self.query_embedding_cache.get(query)
+        if embedding is None:
+            assert self.model is not None
+            embedding = self.model.encode(query)
+            self.query_embedding_cache.put(query, embedding)
+        return embedding
 
     def search(
         self, query: str, category: Optional[str] = None, top_k: int = 3
     ) -> str:
-        matches = []
+        normalized_query = self._normalize_query(query)
+        cache_key = (
+            normalized_query,
+            category,
+            top_k,
+            self.registry_version,
+            self.search_mode,
+            self._semantic_ready,
+        )
+        results = self.search_results_cache.get(cache_key)
+        if results is None:
+            results = self._find_matches(normalized_query, category, top_k)
+            self.search_results_cache.put(cache_key, results)
 
-        if self.model and self.tool_embeddings:
-            try:
-                query_embedding = self.model.encode(query)
-
-                # Calculate cosine similarity for all tools
-                for name, meta in self.registry.items():
-                    # Skip if category filter doesn't match
-                    if category and meta["category"] != category:
-                        continue
-
-                    if name in self.tool_embeddings:
-                        tool_embedding = self.tool_embeddings[name]
-                        # Cosine similarity
-                        similarity = np.dot(
-                            query_embedding, tool_embedding
-                        ) / (
-                            np.linalg.norm(query_embedding)
-                            * np.linalg.norm(tool_embedding)
-                        )
-
-                        # Threshold for semantic match (0.3 is usually a good baseline for MiniLM)
-                        if similarity > 0.3:
-                            matches.append(
-                                {
-                                    "name": name,
-                                    "description": meta["description"],
-                                    "category": meta["category"],
-                                    "score": float(similarity),
-                                }
-                            )
-            except Exception as e:
-                logger.error(f"Semantic search failed: {e}")
-                # Fallback to keyword search will happen if matches is empty
+        return self._load_results(results)
+
+    def _find_matches(
+        self, query: str, category: Optional[str], top_k: int
+    ) -> List[Dict[str, Any]]:
+        semantic: List[Tuple[str, float]] = []
+        if self.search_mode != "keyword":
+            semantic = self._semantic_search(query, category, top_k)
 
-        # Fallback to keyword search if semantic search failed or returned no results
-        if not matches:
+        if self.search_mode == "hybrid":
+            keyword = self.keyword_index.search(query, category, top_k)
+            scored = self._fuse_rankings([semantic, keyword])[:top_k]
+        elif semantic:
+            scored = semantic
+        else:
+            # Keyword search if semantic search is off, failed or found nothing
             logger.info("Falling back to keyword search")
-            query_lower = query.lower()
-            query_words = [w for w in query_lower.split() if len(w) > 3]
+            scored = self.keyword_index.search(query, category, top_k)
 
-            for name, meta in self.registry.items():
-                if category and meta["category"] != category:
-                    continue
+        return [
+            {
+                "name": name,
+                "description": self.registry[name]["description"],
+                "category": self.registry[name]["category"],
+                "score": score,
+            }
+            for name, score in scored
+        ]
 
-                score = 0
-                for keyword in meta["keywords"]:
-                    if keyword.lower() in query_lower:
-                        score += 1.0
-
-                if query_words:
-                    if any(
-                        word in meta["description"].lower()
-                        for word in query_words
-                    ):
-                        score += 0.5
-
-                if score > 0:
-                    matches.append(
-                        {
-                            "name": name,
-                            "description": meta["description"],
-                            "category": meta["category"],
-                            "score": score,
-                        }
-                    )
+    def _semantic_search(
+        self, query: str, category: Optional[str], top_k: int
+    ) -> List[Tuple[str, float]]:
+        if not self._semantic_ready or not len(self.embedding_index):
+            return []
+        try:
+            query_embedding = self._encode_query(query)
+            with self._index_lock:
+                return self.embedding_index.search(
+                    query_embedding, category=category, top_k=top_k
+                )
+        except Exception as e:
+            logger.error(f"Semantic search failed: {e}")
+            return []
 
-        # Sort by score and limit results
-        matches.sort(key=lambda x: x["score"], reverse=True)
-        results = matches[:top_k]
+    @staticmethod
+    def _fuse_rankings(
+        rankings: List[List[Tuple[str, float]]],
+    ) -> List[Tuple[str, float]]:
+        """Reciprocal rank fusion: robust to the different score scales."""
+        fused: Dict[str, float] = {}
+        for ranking in rankings:
+            for rank, (name, _) in enumerate(ranking):
+                fused[name] = fused.get(name, 0.0) + 1.0 / (RRF_K + rank + 1)
+        return sorted(fused.items(), key=lambda item: item[1], reverse=True)
 
+    def _load_results(self, results: List[Dict[str, Any]]) -> str:
         # Auto-load all found tools
         tools_to_load = [m["name"] for m in results]
 
@@ -158,17 +814,29 @@ class ToolManager:
     def load_tools(self, tool_names: List[str]) -> None:
         """Load specific tools into active context."""
         for name in tool_names:
-            if name in self.registry:
+            if name in self.registry and name not in self.loaded_tools:
                 self.loaded_tools.add(name)
+                self.version += 1
                 logger.debug(f"Loaded tool: {name}")
 
     def unload_tools(self, tool_names: List[str]) -> None:
         """Unload tools from active context (except always_loaded)."""
         for name in tool_names:
-            if name not in self.always_loaded:
+            if name not in self.always_loaded and name in self.loaded_tools:
                 self.loaded_tools.discard(name)
+                self.version += 1
                 logger.debug(f"Unloaded tool: {name}")
 
+    def has_tool(self, name: str) -> bool:
+        return name in self.registry
+
+    def get_origin(self, name: str) -> str:
+        """Where a registered tool runs: "local" or an MCP server name."""
+        return self.registry[name].get("origin", "local")
+
+    def is_loaded(self, name: str) -> bool:
+        return name in self.loaded_tools and name in self.registry
+
     def get_active_tools(self) -> List[Tool]:
         """Get currently loaded tool definitions."""
         tools = []
@@ -204,13 +872,27 @@ class ToolManager:
     def clear_loaded_tools(self) -> None:
         """Clear all loaded tools except always_loaded ones."""
         self.loaded_tools = self.always_loaded.copy()
+        self.version += 1
         logger.info("Cleared loaded tools, keeping always-loaded tools")
 
-    def get_stats(self) -> Dict[str, int]:
+    def get_stats(self) -> Dict[str, Any]:
         """Get statistics about tool usage."""
         return {
             "total_registered": len(self.registry),
             "currently_loaded": len(self.loaded_tools),
             "always_loaded": len(self.always_loaded),
-            "semantic_search_enabled": self.model is not None,
+            "semantic_search_enabled": self._semantic_ready,
+            "search_mode": self.search_mode,
+            "embedding_cache": self.embedding_cache.get_stats(),
+            "query_embedding_cache": self.query_embedding_cache.get_stats(),
+            "search_results_cache": self.search_results_cache.get_stats(),
+            "embedding_index": {
+                "backend": type(self.embedding_index).__name__,
+                "precision": self.embedding_index.precision,
+                "vectors": len(self.embedding_index),
+                "memory_bytes": self.embedding_index.memory_bytes(),
+            },
+            "embedding_model_memory_bytes": (
+                self.model.memory_footprint() if self.model else 0
+            ),
         }
@@ -1,48 +1,104 @@
 import asyncio
+import concurrent.futures
+import functools
+import itertools
+import sys
+import uuid
+from dataclasses import dataclass
 import streamlit as st
-from typing import List, Optional, Callable, Dict, Any, Union
-from src.agent import ChatAgent
-from src.mcp_client import MCPServerClient
-from src.tools import greeting, greeting_tool
+from streamlit.runtime import Runtime
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_requests import (
+    ScriptRequestType,
+)
+from typing import List, Optional, Callable, Dict, Any, Iterable, Union
+from src.agent import AgentEvent, AgentEventType, ChatAgent
+from src.mcp_pool import MCPConnectionPool
 from src.config import MCPServerConfig
-from src.repositories import SessionStateUIRepository, StreamlitUIRepository
+from src.repositories import StreamlitUIRepository, create_repository
 from src.ui_tools import UIToolService
 from src.models import (
     UIPage,
-    ComponentType,
     LayoutComponent,
     LayoutType,
     UIComponent,
 )
 from src.async_utils import GlobalLoopContext
+from src.cache_utils import LRUCache
 import logging
 from src.component_strategies import ComponentStrategyFactory
 
 logger = logging.getLogger("ui")
 
 
+def _is_session_alive(session_id: str) -> bool:
+    try:
+        return Runtime.instance().is_active_session(session_id)
+    except RuntimeError:
+        # No Streamlit runtime (e.g. bare mode), keep the lease
+        return True
+
+
+def _script_interrupted() -> bool:
+    """True once the session ended or the running script must stop or rerun."""
+    ctx = get_script_run_ctx()
+    if ctx is None:
+        return False
+    if not _is_session_alive(ctx.session_id):
+        return True
+    # ScriptRequests has no public accessor for a pending stop or rerun, so
+    # its private state is read only while it exists. A streamlit version
+    # without it still cancels through the session check above.
+    state = getattr(ctx.script_requests, "_state", None)
+    return state is not None and state != ScriptRequestType.CONTINUE
+
+
+@st.cache_resource
+def get_connection_pool() -> MCPConnectionPool:
+    """MCP connection pool shared by every session of this process."""
+    logger.info("Initializing MCP connection pool")
+    return MCPConnectionPool()
+
+
 class SessionManager:
     """Manages Streamlit session state initialization."""
 
     @staticmethod
-    def initialize_state(agent_factory: Callable[[], ChatAgent]):
+    def initialize_state(
+        agent_factory: Callable[[], ChatAgent],
+        connection_pool: MCPConnectionPool,
+        repository_factory: Callable[
+            [], StreamlitUIRepository
+        ] = create_repository,
+    ):
         if "loop_context" not in st.session_state:
-            logger.info("Initializing GlobalLoopContext")
-            loop_context = GlobalLoopContext()
-            loop_context.start()
+            # One loop thread for all sessions; each session's work is
+            # tracked and cancelled, and its leases returned, when it ends
+            loop_context = GlobalLoopContext.shared()
+            loop_context.start_session_reaper(_is_session_alive)
+
+            ctx = get_script_run_ctx()
+            session_id = ctx.session_id if ctx else str(uuid.uuid4())
+            loop_context.add_session_cleanup(
+                session_id,
+                lambda: connection_pool.release_session(session_id),
+            )
+            st.session_state.session_id = session_id
             st.session_state.loop_context = loop_context
 
         if "agent" not in st.session_state:
             logger.info("Initializing ChatAgent")
             st.session_state.agent = agent_factory()
             st.session_state.mcp_connected = False
+            # Server name -> future of a connection still being set up
+            st.session_state.mcp_pending = {}
 
         if "messages" not in st.session_state:
             st.session_state.messages = []
 
         if "ui_repository" not in st.session_state:
             logger.info("Initializing UI Repository")
-            st.session_state.ui_repository = SessionStateUIRepository()
+            st.session_state.ui_repository = repository_factory()
 
 
 class SidebarManager:
@@ -51,53 +107,80 @@ class SidebarManager:
         agent: ChatAgent,
         mcp_configs: List[MCPServerConfig],
         loop_context: GlobalLoopContext,
+        connection_pool: MCPConnectionPool,
+        session_id: str,
+        startup_wait: float = 2.0,
     ):
         self.agent = agent
         self.mcp_configs = mcp_configs
         self.loop_context = loop_context
+        self.connection_pool = connection_pool
+        self.session_id = session_id
+        # How long the first run waits for servers before showing the chat
+        self.startup_wait = startup_wait
 
     def connect_servers(self):
+        """
+        Start connecting all enabled servers concurrently. Servers that are
+        not up within startup_wait keep connecting in the background and
+        are added by collect_connected_servers on a later run.
+        """
         if st.session_state.mcp_connected:
             return
 
         logger.info("Connecting to MCP servers...")
 
-        async def _connect():
-            results = []
-            for config in self.mcp_configs:
-                if self.mcp_configs is None:
-                    continue
+        async def _connect(config: MCPServerConfig):
+            logger.debug(f"Connecting to {config.name}...")
+            return await asyncio.wait_for(
+                self.connection_pool.lease(config, self.session_id),
+                config.connect_timeout,
+            )
 
-                if not config.enabled:
-                    continue
+        pending: Dict[str, concurrent.futures.Future] = (
+            st.session_state.mcp_pending
+        )
+        for config in self.mcp_configs or []:
+            if (
+                not config.enabled
+                or config.name in self.agent.mcp_servers
+                or config.name in pending
+            ):
+                continue
+            pending[config.name] = self.loop_context.submit(
+                _connect(config), self.session_id
+            )
 
-                if config.name in self.agent.mcp_servers:
-                    continue
+        st.session_state.mcp_connected = True
+        concurrent.futures.wait(pending.values(), timeout=self.startup_wait)
+        self.collect_connected_servers()
+
+    def collect_connected_servers(self):
+        """
+        Add servers whose connection finished since the last run and index
+        tools of servers whose tool list changed.
+        """
+        pending: Dict[str, concurrent.futures.Future] = (
+            st.session_state.mcp_pending
+        )
+        for name, future in list(pending.items()):
+            if not future.done():
+                continue
+            del pending[name]
 
-                try:
-                    logger.debug(f"Connecting to {config.name}...")
-                    client = MCPServerClient(
-                        name=config.name,
-                        command=config.command,
-                        args=config.args,
-                    )
-                    await client.connect()
-                    self.agent.add_mcp_server(config.name, client)
-                    results.append((config.name, True, None))
-                except Exception as exc:
-                    logger.error(f"Failed to connect to {config.name}: {exc}")
-                    results.append((config.name, False, str(exc)))
-            return results
-
-        results = self.loop_context.run_coroutine(_connect())
-
-        for name, success, error in results:
-            if success:
-                st.toast(f"Connected to MCP server '{name}'", icon="✅")
-            else:
+            try:
+                client = future.result()
+            except Exception as exc:
+                error = str(exc) or type(exc).__name__
+                logger.error(f"Failed to connect to {name}: {error}")
                 st.error(f"Failed to connect to '{name}': {error}")
+                continue
 
-        st.session_state.mcp_connected = True
+            # Added on the script thread, never while a turn is running
+            self.agent.add_mcp_server(name, client)
+            st.toast(f"Connected to MCP server '{name}'", icon="✅")
+
+        self.agent.index_mcp_tools()
 
     def render(self):
         with st.sidebar:
@@ -106,13 +189,13 @@ class SidebarManager:
                 if not self.mcp_configs:
                     return
                 for config in self.mcp_configs:
-
-                    status = (
-                        "Connected"
-                        if config.name in self.agent.mcp_servers
-                        else "Disabled/Disconnected"
-                    )
-                st.write(f"- **{config.name}**: {status}")
+                    if config.name in self.agent.mcp_servers:
+                        status = "Connected"
+                    elif config.name in st.session_state.mcp_pending:
+                        status = "Connecting..."
+                    else:
+                        status = "Disabled/Disconnected"
+                    st.write(f"- **{config.name}**: {status}")
 
 
 class MessageRenderer:
@@ -133,7 +216,7 @@ class MessageRenderer:
                             f"Called tool: {tool_meta['name']}",
                             state="complete",
                         ):
-                            st.write(f"Arguments: ")
+                            st.write("Arguments: ")
                             st.json(tool_meta["arguments"])
 
                         if "result" in tool_meta:
@@ -155,7 +238,7 @@ class MessageRenderer:
         with st.status(
             f"Calling tool: {tool_call.function.name}...", expanded=False
         ) as status:
-            st.write(f"Arguments:   ")
+            st.write("Arguments:   ")
             st.json(tool_call.function.arguments)
             status.update(
                 label=f"Called tool: {tool_call.function.name}",
@@ -178,6 +261,35 @@ class MessageRenderer:
         with st.expander(f"Result from {tool_call.function.name}"):
             st.code(result)
 
+    def render_stream(self, events: Iterable[AgentEvent]) -> str:
+        """
+        Render an agent event stream incrementally.
+        Consecutive text deltas are written with st.write_stream, tool events
+        go through the regular on_tool_call/on_tool_result callbacks.
+        """
+        response = ""
+        streamed_text = None
+        for is_text, group in itertools.groupby(
+            events, key=lambda e: e.type == AgentEventType.TEXT_DELTA
+        ):
+            if is_text:
+                streamed_text = st.write_stream(
+                    event.content for event in group
+                )
+                continue
+
+            for event in group:
+                if event.type == AgentEventType.TOOL_CALL:
+                    self.on_tool_call(event.tool_call)
+                elif event.type == AgentEventType.TOOL_RESULT:
+                    self.on_tool_result(event.tool_call, event.content)
+                elif event.type == AgentEventType.FINAL:
+                    response = event.content or ""
+                    # Errors and limits are reported without streaming
+                    if response != streamed_text:
+                        st.markdown(response)
+        return response
+
     def get_and_clear_tool_calls(self) -> List[Dict[str, Any]]:
         tool_calls = self.current_tool_calls.copy()
         self.current_tool_calls = []
@@ -191,92 +303,170 @@ class MessageRenderer:
         return origins[0]
 
 
+@dataclass
+class RenderStep:
+    """
+    One instruction of a compiled page.
+
+    "render" calls action(). "open" calls action(top), where top is the
+    value the innermost open step produced (None at the page level): its
+    result is pushed and, if it is a context manager (container, column),
+    entered. None skips everything up to the matching "close" at index
+    end. "close" pops (and exits) the innermost opened value.
+    """
+
+    op: str
+    # Unused by "close" steps
+    action: Callable[..., Any] = lambda *args: None
+    component: Optional[Union[UIComponent, LayoutComponent]] = None
+    end: int = -1
+
+
 class DynamicPageRenderer:
+    """
+    Renders a UIPage by compiling it once into a flat list of RenderSteps
+    (with data already parsed by the strategies) and replaying the list on
+    every rerun. Plans are cached per (page id, page version); versions
+    change on every edit, so a cached plan is never stale.
+
+    The cache lives in each session's state, since pages of different
+    sessions can share an id and version, and it is bounded by the
+    approximate size of the component data the plans hold.
+    """
+
+    max_plans = 32
+    max_plan_bytes = 32 * 1024 * 1024
+
     @staticmethod
-    def _render_component(
-        component: Union[UIComponent, LayoutComponent], depth: int = 0
-    ):
-        """Recursively render a component (content or layout)."""
+    def _plan_size(plan: List[RenderStep]) -> int:
+        # Parsed DataFrames are roughly proportional to their source data
+        return sum(
+            sys.getsizeof(step.component.data)
+            for step in plan
+            if isinstance(step.component, UIComponent)
+        )
 
-        try:
-            if isinstance(component, LayoutComponent):
-                if component.type == LayoutType.COLUMNS:
-                    spec = component.props.get(
-                        "spec", len(component.children) or 1
-                    )
-                    gap = component.props.get("gap", "small")
-                    vertical_alignment = component.props.get(
-                        "vertical_alignment", "top"
-                    )
-                    border = component.props.get("border", False)
+    @classmethod
+    def _plan_cache(cls) -> LRUCache[List[RenderStep]]:
+        if "ui_render_plans" not in st.session_state:
+            st.session_state.ui_render_plans = LRUCache(
+                max_entries=cls.max_plans,
+                max_bytes=cls.max_plan_bytes,
+                sizeof=cls._plan_size,
+            )
+        return st.session_state.ui_render_plans
+
+    @staticmethod
+    def _open(steps: List[RenderStep], action, component) -> RenderStep:
+        step = RenderStep("open", action, component)
+        steps.append(step)
+        return step
 
-                    cols = st.columns(
+    @staticmethod
+    def _close(steps: List[RenderStep], opened: RenderStep) -> None:
+        opened.end = len(steps)
+        steps.append(RenderStep("close", component=opened.component))
+
+    @staticmethod
+    def _compile_component(
+        component: Union[UIComponent, LayoutComponent],
+        steps: List[RenderStep],
+    ) -> None:
+        """Append the steps rendering a component (content or layout)."""
+        if isinstance(component, LayoutComponent):
+            if component.type == LayoutType.COLUMNS:
+                spec = component.props.get(
+                    "spec", len(component.children) or 1
+                )
+                gap = component.props.get("gap", "small")
+                vertical_alignment = component.props.get(
+                    "vertical_alignment", "top"
+                )
+                border = component.props.get("border", False)
+
+                columns = DynamicPageRenderer._open(
+                    steps,
+                    lambda _: st.columns(
                         spec,
                         gap=gap,
                         vertical_alignment=vertical_alignment,
                         border=border,
+                    ),
+                    component,
+                )
+                for idx, child in enumerate(component.children):
+                    # Children beyond the number of columns are not shown
+                    column = DynamicPageRenderer._open(
+                        steps,
+                        lambda cols, idx=idx: (
+                            cols[idx] if idx < len(cols) else None
+                        ),
+                        child,
                     )
+                    DynamicPageRenderer._compile_component(child, steps)
+                    DynamicPageRenderer._close(steps, column)
+                DynamicPageRenderer._close(steps, columns)
+                return
 
-                    for idx, child in enumerate(component.children):
-                        if idx < len(cols):
-                            with cols[idx]:
-                                DynamicPageRenderer._render_component(
-                                    child, depth + 1
-                                )
-                    return
-
-                if component.type == LayoutType.CONTAINER:
-                    border = component.props.get("border")
-                    height = component.props.get("height", "content")
-                    width = component.props.get("width", "stretch")
-                    horizontal = component.props.get("horizontal", False)
-                    gap = component.props.get("gap", "small")
+            if component.type == LayoutType.CONTAINER:
+                border = component.props.get("border")
+                height = component.props.get("height", "content")
+                width = component.props.get("width", "stretch")
+                horizontal = component.props.get("horizontal", False)
+                gap = component.props.get("gap", "small")
 
-                    with st.container(
+                container = DynamicPageRenderer._open(
+                    steps,
+                    lambda _: st.container(
                         border=border,
                         height=height,
                         width=width,
                         horizontal=horizontal,
                         gap=gap,
-                    ):
-                        # Render children inside container
-                        for child in component.children:
-                            DynamicPageRenderer._render_component(
-                                child, depth + 1
-                            )
-                    return
-
-                logger.warning(f"Unknown layout type: {component.type}")
-                st.warning(f"Unknown layout type: {component.type}")
+                    ),
+                    component,
+                )
+                # Render children inside container
+                for child in component.children:
+                    DynamicPageRenderer._compile_component(child, steps)
+                DynamicPageRenderer._close(steps, container)
                 return
 
-            strategy = ComponentStrategyFactory.get_strategy(component.type)
-            strategy.render(component)
+            logger.warning(f"Unknown layout type: {component.type}")
+            steps.append(
+                RenderStep(
+                    "render",
+                    lambda: st.warning(
+                        f"Unknown layout type: {component.type}"
+                    ),
+                    component,
+                )
+            )
+            return
 
-        except ValueError as e:
+        try:
+            strategy = ComponentStrategyFactory.get_strategy(component.type)
+            action = strategy.prepare(component)
+        except ValueError:
             logger.warning(f"Unknown component type: {component.type}")
-            st.warning(f"Unknown component type: {component.type}")
+            action = lambda: st.warning(
+                f"Unknown component type: {component.type}"
+            )
         except Exception as e:
             logger.error(
-                f"Error rendering component {component.id}: {e}", exc_info=True
+                f"Error preparing component {component.id}: {e}",
+                exc_info=True,
             )
-            st.error(f"Failed to render component: {e}")
-            if hasattr(component, "type"):
-                st.json(
-                    {
-                        "type": (
-                            component.type.value
-                            if hasattr(component.type, "value")
-                            else str(component.type)
-                        ),
-                        "id": component.id,
-                    }
-                )
+
+            def action(e=e):
+                raise e
+
+        steps.append(RenderStep("render", action, component))
 
     @staticmethod
-    def render_page(page: UIPage):
-        """Render a complete page with all its components."""
-        st.title(page.title)
+    def compile_page(page: UIPage) -> List[RenderStep]:
+        """Compile a page into the steps replayed by render_page."""
+        steps = [RenderStep("render", lambda: st.title(page.title))]
 
         # Build a tree structure: separate top-level components from nested ones
         top_level_components = [
@@ -286,7 +476,72 @@ class DynamicPageRenderer:
         ]
 
         for component in top_level_components:
-            DynamicPageRenderer._render_component(component)
+            DynamicPageRenderer._compile_component(component, steps)
+        return steps
+
+    @staticmethod
+    def _show_error(
+        component: Union[UIComponent, LayoutComponent], error: Exception
+    ):
+        logger.error(
+            f"Error rendering component {component.id}: {error}",
+            exc_info=error,
+        )
+        st.error(f"Failed to render component: {error}")
+        if hasattr(component, "type"):
+            st.json(
+                {
+                    "type": (
+                        component.type.value
+                        if hasattr(component.type, "value")
+                        else str(component.type)
+                    ),
+                    "id": component.id,
+                }
+            )
+
+    @staticmethod
+    def _replay(steps: List[RenderStep]) -> None:
+        # (opened value, whether it was entered as a context manager)
+        stack: List[tuple] = []
+        i = 0
+        while i < len(steps):
+            step = steps[i]
+            try:
+                if step.op == "render":
+                    step.action()
+                elif step.op == "open":
+                    value = step.action(stack[-1][0] if stack else None)
+                    if value is None:
+                        i = step.end + 1
+                        continue
+                    entered = hasattr(value, "__enter__")
+                    if entered:
+                        value.__enter__()
+                    stack.append((value, entered))
+                else:
+                    value, entered = stack.pop()
+                    if entered:
+                        value.__exit__(None, None, None)
+            except Exception as e:
+                if step.component is None:
+                    raise
+                DynamicPageRenderer._show_error(step.component, e)
+                if step.op == "open":
+                    # Skip the layout's children and its close step
+                    i = step.end
+            i += 1
+
+    @classmethod
+    def render_page(cls, page: UIPage):
+        """Render a complete page with all its components."""
+        plans = cls._plan_cache()
+        key = (page.id, page.version)
+        plan = plans.get(key)
+        if plan is None:
+            plan = cls.compile_page(page)
+            plans.put(key, plan)
+        cls._replay(plan)
 
 
 class ChatInterface:
@@ -296,17 +551,30 @@ class ChatInterface:
         self,
         mcp_configs: List[MCPServerConfig],
         agent_factory: Callable[[], ChatAgent],
+        streaming: bool = True,
+        connection_pool: Optional[MCPConnectionPool] = None,
+        repository_factory: Callable[
+            [], StreamlitUIRepository
+        ] = create_repository,
     ):
         self.mcp_configs = mcp_configs
         self.renderer = MessageRenderer()
         self.agent_factory = agent_factory
+        self.streaming = streaming
+        self.connection_pool = connection_pool or get_connection_pool()
 
-        SessionManager.initialize_state(self.agent_factory)
+        SessionManager.initialize_state(
+            self.agent_factory, self.connection_pool, repository_factory
+        )
 
         self.agent: ChatAgent = st.session_state.agent
         self.loop_context: GlobalLoopContext = st.session_state.loop_context
         self.sidebar = SidebarManager(
-            self.agent, self.mcp_configs, self.loop_context
+            self.agent,
+            self.mcp_configs,
+            self.loop_context,
+            self.connection_pool,
+            st.session_state.session_id,
         )
         self.ui_repository: StreamlitUIRepository = (
             st.session_state.ui_repository
@@ -316,8 +584,7 @@ class ChatInterface:
         self.sidebar.connect_servers()
 
         if self.agent.tool_manager:
-            stats = self.agent.tool_manager.get_stats()
-            if stats["total_registered"] > 1:  # More than just search_tools
+            if self.agent.tool_manager.has_tool("create_page"):
                 return
         else:
             tool_names = [t.name for t in self.agent.tools]
@@ -335,20 +602,35 @@ class ChatInterface:
             "update_page": ui_service.update_page,
             "update_component": ui_service.update_component,
             "update_layout": ui_service.update_layout,
+            "move_component": ui_service.move_component,
+            "delete_component": ui_service.delete_component,
+            "build_page": ui_service.build_page,
         }
 
-        for tool in ui_service.get_tools():
-            metadata = tool_metadata.get(tool.name, {})
-            self.agent.add_tool_definition(
-                tool,
-                keywords=metadata.get("keywords", [tool.name]),
-                category=metadata.get("category", "general"),
-                always_load=False,  # Don't load UI tools by default
-            )
+        tools = ui_service.get_tools()
+        self.agent.add_tool_definitions(
+            [
+                {
+                    "tool": tool,
+                    "keywords": tool_metadata.get(tool.name, {}).get(
+                        "keywords", [tool.name]
+                    ),
+                    "category": tool_metadata.get(tool.name, {}).get(
+                        "category", "general"
+                    ),
+                    "always_load": False,  # Don't load UI tools by default
+                }
+                for tool in tools
+            ]
+        )
 
+        for tool in tools:
             if tool.name in tool_function_map:
+                # UI tools mutate page state in call order
                 self.agent.add_tool_function(
-                    tool.name, tool_function_map[tool.name]
+                    tool.name,
+                    tool_function_map[tool.name],
+                    parallel_safe=False,
                 )
 
         logger.info(
@@ -358,20 +640,41 @@ class ChatInterface:
     def _process_user_message(self, prompt: str) -> None:
         message_placeholder = st.empty()
 
+        # Background work is cancelled when the user stops or reruns the
+        # script; the agent's turn_timeout bounds the rest
+        tool_executor = functools.partial(
+            self.loop_context.run_coroutine,
+            timeout=self.agent.turn_timeout,
+            is_cancelled=_script_interrupted,
+            session_id=st.session_state.session_id,
+        )
+
         initial_page_count = len(self.ui_repository.get_all_pages())
 
         try:
-            response = self.agent.process_message(
-                prompt,
-                user_choice_callback=self.renderer.user_choice_callback,
-                on_tool_call=self.renderer.on_tool_call,
-                on_tool_result=self.renderer.on_tool_result,
-                tool_executor=self.loop_context.run_coroutine,
-            )
-            message_placeholder.markdown(response)
+            if self.streaming:
+                response = self.renderer.render_stream(
+                    self.agent.stream_message(
+                        prompt,
+                        user_choice_callback=self.renderer.user_choice_callback,
+                        tool_executor=tool_executor,
+                    )
+                )
+            else:
+                response = self.agent.process_message(
+                    prompt,
+                    user_choice_callback=self.renderer.user_choice_callback,
+                    on_tool_call=self.renderer.on_tool_call,
+                    on_tool_result=self.renderer.on_tool_result,
+                    tool_executor=tool_executor,
+                )
+                message_placeholder.markdown(response)
 
             tool_calls_metadata = self.renderer.get_and_clear_tool_calls()
-            assistant_message = {"role": "assistant", "content": response}
+            assistant_message: Dict[str, Any] = {
+                "role": "assistant",
+                "content": response,
+            }
             if tool_calls_metadata:
                 assistant_message["tool_calls_metadata"] = tool_calls_metadata
 
@@ -391,6 +694,8 @@ class ChatInterface:
     def run(self):
         if not st.session_state.mcp_connected:
             self.initialize()
+        else:
+            self.sidebar.collect_connected_servers()
 
         self.sidebar.render()
         self.renderer.render_history(st.session_state.messages)
@@ -1,5 +1,5 @@
 import uuid
-from typing import Any, Dict, Optional, List, Union
+from typing import Any, Dict, Optional, List
 from src.tool_models import Tool
 from src.models import (
     ComponentType,
@@ -7,6 +7,7 @@ from src.models import (
     LayoutType,
     LayoutComponent,
     AnyComponent,
+    PageOperation,
 )
 from src.repositories import StreamlitUIRepository
 import logging
@@ -190,6 +191,155 @@ class UIToolService:
             logger.error(f"❌ Failed to update layout: {e}", exc_info=True)
             return f"Failed to update layout: {e}"
 
+    def move_component(
+        self,
+        page_id: str,
+        component_id: str,
+        parent_id: Optional[str] = None,
+        position: Optional[int] = None,
+        **kwargs,
+    ) -> str:
+        """Move a component or layout to another layout or the page level."""
+        if kwargs:
+            logger.warning(
+                f"Ignored unexpected arguments in move_component: {kwargs}"
+            )
+        logger.info(
+            f"Moving component: component_id={component_id}, page_id={page_id}, parent_id={parent_id}"
+        )
+        try:
+            self.repository.move_component(
+                page_id, component_id, parent_id, position
+            )
+            logger.info(f"✅ Component moved successfully: {component_id}")
+            return f"Component {component_id} moved successfully."
+        except Exception as e:
+            logger.error(f"❌ Failed to move component: {e}", exc_info=True)
+            return f"Failed to move component: {e}"
+
+    def delete_component(
+        self, page_id: str, component_id: str, **kwargs
+    ) -> str:
+        """Delete a component, or a layout with everything inside it."""
+        if kwargs:
+            logger.warning(
+                f"Ignored unexpected arguments in delete_component: {kwargs}"
+            )
+        logger.info(
+            f"Deleting component: component_id={component_id}, page_id={page_id}"
+        )
+        try:
+            self.repository.delete_component(page_id, component_id)
+            logger.info(f"✅ Component deleted successfully: {component_id}")
+            return f"Component {component_id} deleted successfully."
+        except Exception as e:
+            logger.error(f"❌ Failed to delete component: {e}", exc_info=True)
+            return f"Failed to delete component: {e}"
+
+    def build_page(
+        self,
+        title: str,
+        components: List[Dict[str, Any]],
+        icon: Optional[str] = None,
+        **kwargs,
+    ) -> str:
+        """
+        Creates a page with a whole component tree in one call. Nothing is
+        added unless every component is valid.
+        """
+        if kwargs:
+            logger.warning(
+                f"Ignored unexpected arguments in build_page: {kwargs}"
+            )
+        logger.info(
+            f"Building page: title='{title}', {len(components)} top-level components"
+        )
+
+        created: List[str] = []
+        try:
+            tree = [
+                self._build_component(spec, None, created, 0)
+                for spec in components
+            ]
+        except ValueError as e:
+            logger.error(f"Invalid page spec: {e}")
+            return f"Failed to build page: {e}"
+
+        page_id = str(uuid.uuid4())
+        try:
+            self.repository.create_page(page_id, title, icon)
+            try:
+                self.repository.apply_operations(
+                    page_id,
+                    [
+                        PageOperation(op="add_component", component=component)
+                        for component in tree
+                    ],
+                )
+            except Exception:
+                # Creating the page is a separate write; don't leave it
+                # behind empty
+                self.repository.delete_page(page_id)
+                raise
+            logger.info(
+                f"✅ Page built successfully: {page_id} with {len(created)} components"
+            )
+            return (
+                f"Page built successfully. ID: {page_id}, Title: {title}\n"
+                "Components (ID: type):\n" + "\n".join(created)
+            )
+        except Exception as e:
+            logger.error(f"❌ Failed to build page: {e}", exc_info=True)
+            return f"Failed to build page: {e}"
+
+    def _build_component(
+        self,
+        spec: Dict[str, Any],
+        parent_id: Optional[str],
+        created: List[str],
+        depth: int,
+    ) -> AnyComponent:
+        """Turn one build_page spec (and its children) into components."""
+        type_name = str(spec.get("type", "")).lower()
+        component_id = str(uuid.uuid4())
+        props = spec.get("props") or {}
+
+        if type_name in [t.value for t in LayoutType]:
+            created.append(f"{'  ' * depth}{component_id}: {type_name}")
+            layout = LayoutComponent(
+                id=component_id,
+                type=LayoutType(type_name),
+                props=props,
+                parent_id=parent_id,
+            )
+            layout.children = [
+                self._build_component(child, component_id, created, depth + 1)
+                for child in spec.get("children") or []
+            ]
+            return layout
+
+        try:
+            component_type = ComponentType(type_name)
+        except ValueError:
+            raise ValueError(
+                f"Invalid component type: {spec.get('type')}. Valid types are: {[t.value for t in ComponentType] + [t.value for t in LayoutType]}"
+            ) from None
+        if spec.get("children"):
+            raise ValueError(
+                f"Only layouts can have children, not '{type_name}'."
+            )
+        if "data" not in spec:
+            raise ValueError(f"Component of type '{type_name}' needs data.")
+
+        created.append(f"{'  ' * depth}{component_id}: {type_name}")
+        return UIComponent(
+            id=component_id,
+            type=component_type,
+            data=spec["data"],
+            props=props,
+            parent_id=parent_id,
+        )
+
     def get_tools(self) -> list[Tool]:
         return [
             Tool(
@@ -272,6 +422,57 @@ class UIToolService:
                 },
                 strict=True,
             ),
+            Tool(
+                name="build_page",
+                description="Create a page together with all of its components and layouts in one call. Prefer this over create_page plus many add_component calls when building a whole page or dashboard. Returns the page ID and the IDs of every component.",
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "title": {
+                            "type": "string",
+                            "description": "Title of the page",
+                        },
+                        "icon": {
+                            "type": "string",
+                            "description": "Icon for the page (emoji)",
+                        },
+                        "components": {
+                            "type": "array",
+                            "description": "Top-level components of the page, in order",
+                            "items": {"$ref": "#/$defs/component"},
+                        },
+                    },
+                    "required": ["title", "components"],
+                    "additionalProperties": False,
+                    "$defs": {
+                        "component": {
+                            "type": "object",
+                            "properties": {
+                                "type": {
+                                    "type": "string",
+                                    "description": f"Component type {[t.value for t in ComponentType]} or layout type {[t.value for t in LayoutType]}",
+                                },
+                                "data": {
+                                    "type": "string",
+                                    "description": 'Content/Data for components (not layouts). For dataframe/charts, use JSON format: {"columns": [...], "data": [[...], [...]]}',
+                                },
+                                "props": {
+                                    "type": "object",
+                                    "description": "Component or layout properties, as in add_component and create_layout",
+                                },
+                                "children": {
+                                    "type": "array",
+                                    "description": "Nested components, for layouts only",
+                                    "items": {"$ref": "#/$defs/component"},
+                                },
+                            },
+                            "required": ["type"],
+                            "additionalProperties": False,
+                        }
+                    },
+                },
+                strict=True,
+            ),
             Tool(
                 name="update_page",
                 description="Update a page's title or icon.",
@@ -348,6 +549,54 @@ class UIToolService:
                 },
                 strict=True,
             ),
+            Tool(
+                name="move_component",
+                description="Move a component or layout (with its children) into another layout, or to the top level of the page when parent_id is omitted.",
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "page_id": {
+                            "type": "string",
+                            "description": "ID of the page containing the component",
+                        },
+                        "component_id": {
+                            "type": "string",
+                            "description": "ID of the component or layout to move",
+                        },
+                        "parent_id": {
+                            "type": "string",
+                            "description": "ID of the target layout (optional, omit for the page level)",
+                        },
+                        "position": {
+                            "type": "integer",
+                            "description": "Index among the target's children (optional, appended by default)",
+                        },
+                    },
+                    "required": ["page_id", "component_id"],
+                    "additionalProperties": False,
+                },
+                strict=True,
+            ),
+            Tool(
+                name="delete_component",
+                description="Delete a component from a page. Deleting a layout also deletes everything inside it.",
+                parameters={
+                    "type": "object",
+                    "properties": {
+                        "page_id": {
+                            "type": "string",
+                            "description": "ID of the page containing the component",
+                        },
+                        "component_id": {
+                            "type": "string",
+                            "description": "ID of the component or layout to delete",
+                        },
+                    },
+                    "required": ["page_id", "component_id"],
+                    "additionalProperties": False,
+                },
+                strict=True,
+            ),
         ]
 
     def get_tool_metadata(self) -> Dict[str, Dict[str, Any]]:
@@ -378,6 +627,17 @@ class UIToolService:
                 ],
                 "category": "ui_management",
             },
+            "build_page": {
+                "keywords": [
+                    "build",
+                    "create",
+                    "page",
+                    "dashboard",
+                    "layout",
+                    "components",
+                ],
+                "category": "ui_management",
+            },
             "update_page": {
                 "keywords": [
                     "update",
@@ -409,4 +669,23 @@ class UIToolService:
                 ],
                 "category": "ui_management",
             },
+            "move_component": {
+                "keywords": [
+                    "move",
+                    "reorder",
+                    "rearrange",
+                    "component",
+                    "layout",
+                ],
+                "category": "ui_management",
+            },
+            "delete_component": {
+                "keywords": [
+                    "delete",
+                    "remove",
+                    "component",
+                    "layout",
+                ],
+                "category": "ui_management",
+            },
         }
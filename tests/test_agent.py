@@ -0,0 +1,398 @@
+import asyncio
+import concurrent.futures
+import json
+import threading
+import time
+from types import SimpleNamespace
+
+import litellm
+import pytest
+
+import src.tool_manager as tool_manager
+from src.agent import AgentEventType, AsyncChatAgent, ChatAgent
+from src.async_utils import GlobalLoopContext
+from src.tool_models import Tool
+
+
+def tool_call(index, name, **arguments):
+    return SimpleNamespace(
+        id=f"call-{index}",
+        function=SimpleNamespace(name=name, arguments=json.dumps(arguments)),
+    )
+
+
+def response(content, tool_calls=None):
+    message = SimpleNamespace(content=content, tool_calls=tool_calls)
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=message)], usage=None
+    )
+
+
+@pytest.fixture
+def script_completions(monkeypatch):
+    """Replace litellm with a fake answering from a list of responses."""
+
+    def install(responses):
+        remaining = iter(responses)
+
+        def chunks(completion):
+            content = completion.choices[0].message.content
+            if content:
+                delta = SimpleNamespace(content=content)
+                yield SimpleNamespace(choices=[SimpleNamespace(delta=delta)])
+            yield SimpleNamespace(choices=[], completion=completion)
+
+        def completion(stream=False, **kwargs):
+            if stream:
+                return chunks(next(remaining))
+            return next(remaining)
+
+        async def acompletion(stream=False, **kwargs):
+            if not stream:
+                return next(remaining)
+
+            async def stream_chunks():
+                for chunk in chunks(next(remaining)):
+                    yield chunk
+
+            return stream_chunks()
+
+        def stream_chunk_builder(chunks, messages=None):
+            return chunks[-1].completion
+
+        monkeypatch.setattr(litellm, "completion", completion)
+        monkeypatch.setattr(litellm, "acompletion", acompletion)
+        monkeypatch.setattr(
+            litellm, "stream_chunk_builder", stream_chunk_builder
+        )
+
+    return install
+
+
+@pytest.fixture
+def loop_context():
+    context = GlobalLoopContext()
+    context.start()
+    yield context
+    context.stop()
+
+
+class FakeMCPClient:
+    def __init__(self, tools):
+        self.tools = [
+            {
+                "type": "function",
+                "function": {"name": name, "parameters": {}},
+            }
+            for name in tools
+        ]
+        self.tools_version = 1
+
+    async def call_tool(self, name, arguments):
+        await asyncio.sleep(0.05)
+        return f"mcp {name}"
+
+
+def register(agent, name, func, parallel_safe=True):
+    agent.add_tool_definition(
+        Tool(name=name, description=name, parameters={}, strict=True)
+    )
+    agent.add_tool_function(name, func, parallel_safe=parallel_safe)
+
+
+@pytest.mark.parametrize("agent_class", [ChatAgent, AsyncChatAgent])
+def test_parallel_tool_calls_keep_call_order(
+    agent_class, script_completions, loop_context
+):
+    agent = agent_class(parallel_tool_calls=True)
+
+    def slow(value):
+        time.sleep(0.2)
+        return f"slow {value}"
+
+    register(agent, "slow", slow)
+    register(agent, "fast", lambda value: f"fast {value}")
+    script_completions(
+        [
+            response(
+                "",
+                [
+                    tool_call(1, "slow", value="a"),
+                    tool_call(2, "fast", value="b"),
+                    tool_call(3, "slow", value="c"),
+                    tool_call(4, "missing"),
+                ],
+            ),
+            response("done"),
+        ]
+    )
+
+    started = time.monotonic()
+    answer = agent.process_message(
+        "go", tool_executor=loop_context.run_coroutine
+    )
+
+    assert answer == "done"
+    assert time.monotonic() - started < 0.35  # the slow calls overlapped
+    results = [m["content"] for m in agent.messages if m["role"] == "tool"]
+    assert results[:3] == ["slow a", "fast b", "slow c"]
+    assert "not found" in results[3]
+
+
+def test_sequential_tools_and_choice_run_on_the_calling_thread(
+    script_completions, loop_context
+):
+    agent = AsyncChatAgent(parallel_tool_calls=True)
+    threads = {}
+
+    def record(value):
+        threads.setdefault("tools", []).append((value, threading.get_ident()))
+        return value
+
+    def choose(name, origins):
+        threads["choice"] = threading.get_ident()
+        return origins[-1]
+
+    register(agent, "ui", record, parallel_safe=False)
+    register(agent, "shared", lambda: "local shared")
+    agent.add_mcp_server("server", FakeMCPClient(["shared"]))
+    script_completions(
+        [
+            response(
+                "",
+                [
+                    tool_call(1, "ui", value="first"),
+                    tool_call(2, "shared"),
+                    tool_call(3, "ui", value="second"),
+                ],
+            ),
+            response("", [tool_call(4, "ui", value="third")]),
+            response("done"),
+        ]
+    )
+
+    events = list(
+        agent.stream_message(
+            "go",
+            user_choice_callback=choose,
+            tool_executor=loop_context.run_coroutine,
+        )
+    )
+
+    caller = threading.get_ident()
+    assert threads["choice"] == caller
+    assert threads["tools"] == [
+        ("first", caller),
+        ("second", caller),
+        ("third", caller),
+    ]
+    results = [
+        event.content
+        for event in events
+        if event.type == AgentEventType.TOOL_RESULT
+    ]
+    assert results == ["first", "mcp shared", "second", "third"]
+    assert events[-1].content == "done"
+
+
+def test_sequential_tool_errors_reach_the_llm(
+    script_completions, loop_context
+):
+    agent = AsyncChatAgent()
+
+    def broken():
+        raise RuntimeError("boom")
+
+    register(agent, "broken", broken, parallel_safe=False)
+    script_completions([response("", [tool_call(1, "broken")])])
+
+    answer = agent.process_message(
+        "go", tool_executor=loop_context.run_coroutine
+    )
+    assert "boom" in answer
+    assert agent.messages[-1]["role"] == "tool"
+
+
+def test_awaited_turn_runs_sequential_tools_on_the_loop(script_completions):
+    agent = AsyncChatAgent()
+    register(agent, "ui", lambda: "ran", parallel_safe=False)
+    script_completions([response("", [tool_call(1, "ui")]), response("done")])
+
+    assert asyncio.run(agent.aprocess_message("go")) == "done"
+    assert agent.messages[-2]["content"] == "ran"
+
+
+def test_awaited_turn_builds_the_tool_catalog_off_the_loop(
+    script_completions,
+):
+    agent = AsyncChatAgent()
+    build_catalog = agent.get_tool_catalog
+    threads = []
+
+    def record():
+        threads.append(threading.get_ident())
+        return build_catalog()
+
+    agent.get_tool_catalog = record
+    script_completions([response("done")])
+
+    async def turn():
+        return await agent.aprocess_message("go"), threading.get_ident()
+
+    answer, loop_thread = asyncio.run(turn())
+    assert answer == "done"
+    assert threads and loop_thread not in threads
+
+
+def test_tool_thread_pool_is_reused_across_turns(
+    script_completions, loop_context
+):
+    agent = ChatAgent(parallel_tool_calls=True)
+    workers = set()
+
+    def record():
+        workers.add(threading.current_thread().name)
+        time.sleep(0.01)
+        return "ok"
+
+    register(agent, "record", record)
+    script_completions(
+        [
+            response("", [tool_call(1, "record"), tool_call(2, "record")]),
+            response("", [tool_call(3, "record"), tool_call(4, "record")]),
+            response("done"),
+        ]
+    )
+    agent.process_message("go", tool_executor=loop_context.run_coroutine)
+
+    pool = agent._tool_pool
+    assert pool is not None
+    assert all(name.startswith("agent-tool") for name in workers)
+    assert len(workers) <= agent.max_tool_workers
+
+    script_completions(
+        [
+            response("", [tool_call(5, "record"), tool_call(6, "record")]),
+            response("done"),
+        ]
+    )
+    agent.process_message("again", tool_executor=loop_context.run_coroutine)
+    assert agent._tool_pool is pool
+
+
+def test_parallel_tool_calls_stop_waiting_at_the_turn_deadline(
+    script_completions, loop_context
+):
+    agent = ChatAgent(parallel_tool_calls=True, turn_timeout=0.3)
+    release = threading.Event()
+    register(agent, "stuck", lambda: release.wait(5) and "late")
+    register(agent, "fast", lambda: "fast")
+    script_completions(
+        [response("", [tool_call(1, "stuck"), tool_call(2, "fast")])]
+    )
+
+    started = time.monotonic()
+    answer = agent.process_message(
+        "go", tool_executor=loop_context.run_coroutine
+    )
+    release.set()
+
+    assert time.monotonic() - started < 1.0
+    assert "deadline" in answer
+    results = [m["content"] for m in agent.messages if m["role"] == "tool"]
+    assert len(results) == 2
+    assert all("deadline" in result for result in results)
+
+
+def test_cancelled_tool_executor_ends_parallel_calls_early(
+    script_completions,
+):
+    agent = ChatAgent(parallel_tool_calls=True)
+    release = threading.Event()
+    register(agent, "stuck", lambda: release.wait(5) and "late")
+    agent.add_mcp_server("server", FakeMCPClient(["browse"]))
+    script_completions(
+        [response("", [tool_call(1, "stuck"), tool_call(2, "browse")])]
+    )
+
+    def cancelled_executor(coro):
+        coro.close()
+        raise concurrent.futures.CancelledError("stopped by the user")
+
+    started = time.monotonic()
+    answer = agent.process_message("go", tool_executor=cancelled_executor)
+    release.set()
+
+    assert time.monotonic() - started < 1.0
+    assert "stopped by the user" in answer
+    assert agent.messages[-1]["role"] == "tool"
+
+
+@pytest.mark.parametrize("agent_class", [ChatAgent, AsyncChatAgent])
+def test_stream_message_yields_deltas_tool_events_and_final(
+    agent_class, script_completions, loop_context
+):
+    agent = agent_class()
+    register(agent, "echo", lambda value: value)
+    script_completions(
+        [
+            response("Let me check.", [tool_call(1, "echo", value="hi")]),
+            response("All done."),
+        ]
+    )
+
+    events = list(
+        agent.stream_message("go", tool_executor=loop_context.run_coroutine)
+    )
+
+    assert [event.type for event in events] == [
+        AgentEventType.TEXT_DELTA,
+        AgentEventType.TOOL_CALL,
+        AgentEventType.TOOL_RESULT,
+        AgentEventType.TEXT_DELTA,
+        AgentEventType.FINAL,
+    ]
+    assert events[2].content == "hi"
+    assert events[-1].content == "All done."
+    assert agent.messages[-1] == {"role": "assistant", "content": "All done."}
+
+
+def test_tool_catalog_is_rebuilt_only_when_tools_change():
+    agent = ChatAgent()
+    register(agent, "echo", lambda value: value)
+
+    catalog = agent.get_tool_catalog()
+    assert agent.get_tool_catalog() is catalog
+    assert [s["function"]["name"] for s in catalog.payload] == ["echo"]
+    assert "origin" not in catalog.payload[0]
+
+    client = FakeMCPClient(["browse"])
+    agent.add_mcp_server("web", client)
+    catalog = agent.get_tool_catalog()
+    assert catalog.origins == {"echo": ["local"], "browse": ["web"]}
+
+    client.tools = client.tools + FakeMCPClient(["click"]).tools
+    client.tools_version += 1
+    assert "click" in agent.get_tool_catalog().origins
+
+
+def test_mcp_tools_are_indexed_and_sent_once_loaded(monkeypatch):
+    monkeypatch.setattr(tool_manager, "SENTENCE_TRANSFORMERS_AVAILABLE", False)
+    agent = ChatAgent(use_tool_manager=True)
+    client = FakeMCPClient(["browse_page"])
+    agent.add_mcp_server("web", client)
+    assert agent.tool_manager.has_tool("browse_page")
+
+    assert list(agent.get_tool_catalog().origins) == ["search_tools"]
+
+    agent.tool_manager.search("browse page")
+    assert agent.get_tool_catalog().origins["browse_page"] == ["web"]
+
+    # A changed tool list is indexed on the next script run, not in a turn
+    client.tools = client.tools + FakeMCPClient(["take_screenshot"]).tools
+    client.tools_version += 1
+    agent.get_tool_catalog()
+    assert not agent.tool_manager.has_tool("take_screenshot")
+    agent.index_mcp_tools()
+    assert agent.tool_manager.has_tool("take_screenshot")
+    assert agent.tool_manager.get_origin("take_screenshot") == "web"
@@ -0,0 +1,86 @@
+import asyncio
+import concurrent.futures
+import threading
+
+import pytest
+
+from src.async_utils import GlobalLoopContext
+
+
+@pytest.fixture
+def loop_context():
+    context = GlobalLoopContext(poll_interval=0.02)
+    context.start()
+    yield context
+    context.stop()
+
+
+def test_run_coroutine_returns_result(loop_context):
+    async def answer():
+        await asyncio.sleep(0.01)
+        return 42
+
+    assert loop_context.run_coroutine(answer()) == 42
+
+
+def test_timeout_cancels_the_coroutine(loop_context):
+    cancelled = threading.Event()
+
+    async def forever():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(TimeoutError):
+        loop_context.run_coroutine(forever(), timeout=0.1)
+    assert cancelled.wait(1.0)
+
+
+def test_is_cancelled_stops_the_wait(loop_context):
+    cancelled = threading.Event()
+    polls = []
+
+    async def forever():
+        try:
+            await asyncio.sleep(60)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    def is_cancelled():
+        polls.append(1)
+        return len(polls) >= 3
+
+    with pytest.raises(concurrent.futures.CancelledError):
+        loop_context.run_coroutine(forever(), is_cancelled=is_cancelled)
+    assert cancelled.wait(1.0)
+
+
+def test_timeout_raised_by_the_coroutine_propagates(loop_context):
+    async def fails():
+        raise TimeoutError("inner")
+
+    with pytest.raises(TimeoutError, match="inner"):
+        loop_context.run_coroutine(fails(), timeout=5)
+
+
+def test_end_session_cancels_work_and_runs_cleanups(loop_context):
+    cleaned = threading.Event()
+
+    async def forever():
+        await asyncio.sleep(60)
+
+    async def cleanup():
+        cleaned.set()
+
+    loop_context.add_session_cleanup("s", cleanup)
+    future = loop_context.submit(forever(), session_id="s")
+    assert loop_context.get_stats() == {"sessions": 1, "pending_tasks": 1}
+
+    loop_context.end_session("s")
+    assert cleaned.wait(1.0)
+    with pytest.raises(concurrent.futures.CancelledError):
+        future.result(timeout=1.0)
+    assert loop_context.get_stats() == {"sessions": 0, "pending_tasks": 0}
@@ -0,0 +1,43 @@
+import numpy as np
+
+from src.cache_utils import LRUCache
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = LRUCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    assert cache.get_stats()["hits"] == 3
+    assert cache.get_stats()["misses"] == 1
+
+
+def test_entries_are_bounded_by_bytes():
+    cache = LRUCache(max_entries=100, max_bytes=1000)
+    for key in range(5):
+        cache.put(key, np.zeros(50, dtype=np.float32))  # 200 bytes
+
+    cache.put("big", np.zeros(100, dtype=np.float32))  # 400 bytes
+    stats = cache.get_stats()
+    assert stats["bytes"] <= 1000
+    assert cache.get(0) is None and cache.get(1) is None
+    assert cache.get("big") is not None
+
+
+def test_value_larger_than_the_budget_is_not_stored():
+    cache = LRUCache(max_bytes=10, sizeof=len)
+    cache.put("a", "short")
+    cache.put("a", "much too long")
+    assert cache.get("a") is None
+    assert cache.get_stats()["bytes"] == 0
+
+
+def test_clear():
+    cache = LRUCache()
+    cache.put("a", 1)
+    cache.clear()
+    assert len(cache) == 0 and cache.get("a") is None
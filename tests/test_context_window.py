@@ -0,0 +1,118 @@
+import pytest
+
+from src.context_window import SUMMARY_PREFIX, ContextWindowManager
+
+
+def conversation(turns, tool_result="result"):
+    messages = [{"role": "system", "content": "system prompt"}]
+    for turn in range(turns):
+        messages += [
+            {"role": "user", "content": f"question {turn}"},
+            {
+                "role": "assistant",
+                "content": None,
+                "tool_calls": [{"id": f"call-{turn}"}],
+            },
+            {
+                "role": "tool",
+                "tool_call_id": f"call-{turn}",
+                "content": tool_result,
+            },
+            {"role": "assistant", "content": f"answer {turn}"},
+        ]
+    return messages
+
+
+@pytest.fixture
+def counted(monkeypatch):
+    """Every message costs 10 tokens; records which ones were counted."""
+    calls = []
+
+    def count_tokens(self, message):
+        calls.append(message)
+        return 10
+
+    monkeypatch.setattr(ContextWindowManager, "count_tokens", count_tokens)
+    return calls
+
+
+def test_history_within_budget_is_untouched(counted):
+    manager = ContextWindowManager(max_prompt_tokens=1000)
+    messages = conversation(3)
+    before = list(messages)
+    manager.fit(messages)
+    assert messages == before
+
+
+def test_token_counts_are_reused_for_unchanged_messages(counted):
+    manager = ContextWindowManager()
+    messages = conversation(2)
+    manager.total_tokens(messages)
+    counted.clear()
+
+    messages.append({"role": "user", "content": "new"})
+    assert manager.total_tokens(messages) == 10 * len(messages)
+    assert counted == [messages[-1]]
+
+
+def test_oldest_turns_are_dropped_and_recent_ones_kept(counted):
+    manager = ContextWindowManager(max_prompt_tokens=100, keep_recent_turns=2)
+    messages = conversation(5)  # 1 + 5 * 4 messages = 210 tokens
+
+    manager.fit(messages)
+
+    assert messages[0]["content"] == "system prompt"
+    assert manager.total_tokens(messages) <= 100
+    users = [m["content"] for m in messages if m["role"] == "user"]
+    assert users == ["question 3", "question 4"]
+
+
+def test_dropped_turns_are_summarized(counted):
+    summarized = []
+
+    def summarizer(messages):
+        summarized.append(messages)
+        return "earlier stuff"
+
+    manager = ContextWindowManager(
+        max_prompt_tokens=100, summarize=True, summarizer=summarizer
+    )
+    messages = conversation(5)
+    manager.fit(messages)
+
+    assert messages[1] == {
+        "role": "system",
+        "content": SUMMARY_PREFIX + "earlier stuff",
+    }
+    assert summarized[0][0]["content"] == "question 0"
+
+    # A later compaction folds the previous summary into the new one
+    messages += conversation(3)[1:]
+    manager.fit(messages)
+    summaries = [
+        m
+        for m in messages
+        if str(m.get("content", "")).startswith(SUMMARY_PREFIX)
+    ]
+    assert len(summaries) == 1
+    assert summarized[1][0]["content"].startswith(SUMMARY_PREFIX)
+
+
+def test_old_tool_results_are_elided(counted):
+    manager = ContextWindowManager(max_tool_result_tokens=10)
+    messages = conversation(2, tool_result="x" * 500)
+
+    manager.fit(messages)
+
+    old_result, recent_result = [
+        m["content"] for m in messages if m["role"] == "tool"
+    ]
+    assert len(old_result) < 100 and "elided" in old_result
+    assert recent_result == "x" * 500
+
+
+def test_recent_turns_are_never_dropped(counted):
+    manager = ContextWindowManager(max_prompt_tokens=10, keep_recent_turns=2)
+    messages = conversation(2)
+    manager.fit(messages)
+    assert len(messages) == len(conversation(2))
@@ -0,0 +1,85 @@
+import threading
+
+import numpy as np
+
+from src.embedding_cache import EmbeddingCache, get_default_embedding_cache
+
+MODEL = "test-model"
+
+
+def vector(seed, dim=8):
+    return np.random.default_rng(seed).normal(size=dim).astype(np.float32)
+
+
+def test_round_trip_and_miss(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many(MODEL, ["a", "b"], np.stack([vector(1), vector(2)]))
+
+    a, missing, b = cache.get_many(MODEL, ["a", "zzz", "b"])
+    np.testing.assert_array_equal(a, vector(1))
+    np.testing.assert_array_equal(b, vector(2))
+    assert missing is None
+    assert cache.get_stats()["hits"] == 2
+
+
+def test_entries_are_keyed_by_model(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many(MODEL, ["a"], vector(1)[None])
+    assert cache.get_many("other-model", ["a"]) == [None]
+
+
+def test_instances_sharing_a_directory_keep_each_others_entries(tmp_path):
+    first = EmbeddingCache(str(tmp_path))
+    second = EmbeddingCache(str(tmp_path))
+
+    first.put_many(MODEL, ["from-first"], vector(1)[None])
+    second.put_many(MODEL, ["from-second"], vector(2)[None])
+
+    reopened = EmbeddingCache(str(tmp_path))
+    from_first, from_second = reopened.get_many(
+        MODEL, ["from-first", "from-second"]
+    )
+    np.testing.assert_array_equal(from_first, vector(1))
+    np.testing.assert_array_equal(from_second, vector(2))
+    # A live instance sees rows another instance appended
+    np.testing.assert_array_equal(
+        first.get_many(MODEL, ["from-second"])[0], vector(2)
+    )
+
+
+def test_interleaved_appends_point_at_their_own_rows(tmp_path):
+    caches = [EmbeddingCache(str(tmp_path)) for _ in range(4)]
+
+    def writer(worker, cache):
+        for i in range(25):
+            seed = worker * 100 + i
+            cache.put_many(MODEL, [f"text-{seed}"], vector(seed)[None])
+
+    threads = [
+        threading.Thread(target=writer, args=(worker, cache))
+        for worker, cache in enumerate(caches)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    reopened = EmbeddingCache(str(tmp_path))
+    seeds = [worker * 100 + i for worker in range(4) for i in range(25)]
+    results = reopened.get_many(MODEL, [f"text-{seed}" for seed in seeds])
+    for seed, result in zip(seeds, results, strict=True):
+        np.testing.assert_array_equal(result, vector(seed))
+
+
+def test_dimension_mismatch_is_not_written(tmp_path):
+    cache = EmbeddingCache(str(tmp_path))
+    cache.put_many(MODEL, ["a"], vector(1, dim=8)[None])
+    cache.put_many(MODEL, ["b"], vector(2, dim=4)[None])
+
+    a, b = EmbeddingCache(str(tmp_path)).get_many(MODEL, ["a", "b"])
+    np.testing.assert_array_equal(a, vector(1))
+    assert b is None
+
+
+def test_default_cache_is_shared():
+    assert get_default_embedding_cache() is get_default_embedding_cache()
@@ -0,0 +1,192 @@
+import asyncio
+
+import pytest
+
+import src.mcp_pool as mcp_pool
+from src.async_utils import GlobalLoopContext
+from src.config import MCPServerConfig
+from src.mcp_pool import MCPConnectionPool
+
+
+class FakeClient:
+    """Stands in for MCPServerClient; records its lifecycle."""
+
+    instances = []
+
+    def __init__(self, name, command=None, args=None):
+        self.name = name
+        self.tools = [{"type": "function", "function": {"name": "ping"}}]
+        self.tools_version = 1
+        self.session = None
+        self.connected = False
+        self.disconnected = False
+        self.calls = []
+        FakeClient.instances.append(self)
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.disconnected = True
+
+    async def call_tool(self, name, arguments):
+        self.calls.append((name, arguments))
+        return f"{name} from {id(self)}"
+
+
+@pytest.fixture
+def pool(monkeypatch):
+    FakeClient.instances = []
+    monkeypatch.setattr(mcp_pool, "MCPServerClient", FakeClient)
+    loop_context = GlobalLoopContext()
+    loop_context.start()
+    yield MCPConnectionPool(loop_context, acquire_timeout=2.0)
+    loop_context.run_coroutine(_cancel_pending_tasks())
+    loop_context.stop()
+
+
+async def _cancel_pending_tasks():
+    current = asyncio.current_task()
+    tasks = [t for t in asyncio.all_tasks() if t is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+def session_config(**kwargs):
+    return MCPServerConfig(
+        name="browser", command="fake", isolation="session", **kwargs
+    )
+
+
+def run(coro):
+    return asyncio.run(coro)
+
+
+def test_sequential_sessions_never_share_a_session_client(pool):
+    config = session_config(max_connections=1)
+
+    first = run(pool.lease(config, "session-a"))
+    first_client = first._connection.client
+    run(first.call_tool("ping", {}))
+    run(first.release())
+
+    second = run(pool.lease(config, "session-b"))
+    second_client = second._connection.client
+
+    assert second_client is not first_client
+    assert run(_wait_for(lambda: first_client.disconnected))
+    assert not second_client.disconnected
+    assert second_client.calls == []
+
+
+def test_session_waits_for_released_connection_then_gets_a_new_one(pool):
+    config = session_config(max_connections=1)
+    first = run(pool.lease(config, "session-a"))
+
+    async def lease_when_released():
+        waiter = asyncio.create_task(pool.lease(config, "session-b"))
+        await asyncio.sleep(0.1)
+        assert not waiter.done()
+        await first.release()
+        return await waiter
+
+    second = run(lease_when_released())
+    assert second._connection is not first._connection
+    assert second._connection.client is not first._connection.client
+
+
+def test_warm_spare_is_handed_out_once_and_replaced(pool):
+    config = session_config(min_connections=1, max_connections=2)
+
+    first = run(pool.lease(config, "session-a"))
+    run(first.release())
+    stats = pool.get_stats()["browser"]
+
+    # The released connection is closed and a new spare takes its place
+    assert stats == {"connections": 1, "leases": 0, "idle": 1}
+    second = run(pool.lease(config, "session-b"))
+    assert second._connection is not first._connection
+
+
+def test_shared_server_multiplexes_sessions(pool):
+    config = MCPServerConfig(name="search", command="fake")
+
+    first = run(pool.lease(config, "session-a"))
+    second = run(pool.lease(config, "session-b"))
+    assert first._connection is second._connection
+
+    run(pool.release_session("session-a"))
+    run(pool.release_session("session-b"))
+    third = run(pool.lease(config, "session-c"))
+    assert third._connection is first._connection
+    assert not first._connection.client.disconnected
+
+
+def test_unknown_isolation_is_rejected(pool):
+    config = MCPServerConfig(name="x", command="fake", isolation="thread")
+    with pytest.raises(ValueError):
+        run(pool.lease(config, "session-a"))
+
+
+def test_call_on_a_closed_connection_releases_the_stale_lease(pool):
+    config = session_config(max_connections=1)
+    lease = run(pool.lease(config, "session-a"))
+    stale = lease._connection
+    # Failed a health check, not yet dropped by maintenance
+    stale.closed = True
+
+    async def call_twice():
+        return await asyncio.gather(
+            lease.call_tool("ping", {}), lease.call_tool("ping", {})
+        )
+
+    # Without releasing the stale lease first, the new one would wait for
+    # a free slot until acquire_timeout
+    run(call_twice())
+    assert lease._connection is not stale
+    assert "session-a" not in stale.leases
+    assert pool.get_stats()["browser"] == {
+        "connections": 1,
+        "leases": 1,
+        "idle": 0,
+    }
+
+
+async def _wait_for(predicate, timeout=2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not predicate():
+        if asyncio.get_running_loop().time() > deadline:
+            return False
+        await asyncio.sleep(0.01)
+    return True
+
+
+def test_tool_calls_are_bounded_per_server(pool, monkeypatch):
+    in_flight = []
+    peak = []
+
+    async def slow_call(self, name, arguments):
+        in_flight.append(name)
+        peak.append(len(in_flight))
+        await asyncio.sleep(0.05)
+        in_flight.remove(name)
+        return name
+
+    monkeypatch.setattr(FakeClient, "call_tool", slow_call)
+    config = MCPServerConfig(
+        name="search", command="fake", max_concurrent_calls=2
+    )
+    leases = [run(pool.lease(config, f"session-{i}")) for i in range(3)]
+
+    async def call_all():
+        return await asyncio.gather(
+            *[leases[i % 3].call_tool(f"call-{i}", {}) for i in range(6)]
+        )
+
+    assert run(call_all()) == [f"call-{i}" for i in range(6)]
+    assert max(peak) == 2
+
+
+def test_shared_loop_is_a_singleton():
+    assert GlobalLoopContext.shared() is GlobalLoopContext.shared()
@@ -0,0 +1,73 @@
+import asyncio
+from types import SimpleNamespace
+
+import mcp.types as mcp_types
+
+from src.mcp_client import MCPServerClient
+from src.mcp_tool_cache import MCPToolListCache
+
+TOOLS = [{"name": "browse", "description": "Open a page", "parameters": {}}]
+
+
+def test_entries_persist_across_instances(tmp_path):
+    MCPToolListCache(str(tmp_path)).put("npx", ["server"], TOOLS)
+
+    cache = MCPToolListCache(str(tmp_path))
+    assert cache.get("npx", ["server"]) == TOOLS
+    assert cache.get("npx", ["other-server"]) is None
+    assert cache.get_stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_stale_and_invalidated_entries_are_misses(tmp_path):
+    cache = MCPToolListCache(str(tmp_path), ttl_seconds=0)
+    cache.put("npx", ["server"], TOOLS)
+    assert cache.get("npx", ["server"]) is None
+
+    cache = MCPToolListCache(str(tmp_path))
+    cache.invalidate("npx", ["server"])
+    assert MCPToolListCache(str(tmp_path)).get("npx", ["server"]) is None
+
+
+def test_unreadable_cache_file_is_ignored(tmp_path):
+    cache = MCPToolListCache(str(tmp_path))
+    cache.put("npx", ["server"], TOOLS)
+    path = next(tmp_path.glob("*.json"))
+    path.write_text("{not json")
+
+    assert MCPToolListCache(str(tmp_path)).get("npx", ["server"]) is None
+
+
+class FakeSession:
+    def __init__(self, names):
+        self.names = names
+        self.list_calls = 0
+
+    async def list_tools(self):
+        self.list_calls += 1
+        return SimpleNamespace(
+            tools=[
+                SimpleNamespace(name=name, description=name, inputSchema={})
+                for name in self.names
+            ]
+        )
+
+
+def test_tool_list_changed_notification_refreshes_the_client(tmp_path):
+    cache = MCPToolListCache(str(tmp_path))
+    client = MCPServerClient("web", command="npx", tool_cache=cache)
+    client.session = FakeSession(["browse"])
+
+    async def scenario():
+        await client.fetch_tools()
+        client.session.names = ["browse", "click"]
+        await client._handle_message(mcp_types.ToolListChangedNotification())
+        await client._refresh_task
+
+    asyncio.run(scenario())
+
+    assert [t["function"]["name"] for t in client.tools] == [
+        "browse",
+        "click",
+    ]
+    assert client.tools_version == 2
+    assert [t["name"] for t in cache.get("npx", [])] == ["browse", "click"]
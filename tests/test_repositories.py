@@ -0,0 +1,265 @@
+import pytest
+import streamlit as st
+
+from src.models import (
+    ComponentType,
+    LayoutComponent,
+    LayoutType,
+    PageOperation,
+    UIComponent,
+    UIPage,
+)
+from src.repositories import (
+    ComponentIndex,
+    PageHistory,
+    SessionStateUIRepository,
+    SQLiteUIRepository,
+    create_repository,
+)
+
+
+@pytest.fixture(autouse=True)
+def clean_session_state():
+    for key in ("ui_pages", "ui_component_index", "ui_page_history"):
+        st.session_state.pop(key, None)
+    yield
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "ui.db")
+
+
+@pytest.fixture(params=["session", "sqlite"])
+def repository(request, db_path):
+    if request.param == "session":
+        return SessionStateUIRepository()
+    return SQLiteUIRepository(db_path)
+
+
+def text(component_id, parent_id=None):
+    return UIComponent(
+        id=component_id,
+        type=ComponentType.TEXT,
+        data=component_id,
+        parent_id=parent_id,
+    )
+
+
+def ids(components):
+    return [component.id for component in components]
+
+
+def test_move_uses_list_index_after_deletes(repository):
+    repository.create_page("p", "Page")
+    for component_id in "abcde":
+        repository.add_component("p", text(component_id))
+    repository.delete_component("p", "b")
+    repository.delete_component("p", "c")
+
+    repository.move_component("p", "e", position=2)
+    assert ids(repository.get_page("p").components) == ["a", "d", "e"]
+
+    repository.move_component("p", "e", position=0)
+    assert ids(repository.get_page("p").components) == ["e", "a", "d"]
+
+    repository.move_component("p", "e")
+    assert ids(repository.get_page("p").components) == ["a", "d", "e"]
+
+
+def test_move_into_layout_and_cycle_check(repository):
+    repository.create_page("p", "Page")
+    repository.add_component(
+        "p",
+        LayoutComponent(
+            id="box", type=LayoutType.CONTAINER, children=[text("x", "box")]
+        ),
+    )
+    repository.add_component("p", text("a"))
+
+    repository.move_component("p", "a", parent_id="box", position=0)
+    (box,) = repository.get_page("p").components
+    assert ids(box.children) == ["a", "x"]
+
+    with pytest.raises(ValueError):
+        repository.move_component("p", "box", parent_id="box")
+
+
+def test_apply_operations_is_atomic(repository):
+    repository.create_page("p", "Page")
+    repository.add_component("p", text("a"))
+    version = repository.get_page("p").version
+
+    with pytest.raises(ValueError):
+        repository.apply_operations(
+            "p",
+            [
+                PageOperation(op="add_component", component=text("b")),
+                PageOperation(op="delete_component", component_id="missing"),
+            ],
+        )
+    page = repository.get_page("p")
+    assert ids(page.components) == ["a"]
+    assert page.version == version
+
+    repository.apply_operations(
+        "p",
+        [
+            PageOperation(op="add_component", component=text("b")),
+            PageOperation(op="move_component", component_id="b", position=0),
+        ],
+    )
+    assert ids(repository.get_page("p").components) == ["b", "a"]
+
+
+def test_delete_page_removes_its_components(repository):
+    repository.create_page("p", "Page")
+    repository.add_component("p", text("a"))
+
+    repository.delete_page("p")
+    assert repository.get_page("p") is None
+    with pytest.raises(ValueError):
+        repository.delete_page("p")
+
+    # The id is free again, without the old components
+    repository.create_page("p", "Page")
+    assert repository.get_page("p").components == []
+
+
+def test_sqlite_namespaces_do_not_collide(db_path):
+    first = SQLiteUIRepository(db_path, namespace="alice")
+    second = SQLiteUIRepository(db_path, namespace="bob")
+
+    first.create_page("home", "Alice")
+    second.create_page("home", "Bob")
+    first.add_component("home", text("a"))
+    second.add_component("home", text("a"))
+    second.delete_component("home", "a")
+
+    assert first.get_page("home").title == "Alice"
+    assert ids(first.get_page("home").components) == ["a"]
+    assert second.get_page("home").components == []
+    assert ids(first.get_all_pages()) == ["home"]
+
+
+def test_session_history_undo_redo_and_diff():
+    repository = SessionStateUIRepository()
+    repository.create_page("p", "Page")
+    repository.add_component("p", text("a"))
+    repository.add_component("p", text("b"))
+    repository.update_component("p", "a", data="changed")
+
+    diff = repository.diff("p", 1)
+    assert diff.updated == ["a"] and diff.added == ["b"]
+
+    undone = repository.undo("p")
+    assert undone.components[0].data == "a"
+    assert repository.redo("p").components[0].data == "changed"
+    assert repository.redo("p") is None
+
+
+def test_create_repository_follows_environment(monkeypatch, db_path):
+    monkeypatch.delenv("UI_DB_PATH", raising=False)
+    assert isinstance(create_repository(), SessionStateUIRepository)
+
+    monkeypatch.setenv("UI_DB_PATH", db_path)
+    monkeypatch.setenv("UI_DB_NAMESPACE", "team")
+    repository = create_repository()
+    assert isinstance(repository, SQLiteUIRepository)
+    assert repository.namespace == "team"
+
+
+def test_component_index_tracks_nested_components():
+    box = LayoutComponent(
+        id="box",
+        type=LayoutType.CONTAINER,
+        children=[
+            LayoutComponent(
+                id="cols", type=LayoutType.COLUMNS, children=[text("x")]
+            )
+        ],
+    )
+    index = ComponentIndex()
+    index.add(box, None)
+
+    assert index.parents == {"box": None, "cols": "box", "x": "cols"}
+    assert index.subtree_ids(box) == ["box", "cols", "x"]
+    assert index.is_within("x", "box") and not index.is_within("box", "x")
+
+    copy = index.copy()
+    index.remove("cols")
+    assert set(index.nodes) == {"box"}
+    assert set(copy.nodes) == {"box", "cols", "x"}
+
+
+def test_session_index_matches_the_page_after_mutations():
+    repository = SessionStateUIRepository()
+    repository.create_page("p", "Page")
+    repository.add_component(
+        "p", LayoutComponent(id="box", type=LayoutType.CONTAINER)
+    )
+    repository.add_component("p", text("a", "box"))
+    repository.add_component("p", text("b"))
+    repository.move_component("p", "b", parent_id="box", position=0)
+    repository.delete_component("p", "a")
+
+    page = repository.get_page("p")
+    rebuilt = ComponentIndex(page)
+    index = st.session_state.ui_component_index["p"]
+    assert index.parents == rebuilt.parents == {"box": None, "b": "box"}
+    assert index.nodes["box"] is page.components[0]
+
+
+def test_page_history_trims_and_never_reuses_versions():
+    history = PageHistory(UIPage(id="p", title="v0"), max_versions=3)
+    for title in ("v1", "v2", "v3"):
+        history.commit(UIPage(id="p", title=title))
+
+    assert [p.version for p in history.snapshots] == [1, 2, 3]
+    assert history.get(0) is None
+    assert history.undo().title == "v2"
+
+    # A new commit drops the redo state; its version is not reused
+    assert history.commit(UIPage(id="p", title="v4")).version == 4
+    assert history.redo() is None
+    assert [p.title for p in history.snapshots] == ["v1", "v2", "v4"]
+
+
+def test_snapshots_share_unchanged_components():
+    repository = SessionStateUIRepository()
+    repository.create_page("p", "Page")
+    repository.add_component(
+        "p",
+        LayoutComponent(
+            id="box", type=LayoutType.CONTAINER, children=[text("x", "box")]
+        ),
+    )
+    repository.add_component("p", text("a"))
+    before = repository.get_page("p")
+
+    repository.update_component("p", "a", data="changed")
+    after = repository.get_page("p")
+
+    assert after is not before
+    assert after.components[0] is before.components[0]
+    assert before.components[1].data == "a"
+    assert repository.get_page_version("p", before.version) is before
+
+
+def test_diff_reports_moves_and_removals():
+    repository = SessionStateUIRepository()
+    repository.create_page("p", "Page")
+    for component_id in "abc":
+        repository.add_component("p", text(component_id))
+    version = repository.get_page("p").version
+
+    repository.move_component("p", "c", position=0)
+    repository.delete_component("p", "b")
+    repository.update_page("p", title="Renamed")
+
+    diff = repository.diff("p", version)
+    assert sorted(diff.moved) == ["a", "c"]  # their relative order changed
+    assert diff.removed == ["b"]
+    assert diff.page_changed and not diff.updated and not diff.added
+    with pytest.raises(ValueError):
+        repository.diff("p", 999)
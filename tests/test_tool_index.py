@@ -0,0 +1,162 @@
+import numpy as np
+import pytest
+
+from src.tool_manager import ExactIndex, IVFIndex, KeywordIndex
+
+
+def random_vectors(count, dim=16, seed=0):
+    return (
+        np.random.default_rng(seed)
+        .normal(size=(count, dim))
+        .astype(np.float32)
+    )
+
+
+def brute_force(vectors, query, top_k):
+    normalized = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = normalized @ (query / np.linalg.norm(query))
+    return list(np.argsort(-scores)[:top_k])
+
+
+def test_exact_index_matches_brute_force():
+    vectors = random_vectors(200)
+    index = ExactIndex()
+    index.add_many([f"t{i}" for i in range(200)], vectors, ["general"] * 200)
+
+    query = vectors[17] + 0.1
+    results = index.search(query, top_k=5, threshold=-1.0)
+    assert [name for name, _ in results] == [
+        f"t{i}" for i in brute_force(vectors, query, 5)
+    ]
+    assert results[0] == ("t17", pytest.approx(results[0][1]))
+    assert results[0][1] > 0.9
+
+
+def test_exact_index_filters_by_category_and_threshold():
+    index = ExactIndex()
+    index.add_many(
+        ["a", "b", "c"],
+        np.eye(3, dtype=np.float32),
+        ["ui", "data", "ui"],
+    )
+
+    assert index.search(np.array([1, 1, 0]), category="data") == [
+        ("b", pytest.approx(np.sqrt(0.5)))
+    ]
+    assert index.search(np.array([0, 1, 1]), threshold=0.8) == []
+
+
+def test_exact_index_replaces_existing_vectors():
+    index = ExactIndex()
+    index.add("a", np.array([1.0, 0.0]), "general")
+    index.add("a", np.array([0.0, 1.0]), "general")
+
+    assert len(index) == 1
+    assert index.search(np.array([0.0, 1.0]))[0][0] == "a"
+
+
+@pytest.mark.parametrize("precision", ["float16", "int8"])
+def test_quantized_index_keeps_ranking_and_saves_memory(precision):
+    vectors = random_vectors(500, dim=64)
+    names = [f"t{i}" for i in range(500)]
+    full = ExactIndex()
+    full.add_many(names, vectors, ["general"] * 500)
+    lookup = dict(zip(names, vectors, strict=True))
+    quantized = ExactIndex(
+        precision, full_precision_lookup=lambda ns: [lookup[n] for n in ns]
+    )
+    quantized.add_many(names, vectors, ["general"] * 500)
+
+    for seed in range(5):
+        query = random_vectors(1, dim=64, seed=100 + seed)[0]
+        expected = full.search(query, top_k=3, threshold=-1.0)
+        actual = quantized.search(query, top_k=3, threshold=-1.0)
+        assert [n for n, _ in actual] == [n for n, _ in expected]
+        # Rescored from the full-precision lookup
+        assert [s for _, s in actual] == pytest.approx(
+            [s for _, s in expected], abs=1e-5
+        )
+    assert quantized.memory_bytes() < full.memory_bytes()
+
+
+def test_invalid_precision_is_rejected():
+    with pytest.raises(ValueError):
+        ExactIndex("int4")
+
+
+def test_ivf_index_is_exact_until_trained_then_approximate():
+    vectors = random_vectors(2000, dim=32)
+    names = [f"t{i}" for i in range(2000)]
+    index = IVFIndex(min_train_size=1000, probe_fraction=0.3)
+
+    index.add_many(names[:500], vectors[:500], ["general"] * 500)
+    assert not index.is_trained
+    index.add_many(names[500:], vectors[500:], ["general"] * 1500)
+    assert index.is_trained
+
+    # A stored vector is always found through its own cluster
+    hits = sum(
+        index.search(vectors[i], top_k=1)[0][0] == names[i]
+        for i in range(0, 2000, 50)
+    )
+    assert hits == 40
+
+    # Recall against the exact answer stays high
+    recall = []
+    for seed in range(10):
+        query = random_vectors(1, dim=32, seed=500 + seed)[0]
+        expected = {names[i] for i in brute_force(vectors, query, 10)}
+        found = {
+            name for name, _ in index.search(query, top_k=10, threshold=-1)
+        }
+        recall.append(len(found & expected) / 10)
+    assert np.mean(recall) >= 0.7
+
+
+def test_ivf_assigns_vectors_added_after_training():
+    vectors = random_vectors(300, dim=8)
+    index = IVFIndex(min_train_size=0)
+    index.add_many(
+        [f"t{i}" for i in range(200)], vectors[:200], ["general"] * 200
+    )
+    index.add_many(
+        [f"t{i}" for i in range(200, 210)], vectors[200:210], ["general"] * 10
+    )
+    assert index.search(vectors[205], top_k=1)[0][0] == "t205"
+
+
+def keyword_index():
+    index = KeywordIndex()
+    index.add(
+        "create_page",
+        "Create a new page in the app",
+        ["page", "new"],
+        "ui_management",
+    )
+    index.add(
+        "add_bar_chart",
+        "Add a bar chart to a page",
+        ["chart", "plot"],
+        "data_viz",
+    )
+    index.add("greeting", "Say hello", ["hello", "hi"], "general")
+    return index
+
+
+def test_keyword_index_ranks_by_bm25():
+    index = keyword_index()
+    assert index.search("plot a chart")[0][0] == "add_bar_chart"
+    assert index.search("new page")[0][0] == "create_page"
+    assert index.search("the of and") == []
+
+
+def test_keyword_index_category_filter_and_replacement():
+    index = keyword_index()
+    assert [n for n, _ in index.search("page", category="data_viz")] == [
+        "add_bar_chart"
+    ]
+
+    index.add("greeting", "Wave goodbye", ["bye"], "general")
+    assert index.search("hello") == []
+    assert index.search("goodbye")[0][0] == "greeting"
+    assert len(index) == 3
@@ -0,0 +1,218 @@
+import hashlib
+import re
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+import src.embedding_model as embedding_model
+import src.tool_manager as tool_manager
+from src.embedding_cache import EmbeddingCache
+from src.embedding_model import EmbeddingModelRegistry, SharedEmbeddingModel
+from src.tool_manager import EMBEDDING_MODEL_NAME, ToolManager
+from src.tool_models import Tool
+
+
+class FakeEncoder:
+    """Bag-of-words hashing encoder standing in for SentenceTransformer."""
+
+    def __init__(self, *args, **kwargs):
+        self.calls = []
+
+    def encode(self, text, **kwargs):
+        self.calls.append(text)
+        if isinstance(text, list):
+            return np.stack([self._embed(t) for t in text])
+        return self._embed(text)
+
+    def parameters(self):
+        return iter(())
+
+    @staticmethod
+    def _embed(text):
+        vector = np.full(64, 0.01, dtype=np.float32)
+        for word in re.findall(r"[a-z]+", text.lower()):
+            digest = hashlib.md5(word.encode()).hexdigest()
+            vector[int(digest, 16) % 64] += 1
+        return vector
+
+
+@pytest.fixture
+def encoder(monkeypatch):
+    encoder = FakeEncoder()
+    model = SharedEmbeddingModel(EMBEDDING_MODEL_NAME)
+    model._model = encoder
+    monkeypatch.setattr(tool_manager, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setitem(
+        EmbeddingModelRegistry._models, EMBEDDING_MODEL_NAME, model
+    )
+    return encoder
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return EmbeddingCache(str(tmp_path))
+
+
+def tool(name, description):
+    return Tool(name=name, description=description, parameters={}, strict=True)
+
+
+TOOLS = [
+    ("create_page", "Create a new page", ["page", "new"], "ui_management"),
+    ("add_bar_chart", "Add a bar chart", ["chart", "plot"], "data_viz"),
+    ("greeting", "Say hello to the user", ["hello", "hi"], "general"),
+]
+
+
+def register_all(manager):
+    manager.register_tools(
+        [
+            {
+                "name": name,
+                "tool": tool(name, description),
+                "keywords": keywords,
+                "category": category,
+            }
+            for name, description, keywords, category in TOOLS
+        ]
+    )
+
+
+def wait_until_ready(manager):
+    manager.model.load_in_background().result(timeout=5)
+    # The future resolves before its done callbacks run
+    deadline = time.monotonic() + 5
+    while not manager.semantic_ready and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert manager.semantic_ready
+
+
+def test_batch_registration_encodes_once_and_reuses_the_disk_cache(
+    encoder, cache
+):
+    manager = ToolManager(embedding_cache=cache)
+    wait_until_ready(manager)
+    register_all(manager)
+
+    assert [len(call) for call in encoder.calls] == [3]
+    assert len(manager.embedding_index) == 3
+
+    # Another session finds the embeddings in the shared cache
+    encoder.calls.clear()
+    register_all(ToolManager(embedding_cache=cache))
+    assert encoder.calls == []
+
+
+def test_semantic_search_loads_matching_tools(encoder, cache):
+    manager = ToolManager(embedding_cache=cache)
+    wait_until_ready(manager)
+    register_all(manager)
+
+    manager.search("plot a bar chart", top_k=1)
+    assert manager.is_loaded("add_bar_chart")
+    assert not manager.is_loaded("create_page")
+
+
+def test_query_embeddings_and_results_are_memoized(encoder, cache):
+    manager = ToolManager(embedding_cache=cache)
+    wait_until_ready(manager)
+    register_all(manager)
+    encoder.calls.clear()
+
+    manager.search("Plot a chart")
+    manager.search("  plot   a CHART ")
+    assert encoder.calls == ["plot a chart"]
+    assert manager.search_results_cache.get_stats()["hits"] == 1
+
+    # Registering tools invalidates cached results but not embeddings
+    manager.register_tool(
+        "line_chart", tool("line_chart", "Line chart"), ["chart"]
+    )
+    manager.search("plot a chart")
+    assert encoder.calls[1:] == [["line_chart: Line chart. Keywords: chart"]]
+
+
+def test_hybrid_search_fuses_semantic_and_keyword_rankings(encoder, cache):
+    manager = ToolManager(embedding_cache=cache, search_mode="hybrid")
+    wait_until_ready(manager)
+    register_all(manager)
+
+    semantic = [("greeting", 0.9), ("create_page", 0.5)]
+    keyword = [("create_page", 7.0), ("add_bar_chart", 3.0)]
+    fused = manager._fuse_rankings([semantic, keyword])
+    assert [name for name, _ in fused] == [
+        "create_page",
+        "greeting",
+        "add_bar_chart",
+    ]
+
+    manager.search("create a new page", top_k=1)
+    assert manager.is_loaded("create_page")
+
+
+def test_keyword_mode_never_encodes(encoder, cache):
+    manager = ToolManager(embedding_cache=cache, search_mode="keyword")
+    wait_until_ready(manager)
+    register_all(manager)
+    encoder.calls.clear()
+
+    manager.search("say hello")
+    assert encoder.calls == []
+    assert manager.is_loaded("greeting")
+
+
+def test_invalid_search_mode_and_backend_are_rejected(cache):
+    with pytest.raises(ValueError):
+        ToolManager(embedding_cache=cache, search_mode="fuzzy")
+    with pytest.raises(ValueError):
+        ToolManager(embedding_cache=cache, index_backend="faiss")
+
+
+def test_tools_registered_while_the_model_loads_are_embedded_later(
+    monkeypatch, cache
+):
+    release = threading.Event()
+
+    class SlowEncoder(FakeEncoder):
+        def __init__(self, *args, **kwargs):
+            release.wait(5)
+            super().__init__()
+
+    # load() imports sentence_transformers only when the model is needed
+    monkeypatch.setitem(
+        sys.modules,
+        "sentence_transformers",
+        SimpleNamespace(SentenceTransformer=SlowEncoder),
+    )
+    monkeypatch.setattr(tool_manager, "SENTENCE_TRANSFORMERS_AVAILABLE", True)
+    monkeypatch.setattr(
+        embedding_model, "SENTENCE_TRANSFORMERS_AVAILABLE", True
+    )
+    monkeypatch.setitem(
+        EmbeddingModelRegistry._models,
+        EMBEDDING_MODEL_NAME,
+        SharedEmbeddingModel(EMBEDDING_MODEL_NAME),
+    )
+
+    manager = ToolManager(embedding_cache=cache)
+    register_all(manager)
+    assert not manager.semantic_ready
+    assert len(manager.embedding_index) == 0
+
+    # Keyword search serves requests until the model is ready
+    manager.search("say hello")
+    assert manager.is_loaded("greeting")
+
+    release.set()
+    wait_until_ready(manager)
+    assert len(manager.embedding_index) == 3
+
+
+def test_managers_share_one_model(encoder, cache):
+    first = ToolManager(embedding_cache=cache)
+    second = ToolManager(embedding_cache=cache)
+    assert first.model is second.model
@@ -0,0 +1,169 @@
+import asyncio
+import time
+from types import SimpleNamespace
+
+import pytest
+import streamlit as st
+from streamlit.runtime.scriptrunner_utils.script_requests import (
+    RerunData,
+    ScriptRequests,
+)
+
+import src.ui as ui
+from src.async_utils import GlobalLoopContext
+from src.config import MCPServerConfig
+from src.models import ComponentType
+
+
+@pytest.fixture
+def script_context(monkeypatch):
+    ctx = SimpleNamespace(session_id="s", script_requests=ScriptRequests())
+    alive = {"s": True}
+    monkeypatch.setattr(ui, "get_script_run_ctx", lambda: ctx)
+    monkeypatch.setattr(
+        ui, "_is_session_alive", lambda session_id: alive[session_id]
+    )
+    return ctx, alive
+
+
+def test_script_interrupted_on_rerun_request(script_context):
+    ctx, _ = script_context
+    assert not ui._script_interrupted()
+    ctx.script_requests.request_rerun(RerunData())
+    assert ui._script_interrupted()
+
+
+def test_script_interrupted_when_session_ends(script_context):
+    _, alive = script_context
+    alive["s"] = False
+    assert ui._script_interrupted()
+
+
+def test_script_interrupted_without_pending_state(script_context):
+    # A streamlit version without ScriptRequests._state only has the
+    # session end signal
+    ctx, alive = script_context
+    ctx.script_requests = SimpleNamespace()
+    assert not ui._script_interrupted()
+    alive["s"] = False
+    assert ui._script_interrupted()
+
+
+def test_not_interrupted_outside_a_script(monkeypatch):
+    monkeypatch.setattr(ui, "get_script_run_ctx", lambda: None)
+    assert not ui._script_interrupted()
+
+
+@pytest.fixture
+def plan_cache(monkeypatch):
+    st.session_state.pop("ui_render_plans", None)
+    compiled = []
+    compile_page = ui.DynamicPageRenderer.compile_page
+
+    def counting_compile(page):
+        compiled.append((page.id, page.version))
+        return compile_page(page)
+
+    monkeypatch.setattr(
+        ui.DynamicPageRenderer, "compile_page", staticmethod(counting_compile)
+    )
+    yield compiled
+    st.session_state.pop("ui_render_plans", None)
+
+
+def page(version, data="hello"):
+    return ui.UIPage(
+        id="p",
+        title="Page",
+        version=version,
+        components=[
+            ui.UIComponent(id="t", type=ComponentType.TEXT, data=data)
+        ],
+    )
+
+
+def test_render_plans_are_cached_per_page_version(plan_cache):
+    ui.DynamicPageRenderer.render_page(page(1))
+    ui.DynamicPageRenderer.render_page(page(1))
+    ui.DynamicPageRenderer.render_page(page(2))
+
+    assert plan_cache == [("p", 1), ("p", 2)]
+    assert st.session_state.ui_render_plans.get_stats()["entries"] == 2
+
+
+def test_render_plan_cache_is_bounded_by_data_size(plan_cache, monkeypatch):
+    monkeypatch.setattr(ui.DynamicPageRenderer, "max_plan_bytes", 1000)
+
+    ui.DynamicPageRenderer.render_page(page(1, data="x" * 600))
+    ui.DynamicPageRenderer.render_page(page(2, data="x" * 600))
+    stats = ui.DynamicPageRenderer._plan_cache().get_stats()
+    assert stats["entries"] == 1 and stats["bytes"] <= 1000
+
+    ui.DynamicPageRenderer.render_page(page(3, data="x" * 2000))
+    ui.DynamicPageRenderer.render_page(page(3, data="x" * 2000))
+    assert plan_cache.count(("p", 3)) == 2  # too large to keep
+
+
+class FakeConnectionPool:
+    def __init__(self, delays):
+        self.delays = delays
+        self.started = []
+
+    async def lease(self, config, session_id):
+        self.started.append(time.monotonic())
+        await asyncio.sleep(self.delays[config.name])
+        return f"client of {config.name}"
+
+
+class FakeAgent:
+    def __init__(self):
+        self.mcp_servers = {}
+        self.indexed = []
+
+    def add_mcp_server(self, name, client):
+        self.mcp_servers[name] = client
+
+    def index_mcp_tools(self):
+        self.indexed = list(self.mcp_servers)
+
+
+@pytest.fixture
+def sidebar_state():
+    st.session_state.mcp_connected = False
+    st.session_state.mcp_pending = {}
+    context = GlobalLoopContext()
+    context.start()
+    yield context
+    context.stop()
+    del st.session_state.mcp_connected
+    del st.session_state.mcp_pending
+
+
+def test_servers_connect_concurrently_and_late_ones_are_collected(
+    sidebar_state,
+):
+    configs = [
+        MCPServerConfig(name=name, command="fake")
+        for name in ("a", "b", "slow")
+    ]
+    agent = FakeAgent()
+    pool = FakeConnectionPool({"a": 0.2, "b": 0.2, "slow": 2.0})
+    sidebar = ui.SidebarManager(
+        agent,
+        configs,
+        sidebar_state,
+        pool,
+        "session",
+        startup_wait=0.4,
+    )
+
+    sidebar.connect_servers()
+    assert max(pool.started) - min(pool.started) < 0.1
+    assert agent.mcp_servers == {"a": "client of a", "b": "client of b"}
+    assert list(st.session_state.mcp_pending) == ["slow"]
+
+    st.session_state.mcp_pending["slow"].result(timeout=5)
+    sidebar.collect_connected_servers()
+    assert agent.mcp_servers["slow"] == "client of slow"
+    assert agent.indexed == ["a", "b", "slow"]
+    assert st.session_state.mcp_pending == {}
@@ -0,0 +1,76 @@
+import pytest
+import streamlit as st
+
+from src.models import LayoutComponent
+from src.repositories import SessionStateUIRepository, SQLiteUIRepository
+from src.ui_tools import UIToolService
+
+
+@pytest.fixture(params=["session", "sqlite"])
+def repository(request, tmp_path):
+    for key in ("ui_pages", "ui_component_index", "ui_page_history"):
+        st.session_state.pop(key, None)
+    if request.param == "session":
+        return SessionStateUIRepository()
+    return SQLiteUIRepository(str(tmp_path / "ui.db"))
+
+
+DASHBOARD = [
+    {"type": "header", "data": "Sales"},
+    {
+        "type": "columns",
+        "props": {"spec": 2},
+        "children": [
+            {"type": "metric", "data": "10", "props": {"label": "Q1"}},
+            {"type": "metric", "data": "12", "props": {"label": "Q2"}},
+        ],
+    },
+]
+
+
+def test_build_page_creates_the_whole_tree(repository):
+    result = UIToolService(repository).build_page("Sales", DASHBOARD)
+
+    assert result.startswith("Page built successfully")
+    (page,) = repository.get_all_pages()
+    header, columns = page.components
+    assert header.data == "Sales"
+    assert isinstance(columns, LayoutComponent)
+    assert [child.props["label"] for child in columns.children] == [
+        "Q1",
+        "Q2",
+    ]
+    assert all(child.parent_id == columns.id for child in columns.children)
+    # Every component id is reported back to the model
+    for component in [header, columns, *columns.children]:
+        assert component.id in result
+
+
+@pytest.mark.parametrize(
+    "spec",
+    [
+        [{"type": "sparkline", "data": "1"}],
+        [{"type": "text", "data": "x", "children": [{"type": "text"}]}],
+        [{"type": "container", "children": [{"type": "text"}]}],
+    ],
+)
+def test_invalid_spec_creates_nothing(repository, spec):
+    result = UIToolService(repository).build_page("Broken", spec)
+
+    assert result.startswith("Failed to build page")
+    assert repository.get_all_pages() == []
+
+
+def test_failed_write_after_validation_leaves_no_page(
+    repository, monkeypatch
+):
+    def fail(self, page_id, component):
+        raise ValueError("disk full")
+
+    # Patched on the class so the staged copy used by apply_operations
+    # fails too
+    monkeypatch.setattr(type(repository), "add_component", fail)
+    result = UIToolService(repository).build_page("Sales", DASHBOARD)
+
+    assert result == "Failed to build page: disk full"
+    assert repository.get_all_pages() == []